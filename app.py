@@ -1,27 +1,46 @@
-import json
 import os
 import pickle
 import re
 import uuid
 from datetime import datetime
-import markdown
+from functools import lru_cache
 import logging
 from export_rsvps import generate_rsvps_csv, get_csv_filename
-from flask import send_file, Response
+from flask import send_file, Response, jsonify
 from io import BytesIO
 from calendar_utils import generate_google_calendar_url, generate_ics_file
 from date_validation import validate_date_time
 
-from flask import Flask, render_template, request, redirect, url_for, send_from_directory, flash, session
-from google_auth_oauthlib.flow import Flow
+from flask import Flask, render_template, request, redirect, url_for, flash, session
 
-from event_config import get_event_config, get_all_events, update_event_config, add_new_event, format_event_time
+from event_config import get_event_config, get_event_by_id, get_all_events, get_upcoming_events, get_past_events, update_event_config, add_new_event, format_event_time
 from email_handler import send_email
 from email_content import generate_confirmation_email_body, generate_invitation_email_body
 from notifications import notify_phone
 from passkey_auth import passkey_bp, admin_required, get_current_admin
-
-app = Flask(__name__)
+import json_store
+from file_lock import locked
+from rsvp_record import RSVPRecord, load_records, records_to_json
+import rsvp_feed
+import token_index
+import guest_index
+import idempotency
+from rate_limit import rsvp_rate_limited
+import bot_tracker
+from static_assets import asset_url, image_sources, send_static
+import metrics
+import io_accounting
+import tracing
+from tracing import traced
+import profiler
+import memory_stats
+import archive
+import snapshot
+from preload import init_bytecode_cache
+
+# Static files go through serve_static() below rather than Flask's built-in
+# route, which would otherwise shadow it
+app = Flask(__name__, static_folder=None)
 
 # Load configuration
 try:
@@ -34,28 +53,91 @@ app.secret_key = app.config['SECRET_KEY']
 # Register passkey blueprint
 app.register_blueprint(passkey_bp)
 
+# Per-route latency and status metrics, exposed on /admin/metrics
+metrics.init_app(app)
+app.register_blueprint(metrics.metrics_bp)
+io_accounting.init_app(app)
+
+# Per-request span timing; slow requests are logged with their breakdown
+tracing.init_app(app)
+
+# Owner-armed sampling profiler (see admin settings)
+profiler.init_app(app)
+app.register_blueprint(profiler.profiler_bp)
+
+# Owner-only RSS and tracemalloc introspection
+app.register_blueprint(memory_stats.memory_bp)
+
+# Past events moved to cold storage by archive.py
+app.register_blueprint(archive.archive_bp)
+
+# Owner-triggered consistent backups of all site data
+app.register_blueprint(snapshot.snapshot_bp)
+
+# Cross-event guest lookup by email
+app.register_blueprint(guest_index.guests_bp)
+
+# Compiled templates are cached on disk (see preload.py)
+init_bytecode_cache(app)
+
 # Register template filter for formatting event time
 app.jinja_env.filters['format_time'] = format_event_time
 
+# Register helpers for fingerprinted static assets (see static_assets.py)
+app.jinja_env.globals['asset_url'] = asset_url
+app.jinja_env.globals['image_sources'] = image_sources
+
+# Descriptions rarely change, so each one is converted once per worker
+# (or once in the uWSGI master, see preload.py)
+@traced('markdown')
+@lru_cache(maxsize=256)
+def render_markdown(text):
+    import markdown  # loaded on first use to keep worker startup light
+    return markdown.markdown(text)
+
+@traced('load_rsvps')
 def load_rsvps(slug):
     try:
-        with open(f'rsvps_{slug}.json', 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
+        return load_records(f'rsvps_{slug}.json')
+    except (FileNotFoundError, json_store.JSONDecodeError):
         return []
 
+@traced('save_rsvps')
 def save_rsvps(slug, rsvps):
-    # Write to temp file first, then atomically rename to avoid data loss
-    temp_file = f'rsvps_{slug}.json.tmp'
-    target_file = f'rsvps_{slug}.json'
-
-    with open(temp_file, 'w') as f:
-        json.dump(rsvps, f, indent=2)
-        f.flush()
-        os.fsync(f.fileno())  # Ensure data is written to disk
+    # Temp file + fsync + atomic rename, so we never have a corrupt/empty file
+    json_store.atomic_write(f'rsvps_{slug}.json', records_to_json(rsvps))
+
+def rsvps_locked(slug):
+    # Held from load_rsvps() to save_rsvps() so concurrent writers (and
+    # archive.py) don't overwrite each other's changes
+    return locked(f'rsvps_{slug}.json.lock')
+
+def record_rsvp_write(event_config, position, rsvp_entry):
+    # Fan a saved RSVP out to the live admin feed and the token and guest
+    # indexes. The RSVP is already on disk at this point, so a failure here
+    # must not fail the request.
+    try:
+        rsvp_feed.record_change(event_config['id'], position, rsvp_entry)
+    except OSError as e:
+        app.logger.error(f"Failed to record RSVP change: {e}")
+    try:
+        token_index.record(rsvp_entry.get('token'), event_config['id'], position)
+    except OSError as e:
+        app.logger.error(f"Failed to index RSVP token: {e}")
+    try:
+        guest_index.record(event_config, rsvp_entry)
+    except OSError as e:
+        app.logger.error(f"Failed to update guest index: {e}")
 
-    # Atomic rename - if this succeeds, we never have a corrupt/empty file
-    os.replace(temp_file, target_file)
+def flush_bot_hits():
+    # Merge this worker's bot counts into the shared tally and alert once
+    # per window if bot traffic across all workers crosses the threshold.
+    window_seconds = app.config.get('BOT_ALERT_WINDOW_SECONDS', 300)
+    hits = bot_tracker.flush(app.config.get('BOT_ALERT_THRESHOLD', 10), window_seconds)
+    if hits is not None:
+        app.logger.warning(f"Bot RSVP alert: {hits} honeypot submissions in the current window")
+        notify_phone(f"BOT RSVP alert: {hits} bot submissions in the last {window_seconds // 60} min. "
+                     f"See /admin/bots")
 
 
 @app.route('/admin/<path:slug>/export')
@@ -90,6 +172,8 @@ def export_rsvps(slug):
 def before_request():
     app.logger.debug(f"Session: {session}")
     app.logger.debug(f"Request path: {request.path}")
+    if bot_tracker.flush_due(app.config.get('BOT_FLUSH_SECONDS', 60)):
+        flush_bot_hits()
 
 @app.route('/<slug>')
 def event_page(slug):
@@ -99,7 +183,7 @@ def event_page(slug):
         return "Event not found", 404
     
     # Convert Markdown description to HTML
-    event_config['description_html'] = markdown.markdown(event_config['description'])
+    event_config['description_html'] = render_markdown(event_config['description'])
     
     rsvps = load_rsvps(event_config['id'])
     attendees = [
@@ -113,7 +197,8 @@ def event_page(slug):
         for rsvp in rsvps if rsvp.get('attending') == 'yes'
     ]
 
-    return render_template('index.html', event=event_config, attendees=attendees)
+    return render_template('index.html', event=event_config, attendees=attendees,
+                           idempotency_key=str(uuid.uuid4()))
 
 # Landing page route
 @app.route('/')
@@ -121,6 +206,7 @@ def index():
     return render_template('landing.html')
 
 @app.route('/<slug>/rsvp', methods=['POST'])
+@rsvp_rate_limited
 def rsvp(slug):
     event_config = get_event_config(slug)
     if not event_config:
@@ -130,53 +216,95 @@ def rsvp(slug):
     if request.form.get('website', ''):
         # Silently redirect to thank you page without saving the RSVP
         # This way bots don't know they were detected
-        bot_info = f"Bot detected: {request.form.get('name')} / {request.form.get('email')}"
-        app.logger.warning(f"Bot submission detected for event {event_config['name']}: {bot_info}")
-        
-        # Send phone notification about bot submission
-        notify_phone(f"BOT RSVP for {event_config['name']}: {bot_info}")
-        
+        bot_info = f"{request.form.get('name')} / {request.form.get('email')}"
+
+        # Only count the hit in memory; logging and phone alerts happen in
+        # flush_bot_hits() when bot traffic crosses the alert threshold
+        bot_tracker.record(event_config['id'], request.remote_addr, bot_info)
+
         return redirect(url_for('thank_you', slug=event_config['slug'], 
                                attending=request.form.get('attending', 'no')))
 
+    # A double click or retry of a submission that already went through
+    # gets the same redirect back without saving, emailing or notifying
+    # again (rsvp_rate_limited let it through without spending tokens)
+    idempotency_key = request.form.get(idempotency.FORM_FIELD, '')
+    submission = idempotency.fingerprint(request.path, request.form)
+    claimed, location, pending = idempotency.begin(idempotency_key, submission)
+    if location:
+        return redirect(location)
+    if pending:
+        # The first click is still being saved. The browser shows this
+        # response rather than that one's, so thank the guest all the same.
+        return redirect(url_for('thank_you', slug=event_config['slug'],
+                                name=request.form.get('name', ''),
+                                attending=request.form.get('attending', 'no')))
+    try:
+        location = save_rsvp_submission(event_config)
+    except Exception:
+        if claimed:
+            idempotency.release(idempotency_key)
+        raise
+    if claimed:
+        idempotency.complete(idempotency_key, submission, location)
+    return redirect(location)
+
+def store_rsvp_submission(event_config):
+    # Add or update the submitted RSVP; returns it with 'New', 'Updated'
+    # or None when it was resubmitted unchanged
     rsvps = load_rsvps(event_config['id'])
     submitted_email = request.form['email'].strip().lower()
 
     # Dedupe by email: if this email already RSVP'd, update in place
-    existing_rsvp = next((r for r in rsvps if r.get('email', '').strip().lower() == submitted_email), None)
+    existing_position = next((i for i, r in enumerate(rsvps) if r.get('email', '').strip().lower() == submitted_email), None)
 
-    if existing_rsvp:
-        # Update the existing entry, keeping the original token
-        existing_rsvp['name'] = request.form['name']
-        existing_rsvp['attending'] = request.form['attending']
-        existing_rsvp['num_adults'] = int(request.form['num_adults'])
-        existing_rsvp['num_children'] = int(request.form['num_children'])
-        existing_rsvp['dietary_restrictions'] = request.form.get('dietary_restrictions', '')
-        existing_rsvp['comment'] = request.form.get('comment', '')
-        existing_rsvp['updated_at'] = datetime.now().isoformat()
-        save_rsvps(event_config['id'], rsvps)
-
-        rsvp_token = existing_rsvp['token']
-        rsvp_entry = existing_rsvp
-
-        notify_phone(f"Updated RSVP for {event_config['name']}: {rsvp_entry['name']} / {rsvp_entry['attending']}")
-    else:
-        rsvp_token = str(uuid.uuid4())
-        rsvp_entry = {
-            'timestamp': datetime.now().isoformat(),
+    if existing_position is not None:
+        existing_rsvp = rsvps[existing_position]
+        changes = {
             'name': request.form['name'],
-            'email': request.form['email'],
             'attending': request.form['attending'],
             'num_adults': int(request.form['num_adults']),
             'num_children': int(request.form['num_children']),
             'dietary_restrictions': request.form.get('dietary_restrictions', ''),
             'comment': request.form.get('comment', ''),
-            'token': rsvp_token,
         }
-        rsvps.append(rsvp_entry)
-        save_rsvps(event_config['id'], rsvps)
+        if all(existing_rsvp.get(field) == value for field, value in changes.items()):
+            return existing_rsvp, None
 
-        notify_phone(f"New RSVP for {event_config['name']}: {rsvp_entry['name']} / {rsvp_entry['attending']}")
+        # Update the existing entry, keeping the original token
+        existing_rsvp.update(changes)
+        existing_rsvp['updated_at'] = datetime.now().isoformat()
+        save_rsvps(event_config['id'], rsvps)
+        record_rsvp_write(event_config, existing_position, existing_rsvp)
+        return existing_rsvp, 'Updated'
+
+    rsvp_entry = RSVPRecord.from_dict({
+        'timestamp': datetime.now().isoformat(),
+        'name': request.form['name'],
+        'email': request.form['email'],
+        'attending': request.form['attending'],
+        'num_adults': int(request.form['num_adults']),
+        'num_children': int(request.form['num_children']),
+        'dietary_restrictions': request.form.get('dietary_restrictions', ''),
+        'comment': request.form.get('comment', ''),
+        'token': str(uuid.uuid4()),
+    })
+    rsvps.append(rsvp_entry)
+    save_rsvps(event_config['id'], rsvps)
+    record_rsvp_write(event_config, len(rsvps) - 1, rsvp_entry)
+    return rsvp_entry, 'New'
+
+def save_rsvp_submission(event_config):
+    # Save the submitted RSVP form and send the confirmation; returns the
+    # thank-you page URL to redirect to
+    with rsvps_locked(event_config['id']):
+        rsvp_entry, change = store_rsvp_submission(event_config)
+    if change is None:
+        # Resubmitted unchanged: nothing to save, email or notify
+        return url_for('thank_you', slug=event_config['slug'], **rsvp_entry)
+    rsvp_token = rsvp_entry['token']
+
+    notify_phone(f"{change} RSVP for {event_config['name']}: {rsvp_entry['name']} / {rsvp_entry['attending']}")
 
     # Send confirmation email
     update_url = url_for('update_rsvp', slug=event_config['slug'], token=rsvp_token, _external=True)
@@ -187,7 +315,7 @@ def rsvp(slug):
     except Exception as e:
       app.logger.error(f"Failed to send confirmation email: {e}")
 
-    return redirect(url_for('thank_you', slug=event_config['slug'], **rsvp_entry))
+    return url_for('thank_you', slug=event_config['slug'], **rsvp_entry)
 
 @app.route('/<slug>/thank-you')
 def thank_you(slug):
@@ -196,44 +324,83 @@ def thank_you(slug):
         return "Event not found", 404
     
     # Convert Markdown description to HTML
-    event_config['description_html'] = markdown.markdown(event_config['description'])
+    event_config['description_html'] = render_markdown(event_config['description'])
     
     return render_template('thank_you.html', event=event_config, **request.args)
 
+def find_rsvp_position(rsvps, token, indexed):
+    # Trust the token index's position when it still holds this token,
+    # otherwise scan for it; None if the token is not in the list
+    position = indexed['position'] if indexed else None
+    if position is None or position >= len(rsvps) or rsvps[position].get('token') != token:
+        position = next((i for i, r in enumerate(rsvps) if r.get('token') == token), None)
+    return position
+
 @app.route('/<slug>/update-rsvp/<token>', methods=['GET', 'POST'])
 def update_rsvp(slug, token):
+    indexed = token_index.lookup(token)
     event_config = get_event_config(slug)
+    if indexed and (not event_config or event_config['id'] != indexed['event_id']):
+        # The link carries a stale or mangled slug; send the guest to the
+        # event the token belongs to (307 keeps a POST body intact)
+        owner = get_event_by_id(indexed['event_id'])
+        if owner:
+            return redirect(url_for('update_rsvp', slug=owner['slug'], token=token),
+                            code=307 if request.method == 'POST' else 302)
     if not event_config:
         return "Event not found", 404
 
-    rsvps = load_rsvps(event_config['id'])
-    rsvp_entry = next((r for r in rsvps if r.get('token') == token), None)
-    if not rsvp_entry:
-        return "RSVP not found", 404
-
     if request.method == 'POST':
         new_attending = request.form['attending']
-        rsvp_entry['attending'] = new_attending
+        changes = {'attending': new_attending}
         if new_attending == 'no':
-            rsvp_entry['num_adults'] = 0
-            rsvp_entry['num_children'] = 0
+            changes['num_adults'] = 0
+            changes['num_children'] = 0
         elif new_attending == 'yes':
-            rsvp_entry['num_adults'] = int(request.form.get('num_adults', 1))
-            rsvp_entry['num_children'] = int(request.form.get('num_children', 0))
-            rsvp_entry['dietary_restrictions'] = request.form.get('dietary_restrictions', '')
-        rsvp_entry['updated_at'] = datetime.now().isoformat()
-        save_rsvps(event_config['id'], rsvps)
+            changes['num_adults'] = int(request.form.get('num_adults', 1))
+            changes['num_children'] = int(request.form.get('num_children', 0))
+            changes['dietary_restrictions'] = request.form.get('dietary_restrictions', '')
+
+        with rsvps_locked(event_config['id']):
+            rsvps = load_rsvps(event_config['id'])
+            position = find_rsvp_position(rsvps, token, indexed)
+            if position is None:
+                return "RSVP not found", 404
+            rsvp_entry = rsvps[position]
+            if all(rsvp_entry.get(field) == value for field, value in changes.items()):
+                # Resubmitted unchanged: nothing to save or notify
+                return redirect(url_for('thank_you', slug=slug, name=rsvp_entry['name'], attending=new_attending))
+
+            rsvp_entry.update(changes)
+            rsvp_entry['updated_at'] = datetime.now().isoformat()
+            save_rsvps(event_config['id'], rsvps)
+            record_rsvp_write(event_config, position, rsvp_entry)
 
         notify_phone(f"RSVP updated for {event_config['name']}: {rsvp_entry['name']} → {new_attending}")
 
         return redirect(url_for('thank_you', slug=slug, name=rsvp_entry['name'], attending=new_attending))
 
-    event_config['description_html'] = markdown.markdown(event_config['description'])
+    # Render what the RSVP file holds now; the index only saves the scan
+    rsvps = load_rsvps(event_config['id'])
+    position = find_rsvp_position(rsvps, token, indexed)
+    if position is None:
+        return "RSVP not found", 404
+    rsvp_entry = rsvps[position]
+
+    event_config['description_html'] = render_markdown(event_config['description'])
     return render_template('update_rsvp.html', event=event_config, rsvp=rsvp_entry)
 
-@app.route('/static/<path:file>')
-def serve_static(file):
-    return send_from_directory('static', file)
+@app.route('/r/<token>')
+def rsvp_short_link(token):
+    indexed = token_index.lookup(token)
+    event_config = get_event_by_id(indexed['event_id']) if indexed else None
+    if not event_config:
+        return "RSVP not found", 404
+    return redirect(url_for('update_rsvp', slug=event_config['slug'], token=token))
+
+@app.route('/static/<path:filename>', endpoint='static')
+def serve_static(filename):
+    return send_static(filename)
 
 @app.route('/admin/login', methods=['GET', 'POST'])
 def admin_login():
@@ -271,7 +438,38 @@ def admin_logout():
 @admin_required
 def admin_dashboard():
     events = get_all_events()
-    return render_template('admin_dashboard.html', events=events)
+    upcoming_events = get_upcoming_events()
+    past_events = get_past_events()
+    # Events with no starts_at/ends_at (an unparseable date, or saved before
+    # backfill_event_datetimes.py was run) are listed separately
+    dated = {event['slug'] for event in upcoming_events + past_events}
+    undated_events = [event for slug, event in events.items() if slug not in dated]
+    return render_template('admin_dashboard.html', events=events, upcoming_events=upcoming_events,
+                           past_events=past_events, undated_events=undated_events)
+
+@app.route('/admin/bots')
+@admin_required
+def admin_bots():
+    """Show honeypot submission counts merged from all workers."""
+    flush_bot_hits()
+    stats = bot_tracker.get_stats()
+    events_by_id = {event['id']: event for event in get_all_events().values()}
+    event_counts = sorted(
+        ((events_by_id.get(event_id, {}).get('name', event_id), count)
+         for event_id, count in stats['events'].items()),
+        key=lambda item: item[1], reverse=True)
+    source_counts = sorted(stats['sources'].items(), key=lambda item: item[1], reverse=True)[:20]
+    samples = [
+        {
+            'event_name': events_by_id.get(sample['event_id'], {}).get('name', sample['event_id']),
+            'source': sample['source'],
+            'sample': sample['sample'],
+            'at': datetime.fromtimestamp(sample['at']).strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        for sample in stats['samples']
+    ]
+    return render_template('admin_bots.html', stats=stats, event_counts=event_counts,
+                           source_counts=source_counts, samples=samples)
 
 @app.route('/admin/new_event', methods=['POST'])
 @admin_required
@@ -371,11 +569,39 @@ def admin(slug):
             else:
                 flash('Failed to send invitation.', 'error')
 
-    return render_template('admin_event.html', event=event_config, rsvps=rsvps, slug=slug)
+    return render_template('admin_event.html', event=event_config, rsvps=rsvps, slug=slug,
+                           feed_seq=rsvp_feed.current_seq(event_config['id']),
+                           feed_poll_seconds=app.config.get('RSVP_FEED_POLL_SECONDS', 5))
+
+@app.route('/admin/<path:slug>/feed')
+@admin_required
+def rsvp_feed_changes(slug):
+    """Return the RSVPs added or updated since ``since`` for the admin table.
+
+    Answers at once, with an empty list when nothing changed; the page
+    polls again after a few seconds. ``reset`` tells it the changes it
+    missed are gone from the feed and the table must be reloaded.
+    """
+    event_config = get_event_config(slug)
+    if not event_config:
+        return "Event not found", 404
+
+    since = request.args.get('since', '')
+    if not since.isdigit():
+        return jsonify({'reset': True})
+    changes = rsvp_feed.read_changes(event_config['id'], int(since))
+    if changes is None:
+        return jsonify({'reset': True})
+    return jsonify({
+        'seq': changes[-1][0] if changes else int(since),
+        'changes': [dict(change, seq=seq) for seq, change in changes],
+    })
 
 @app.route('/oauth2callback')
 def oauth2callback():
     # This route will handle the OAuth callback
+    from google_auth_oauthlib.flow import Flow
+
     flow = Flow.from_client_secrets_file(
         'credentials.json',
         scopes=['https://www.googleapis.com/auth/gmail.send'],
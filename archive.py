@@ -0,0 +1,205 @@
+#!/usr/bin/python3
+"""Cold storage for events that are over.
+
+Every worker loads every event in data/events/ at startup, and RSVP files
+stay in the working directory forever. Archiving moves an event that
+ended more than ``days`` ago, together with its RSVPs, into one gzipped
+file, data/archive/<event id>.json.gz. It also adds a summary line to
+data/archive/index.json, so the archive can be listed without opening
+every file. Archived events stay readable and exportable from
+/admin/archive.
+
+Run from the directory that holds the rsvps_*.json files, then restart
+the app so the workers drop the archived events:
+
+    python archive.py --days 90
+"""
+import argparse
+import gzip
+import os
+import re
+from datetime import datetime, timedelta
+from io import BytesIO
+
+from flask import Blueprint, flash, redirect, render_template, send_file, url_for
+
+import json_store
+from export_rsvps import generate_rsvps_csv, get_csv_filename
+from file_lock import locked
+from passkey_auth import admin_required
+from rsvp_record import load_records
+
+archive_bp = Blueprint('archive', __name__)
+
+DEFAULT_ARCHIVE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'data', 'archive'))
+DEFAULT_ARCHIVE_AFTER_DAYS = 90
+
+_EVENT_ID_PATTERN = re.compile(r'^[A-Za-z0-9-]+$')
+
+
+class EventArchive:
+    def __init__(self, archive_dir=None):
+        self.archive_dir = archive_dir if archive_dir is not None else DEFAULT_ARCHIVE_DIR
+
+    @property
+    def index_path(self):
+        return os.path.join(self.archive_dir, 'index.json')
+
+    def _event_path(self, event_id):
+        return os.path.join(self.archive_dir, f'{event_id}.json.gz')
+
+    def archive_event(self, event, rsvps_dir='.'):
+        """Write ``event`` and its RSVPs to the archive; returns the index entry.
+
+        The caller removes the originals once this returns, so a crash in
+        between leaves them in place to be archived again next run.
+        """
+        rsvps_path = os.path.join(rsvps_dir, f"rsvps_{event['id']}.json")
+        try:
+            rsvps = [rsvp.to_dict() for rsvp in load_records(rsvps_path)]
+        except FileNotFoundError:
+            rsvps = []
+
+        os.makedirs(self.archive_dir, exist_ok=True)
+        path = self._event_path(event['id'])
+        temp_file = f'{path}.{os.getpid()}.tmp'
+        with open(temp_file, 'wb') as f:
+            f.write(gzip.compress(json_store.dumps({'event': event, 'rsvps': rsvps})))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, path)
+
+        entry = {
+            'id': event['id'],
+            'slug': event.get('slug'),
+            'name': event.get('name'),
+            'date': event.get('date'),
+            'starts_at': event.get('starts_at'),
+            'ends_at': event.get('ends_at'),
+            'rsvp_count': len(rsvps),
+            'attending_count': sum(1 for r in rsvps if r.get('attending') == 'yes'),
+            'archived_at': datetime.now().isoformat(),
+        }
+        with locked(self.index_path + '.lock'):
+            index = self.load_index()
+            index[event['id']] = entry
+            json_store.atomic_write(self.index_path, index)
+        return entry
+
+    def load_index(self):
+        try:
+            return json_store.load(self.index_path)
+        except (FileNotFoundError, json_store.JSONDecodeError):
+            return {}
+
+    def list_events(self):
+        """Index entries of archived events, most recent first."""
+        return sorted(self.load_index().values(), key=lambda entry: entry.get('starts_at') or '', reverse=True)
+
+    def load_event(self, event_id):
+        """Return {'event': ..., 'rsvps': [...]} for an archived event, or None."""
+        if not _EVENT_ID_PATTERN.match(event_id or ''):
+            return None
+        try:
+            with open(self._event_path(event_id), 'rb') as f:
+                return json_store.loads(gzip.decompress(f.read()))
+        except FileNotFoundError:
+            return None
+
+
+def _ended_before(config, cutoff):
+    """Events that ended before ``cutoff``, including ones saved without ends_at."""
+    from calendar_utils import event_datetimes
+    ended = list(config.get_past_events(cutoff))
+    for event in config.get_all_events().values():
+        if event.get('ends_at'):
+            continue
+        try:
+            if event_datetimes(event)[1].replace(tzinfo=None) < cutoff:
+                ended.append(event)
+        except (KeyError, TypeError, ValueError, OverflowError):
+            continue  # Unparseable date: leave it for an admin to fix
+    return ended
+
+
+def archive_past_events(config, archive, days=DEFAULT_ARCHIVE_AFTER_DAYS, rsvps_dir='.', now=None):
+    """Move events that ended more than ``days`` ago out of ``config``; returns their slugs.
+
+    Each event's RSVP file is locked the way the app locks it for a write,
+    from reading it until it is deleted. An event whose RSVP file changed
+    after it was read anyway (its size or mtime differ) is skipped and
+    left for the next run.
+    """
+    cutoff = (now or datetime.now()) - timedelta(days=days)
+    archived = []
+    for event in _ended_before(config, cutoff):
+        rsvps_path = os.path.join(rsvps_dir, f"rsvps_{event['id']}.json")
+        with locked(rsvps_path + '.lock'):
+            before = _file_state(rsvps_path)
+            archive.archive_event(event, rsvps_dir)
+            if _file_state(rsvps_path) != before:
+                continue
+            config.remove_event(event['slug'])
+            if before is not None:
+                os.remove(rsvps_path)
+        archived.append(event['slug'])
+    return archived
+
+
+def _file_state(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+# Create a singleton instance
+_instance = EventArchive()
+
+
+@archive_bp.route('/admin/archive')
+@admin_required
+def archived_events():
+    return render_template('admin_archive.html', events=_instance.list_events())
+
+
+@archive_bp.route('/admin/archive/<event_id>')
+@admin_required
+def archived_event(event_id):
+    archived = _instance.load_event(event_id)
+    if not archived:
+        return "Event not found", 404
+    return render_template('admin_archived_event.html', event=archived['event'], rsvps=archived['rsvps'])
+
+
+@archive_bp.route('/admin/archive/<event_id>/export')
+@admin_required
+def export_archived_rsvps(event_id):
+    archived = _instance.load_event(event_id)
+    if not archived:
+        return "Event not found", 404
+
+    csv_data = generate_rsvps_csv(archived['rsvps'])
+    if not csv_data:
+        flash('No RSVPs to export', 'error')
+        return redirect(url_for('archive.archived_event', event_id=event_id))
+
+    si = BytesIO()
+    si.write(csv_data.encode('utf-8-sig'))  # utf-8-sig adds BOM for Excel compatibility
+    si.seek(0)
+    return send_file(si, mimetype='text/csv', as_attachment=True,
+                     download_name=get_csv_filename(archived['event']['name']))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, default=DEFAULT_ARCHIVE_AFTER_DAYS,
+                        help='archive events that ended more than this many days ago')
+    args = parser.parse_args()
+
+    from event_config import _instance as event_config
+    slugs = archive_past_events(event_config, _instance, days=args.days)
+    print(f"Archived {len(slugs)} events into {_instance.archive_dir}")
+    for slug in slugs:
+        print(f"  {slug}")
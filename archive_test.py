@@ -0,0 +1,109 @@
+import fcntl
+import os
+from datetime import datetime
+import json_store
+from archive import EventArchive, archive_past_events
+from event_config import EventConfig
+
+
+def make_event(config, name, date):
+    event_id = config.add_new_event({
+        'name': name, 'date': date, 'start_time': '18:00', 'location': 'Home',
+        'description': '', 'max_guests_per_invite': 2,
+    })
+    return config.get_event_by_id(event_id)
+
+
+def test_archive_past_events(tmp_path):
+    config = EventConfig(str(tmp_path / 'live'), images_dir=str(tmp_path / 'uploads'))
+    archive = EventArchive(str(tmp_path / 'archive'))
+    old = make_event(config, 'Old Party', '2020-01-01')
+    recent = make_event(config, 'Recent Party', '2024-12-20')
+    upcoming = make_event(config, 'New Party', '2030-01-01')
+    rsvps = [{'name': 'Alex', 'email': 'alex@example.com', 'attending': 'yes', 'num_adults': 1, 'num_children': 0},
+             {'name': 'Sam', 'email': 'sam@example.com', 'attending': 'no', 'num_adults': 0, 'num_children': 0}]
+    json_store.atomic_write(str(tmp_path / f"rsvps_{old['id']}.json"), rsvps)
+
+    archived = archive_past_events(config, archive, days=90, rsvps_dir=str(tmp_path), now=datetime(2025, 1, 1))
+
+    assert archived == ['old-party']
+    assert config.get_existing_slugs() == {'recent-party', 'new-party'}
+    assert not os.path.exists(tmp_path / 'live' / 'old-party.json')
+    assert not os.path.exists(tmp_path / f"rsvps_{old['id']}.json")
+    assert {e['slug'] for e in EventConfig(str(tmp_path / 'live'))._events} == {'recent-party', 'new-party'}
+
+    stored = archive.load_event(old['id'])
+    assert stored['event']['name'] == 'Old Party'
+    assert stored['rsvps'] == rsvps
+    [entry] = archive.list_events()
+    assert (entry['id'], entry['rsvp_count'], entry['attending_count']) == (old['id'], 2, 1)
+    assert recent and upcoming
+
+
+def test_archive_event_without_rsvps(tmp_path):
+    archive = EventArchive(str(tmp_path / 'archive'))
+    archive.archive_event({'id': 'ev1', 'slug': 'quiet', 'name': 'Quiet', 'starts_at': '2020-01-01T18:00:00'},
+                          rsvps_dir=str(tmp_path))
+    archive.archive_event({'id': 'ev2', 'slug': 'later', 'name': 'Later', 'starts_at': '2021-01-01T18:00:00'},
+                          rsvps_dir=str(tmp_path))
+    assert archive.load_event('ev1')['rsvps'] == []
+    assert [entry['slug'] for entry in archive.list_events()] == ['later', 'quiet']
+
+
+def test_load_unknown_or_unsafe_event_id(tmp_path):
+    archive = EventArchive(str(tmp_path / 'archive'))
+    assert archive.load_event('missing') is None
+    assert archive.load_event('../events/x') is None
+    assert archive.list_events() == []
+
+
+def test_events_without_ends_at_are_archived(tmp_path):
+    config = EventConfig(str(tmp_path / 'live'), images_dir=str(tmp_path / 'uploads'))
+    old = make_event(config, 'Old Party', '2020-01-01')
+    del old['starts_at'], old['ends_at']  # saved before they were stored
+    archived = archive_past_events(config, EventArchive(str(tmp_path / 'archive')), days=90,
+                                   rsvps_dir=str(tmp_path), now=datetime(2025, 1, 1))
+    assert archived == ['old-party']
+
+
+def test_rsvp_written_during_archiving_keeps_event(tmp_path, monkeypatch):
+    """An RSVP file that changes while being archived is not deleted"""
+    config = EventConfig(str(tmp_path / 'live'), images_dir=str(tmp_path / 'uploads'))
+    archive = EventArchive(str(tmp_path / 'archive'))
+    old = make_event(config, 'Old Party', '2020-01-01')
+    rsvps_path = str(tmp_path / f"rsvps_{old['id']}.json")
+    json_store.atomic_write(rsvps_path, [{'name': 'Alex'}])
+
+    archive_event = archive.archive_event
+
+    def archive_then_write(event, rsvps_dir):
+        entry = archive_event(event, rsvps_dir)
+        # A writer that does not take the lock, e.g. an older worker
+        json_store.atomic_write(rsvps_path, [{'name': 'Alex'}, {'name': 'Sam'}])
+        return entry
+    monkeypatch.setattr(archive, 'archive_event', archive_then_write)
+
+    assert archive_past_events(config, archive, days=90, rsvps_dir=str(tmp_path), now=datetime(2025, 1, 1)) == []
+    assert config.get_existing_slugs() == {'old-party'}
+    assert len(json_store.load(rsvps_path)) == 2
+
+
+def test_rsvp_file_locked_while_archiving(tmp_path, monkeypatch):
+    config = EventConfig(str(tmp_path / 'live'), images_dir=str(tmp_path / 'uploads'))
+    archive = EventArchive(str(tmp_path / 'archive'))
+    old = make_event(config, 'Old Party', '2020-01-01')
+    lock_path = str(tmp_path / f"rsvps_{old['id']}.json.lock")
+    held = []
+
+    def archive_event(event, rsvps_dir):
+        fd = os.open(lock_path, os.O_RDWR)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            held.append(True)
+        finally:
+            os.close(fd)
+    monkeypatch.setattr(archive, 'archive_event', archive_event)
+
+    archive_past_events(config, archive, days=90, rsvps_dir=str(tmp_path), now=datetime(2025, 1, 1))
+    assert held == [True]
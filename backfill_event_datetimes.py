@@ -0,0 +1,34 @@
+#!/usr/bin/python3
+"""Add starts_at/ends_at to event files written before they were stored.
+
+    python backfill_event_datetimes.py [events_dir]
+
+Only files whose fields are missing or out of date are rewritten. Events
+whose date or times can't be parsed are listed so they can be fixed by
+hand.
+"""
+import sys
+
+from event_config import DEFAULT_EVENTS_DIR, EventConfig, set_event_datetimes
+
+
+def backfill_events(events_dir=DEFAULT_EVENTS_DIR):
+    """Returns (slugs updated, slugs whose date/times don't parse)."""
+    config = EventConfig(events_dir)
+    updated, unparsed = [], []
+    for event in config._events:
+        before = (event.get('starts_at'), event.get('ends_at'))
+        set_event_datetimes(event)
+        if 'starts_at' not in event:
+            unparsed.append(event.get('slug'))
+        if (event.get('starts_at'), event.get('ends_at')) != before:
+            config._save_event(event)
+            updated.append(event.get('slug'))
+    return updated, unparsed
+
+
+if __name__ == '__main__':
+    updated, unparsed = backfill_events(*sys.argv[1:2])
+    print(f"Updated {len(updated)} event files")
+    for slug in unparsed:
+        print(f"Could not parse the date/time of '{slug}'")
@@ -0,0 +1,35 @@
+import json
+import os
+from backfill_event_datetimes import backfill_events
+
+
+def write_event(events_dir, **fields):
+    event = {"id": fields["slug"], "name": fields["slug"], "date": "November 15, 2030",
+             "start_time": "7:00 PM", "end_time": ""}
+    event.update(fields)
+    with open(os.path.join(events_dir, f"{fields['slug']}.json"), 'w') as f:
+        json.dump(event, f, indent=2)
+
+
+def read_event(events_dir, slug):
+    with open(os.path.join(events_dir, f"{slug}.json")) as f:
+        return json.load(f)
+
+
+def test_backfill_events(tmp_path):
+    events_dir = str(tmp_path / "old_events")
+    os.makedirs(events_dir)
+    write_event(events_dir, slug="legacy")
+    write_event(events_dir, slug="current", starts_at="2030-11-15T19:00:00", ends_at="2030-11-15T21:00:00")
+    write_event(events_dir, slug="typo", date="Novembr 15th-ish")
+    untouched = os.stat(os.path.join(events_dir, "current.json")).st_mtime_ns
+
+    updated, unparsed = backfill_events(events_dir)
+
+    assert updated == ["legacy"]
+    assert unparsed == ["typo"]
+    legacy = read_event(events_dir, "legacy")
+    assert (legacy["starts_at"], legacy["ends_at"]) == ("2030-11-15T19:00:00", "2030-11-15T21:00:00")
+    assert legacy["date"] == "November 15, 2030"
+    assert os.stat(os.path.join(events_dir, "current.json")).st_mtime_ns == untouched
+    assert backfill_events(events_dir) == ([], ["typo"])
@@ -0,0 +1,215 @@
+#!/usr/bin/python3
+"""Benchmarks for the hot request paths, run against synthetic data.
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json
+
+Every benchmark runs in a scratch directory with all of the app's stores
+pointed into it, so production data is never read or written. Results are
+written as JSON. With --baseline, each median is compared against the
+stored one and the exit status is 1 when any slows down by more than
+--threshold.
+
+The app is imported normally, so config.py must exist just as it must for
+the server. Email and phone notifications are replaced with no-ops.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.synthetic import isolate_stores, make_rsvps, write_events
+
+DEFAULT_SIZES = (10, 1000, 50000)
+DEFAULT_EVENT_COUNT = 2000
+DEFAULT_THRESHOLD = 1.25
+
+
+def measure(fn, min_time=0.2, min_runs=3, max_runs=1000):
+    """Call ``fn`` repeatedly and summarize the wall-clock time per call."""
+    times = []
+    started = time.perf_counter()
+    while len(times) < max_runs and (len(times) < min_runs or time.perf_counter() - started < min_time):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {
+        'runs': len(times),
+        'min_s': min(times),
+        'median_s': statistics.median(times),
+        'mean_s': statistics.fmean(times),
+    }
+
+
+def _load_app():
+    import app as app_module
+
+    app_module.send_email = lambda *args, **kwargs: True
+    app_module.notify_phone = lambda *args, **kwargs: None
+    app_module.app.config.update(
+        RSVP_IP_RATE_PER_MINUTE=10 ** 9, RSVP_IP_BURST=10 ** 9,
+        RSVP_EMAIL_RATE_PER_MINUTE=10 ** 9, RSVP_EMAIL_BURST=10 ** 9,
+    )
+    return app_module
+
+
+def run_benchmarks(workdir, sizes=DEFAULT_SIZES, event_count=DEFAULT_EVENT_COUNT, only=None):
+    """Run every benchmark whose name contains ``only``; returns {name: timings}."""
+    isolate_stores(workdir)
+    import event_config
+    import json_store
+    from calendar_utils import generate_ics_file, parse_event_datetime
+    from date_validation import validate_date_time
+    from datetime_parsing import parse_datetime
+    from export_rsvps import generate_rsvps_csv
+    from rsvp_record import records_to_json
+
+    events = write_events(event_config._instance.events_dir, max(event_count, 1))
+    event_config._instance._events = event_config._instance._load_config()
+    app_module = _load_app()
+    client = app_module.app.test_client()
+
+    results = {}
+
+    def bench(name, fn):
+        if only and only not in name:
+            return
+        results[name] = measure(fn)
+        print(f"{name:40s} {results[name]['median_s'] * 1000:10.3f} ms  ({results[name]['runs']} runs)",
+              file=sys.stderr)
+
+    bench(f'event_config_startup[events={len(events)}]',
+          lambda: event_config.EventConfig(event_config._instance.events_dir))
+    last_slug = events[-1]['slug']
+    bench(f'event_config_lookup[events={len(events)}]', lambda: event_config.get_event_config(last_slug))
+    bench('generate_ics_file', lambda: generate_ics_file(events[0]))
+
+    # Date parsing at both call sites, plus the cold path against plain dateutil
+    date_str, start_time, end_time = events[0]['date'], events[0]['start_time'], events[0]['end_time']
+
+    def parse_uncached():
+        parse_datetime.cache_clear()
+        parse_datetime(date_str, start_time)
+
+    def parse_dateutil():
+        import dateutil.parser
+        dateutil.parser.parse(f'{date_str} {start_time}')
+    bench('parse_datetime_dateutil', parse_dateutil)
+    bench('parse_datetime_uncached', parse_uncached)
+    bench('validate_date_time', lambda: validate_date_time(date_str, start_time, end_time))
+    bench('parse_event_datetime', lambda: parse_event_datetime(date_str, start_time, end_time))
+
+    for size in sizes:
+        event = events[0]
+        app_module.save_rsvps(event['id'], make_rsvps(size))
+        rsvps = app_module.load_rsvps(event['id'])  # what the views work on and save
+
+        # The codec against the stdlib indent=2 format the stores used to
+        # write, both encoding the list of dicts save_rsvps() writes
+        rows = records_to_json(rsvps)
+        legacy = json.dumps(rows, indent=2)
+        compact = json_store.dumps(rows)
+        bench(f'json_legacy_dumps[{size}]', lambda: json.dumps(rows, indent=2))
+        bench(f'json_store_dumps[{size}]', lambda: json_store.dumps(rows))
+        bench(f'json_legacy_loads[{size}]', lambda: json.loads(legacy))
+        bench(f'json_store_loads[{size}]', lambda: json_store.loads(compact))
+
+        bench(f'load_rsvps[{size}]', lambda: app_module.load_rsvps(event['id']))
+        bench(f'save_rsvps[{size}]', lambda: app_module.save_rsvps(event['id'], rsvps))
+        bench(f'generate_rsvps_csv[{size}]', lambda: generate_rsvps_csv(rsvps))
+        bench(f'event_page[{size}]', lambda: client.get(f"/{event['slug']}"))
+
+        posted = iter(range(10 ** 9))
+
+        def post_rsvp():
+            i = next(posted)
+            client.post(f"/{event['slug']}/rsvp", data={
+                'name': f'Bench Guest{i}',
+                'email': f'bench.{size}.{i}@example.com',
+                'attending': 'yes',
+                'num_adults': '1',
+                'num_children': '0',
+            })
+        bench(f'rsvp_post[{size}]', post_rsvp)
+
+    return results
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Pair each result with its baseline; returns (rows, regressions)."""
+    rows = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        ratio = current['median_s'] / base['median_s'] if base['median_s'] else float('inf')
+        rows.append({'name': name, 'baseline_s': base['median_s'], 'current_s': current['median_s'],
+                     'ratio': ratio})
+    regressions = [row for row in rows if row['ratio'] > threshold]
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='comma-separated RSVP counts per event')
+    parser.add_argument('--events', type=int, default=DEFAULT_EVENT_COUNT, help='number of event files')
+    parser.add_argument('--only', help='run only benchmarks whose name contains this')
+    parser.add_argument('--output', help='write results JSON here (default: stdout)')
+    parser.add_argument('--baseline', help='results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='slowdown ratio that counts as a regression')
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='rsvp-bench-') as workdir:
+        try:
+            results = run_benchmarks(workdir, sizes, args.events, args.only)
+        finally:
+            os.chdir(cwd)
+
+    report = {
+        'meta': {
+            'time': datetime.now().isoformat(),
+            'revision': _git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)['results']
+    rows, regressions = compare(results, baseline, args.threshold)
+    for row in rows:
+        flag = '  REGRESSION' if row in regressions else ''
+        print(f"{row['name']:40s} {row['baseline_s'] * 1000:10.3f} -> {row['current_s'] * 1000:10.3f} ms "
+              f"({row['ratio']:.2f}x){flag}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""Synthetic events and RSVPs shaped like the real stores, and a scratch
+directory to keep them in."""
+import json
+import os
+import random
+import uuid
+from datetime import datetime, timedelta
+
+FIRST_NAMES = ('Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie', 'Avery', 'Quinn')
+LAST_NAMES = ('Smith', 'Nguyen', 'Garcia', 'Okafor', 'Kowalski', 'Tanaka', 'Haddad', 'Larsen', 'Silva', 'Brown')
+DIETARY = ('', '', '', 'vegetarian', 'vegan', 'gluten free', 'nut allergy')
+
+DESCRIPTION = """Join us for an evening of **food**, music and friends.
+
+* Dinner at 7
+* Cake at 8
+* Dancing until late
+
+Parking is on the street; please bring a jacket if you plan to sit outside.
+"""
+
+
+def make_event(i):
+    return {
+        'domain': f'event{i}.example.com',
+        'id': f'{i:08x}',
+        'slug': f'event-{i}',
+        'name': f'Synthetic Event {i}',
+        'date': 'November 15, 2030',
+        'start_time': '7:00 PM',
+        'end_time': '11:00 PM',
+        'location': '123 Main Street, Springfield',
+        'description': DESCRIPTION,
+        'max_guests_per_invite': 4,
+        'color_scheme': 'pink',
+    }
+
+
+def make_rsvp(i, rng):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    timestamp = datetime(2030, 1, 1) + timedelta(minutes=i)
+    return {
+        'timestamp': timestamp.isoformat(),
+        'name': f'{first} {last}',
+        'email': f'{first.lower()}.{last.lower()}.{i}@example.com',
+        'attending': rng.choice(('yes', 'yes', 'yes', 'no')),
+        'num_adults': rng.randint(1, 2),
+        'num_children': rng.randint(0, 2),
+        'dietary_restrictions': rng.choice(DIETARY),
+        'comment': 'Looking forward to it!' if i % 3 == 0 else '',
+        'token': str(uuid.UUID(int=rng.getrandbits(128))),
+    }
+
+
+def make_rsvps(count, seed=0):
+    rng = random.Random(seed)
+    return [make_rsvp(i, rng) for i in range(count)]
+
+
+def write_events(events_dir, count):
+    """Write ``count`` event files; returns the list of events."""
+    os.makedirs(events_dir, exist_ok=True)
+    events = [make_event(i) for i in range(count)]
+    for event in events:
+        with open(os.path.join(events_dir, f"{event['slug']}.json"), 'w') as f:
+            json.dump(event, f, indent=2)
+    return events
+
+
+def isolate_stores(workdir):
+    """Point every store the app reads or writes into ``workdir``."""
+    import archive
+    import bot_tracker
+    import event_config
+    import guest_index
+    import idempotency
+    import memory_stats
+    import metrics
+    import profiler
+    import rate_limit
+    import rsvp_feed
+    import snapshot
+    import token_index
+    import tracing
+
+    os.chdir(workdir)  # rsvps_<id>.json live in the working directory
+    event_config._instance.events_dir = os.path.join(workdir, 'events')
+    event_config._instance.images_dir = os.path.join(workdir, 'uploads')
+    event_config._instance._events = event_config._instance._load_config()
+    rsvp_feed._instance.feed_dir = os.path.join(workdir, 'feed')
+    rate_limit._instance.state_file = os.path.join(workdir, 'ratelimit.bin')
+    bot_tracker._instance.state_file = os.path.join(workdir, 'bot_hits.json')
+    metrics._instance.metrics_dir = os.path.join(workdir, 'metrics')
+    tracing._instance.log_path = os.path.join(workdir, 'slow_requests.log')
+    profiler._instance.profile_dir = os.path.join(workdir, 'profiles')
+    memory_stats._instance.snapshot_dir = os.path.join(workdir, 'memory')
+    token_index._instance.index_dir = os.path.join(workdir, 'tokens')
+    idempotency._instance.store_dir = os.path.join(workdir, 'idempotency')
+    archive._instance.archive_dir = os.path.join(workdir, 'archive')
+    snapshot._instance.snapshot_dir = os.path.join(workdir, 'snapshots')
+    guest_index._instance.index_dir = os.path.join(workdir, 'guests')
@@ -0,0 +1,27 @@
+from benchmarks.run import compare, measure
+from benchmarks.synthetic import make_rsvps
+
+
+def test_measure_runs_at_least_min_runs():
+    calls = []
+    result = measure(lambda: calls.append(1), min_time=0, min_runs=3)
+    assert result['runs'] == len(calls) == 3
+    assert result['min_s'] <= result['median_s']
+
+
+def test_compare_flags_regressions():
+    baseline = {'load_rsvps[10]': {'median_s': 1.0}, 'save_rsvps[10]': {'median_s': 1.0}}
+    results = {
+        'load_rsvps[10]': {'median_s': 1.1},
+        'save_rsvps[10]': {'median_s': 2.0},
+        'new_benchmark': {'median_s': 5.0},
+    }
+    rows, regressions = compare(results, baseline, threshold=1.25)
+    assert [row['name'] for row in rows] == ['load_rsvps[10]', 'save_rsvps[10]']
+    assert [row['name'] for row in regressions] == ['save_rsvps[10]']
+
+
+def test_synthetic_rsvps_are_deterministic():
+    """The same seed yields the same data, so runs are comparable"""
+    assert make_rsvps(50) == make_rsvps(50)
+    assert len({rsvp['email'] for rsvp in make_rsvps(50)}) == 50
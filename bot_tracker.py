@@ -0,0 +1,118 @@
+"""Cheap accounting for honeypot (bot) RSVP submissions.
+
+A bot hit only bumps in-memory counters in the worker that served it.
+Every so often each worker merges its pending counts into
+data/bot_hits.json, and that merge decides whether the hit rate across
+all workers is high enough to be worth a phone alert.
+"""
+import os
+import threading
+import time
+from collections import Counter
+
+import json_store
+from file_lock import locked
+
+DEFAULT_STATE_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), 'data', 'bot_hits.json'))
+SAMPLE_LIMIT = 20
+
+
+def _empty_state():
+    return {
+        'events': {},
+        'sources': {},
+        'samples': [],
+        'window_start': 0,
+        'window_hits': 0,
+        'alerted': False,
+        'last_flush': None,
+    }
+
+
+class BotTracker:
+    def __init__(self, state_file=None):
+        self.state_file = state_file if state_file is not None else DEFAULT_STATE_FILE
+        self._lock = threading.Lock()
+        self._by_event = Counter()
+        self._by_source = Counter()
+        self._samples = []
+        self._last_flush = time.time()
+
+    def record(self, event_id, source, sample=None):
+        """Count one bot hit. Only touches memory."""
+        with self._lock:
+            self._by_event[event_id] += 1
+            self._by_source[source] += 1
+            if sample and len(self._samples) < SAMPLE_LIMIT:
+                self._samples.append({
+                    'event_id': event_id,
+                    'source': source,
+                    'sample': sample,
+                    'at': time.time(),
+                })
+
+    def flush_due(self, interval, now=None):
+        now = time.time() if now is None else now
+        return now - self._last_flush >= interval
+
+    def _read_state(self):
+        try:
+            return json_store.load(self.state_file)
+        except (FileNotFoundError, json_store.JSONDecodeError):
+            return _empty_state()
+
+    def _write_state(self, state):
+        json_store.atomic_write(self.state_file, state, fsync=False)
+
+    def flush(self, alert_threshold, window_seconds, now=None):
+        """Merge this worker's pending counts into the shared state file.
+
+        Returns the number of bot hits seen across all workers in the
+        current alert window the first time it reaches ``alert_threshold``,
+        otherwise None. At most one alert fires per window.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            by_event, self._by_event = self._by_event, Counter()
+            by_source, self._by_source = self._by_source, Counter()
+            samples, self._samples = self._samples, []
+            self._last_flush = now
+        if not by_event:
+            return None
+
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        with locked(self.state_file + '.lock'):
+            state = self._read_state()
+            for event_id, count in by_event.items():
+                state['events'][event_id] = state['events'].get(event_id, 0) + count
+            for source, count in by_source.items():
+                state['sources'][source] = state['sources'].get(source, 0) + count
+            state['samples'] = (list(reversed(samples)) + state['samples'])[:SAMPLE_LIMIT]
+
+            if now - state['window_start'] >= window_seconds:
+                state['window_start'] = now
+                state['window_hits'] = 0
+                state['alerted'] = False
+            state['window_hits'] += sum(by_event.values())
+            state['last_flush'] = now
+
+            alert = None
+            if not state['alerted'] and state['window_hits'] >= alert_threshold:
+                state['alerted'] = True
+                alert = state['window_hits']
+
+            self._write_state(state)
+        return alert
+
+    def get_stats(self):
+        """Return the merged counts from all workers' flushes."""
+        return self._read_state()
+
+
+# Create a singleton instance
+_instance = BotTracker()
+
+record = _instance.record
+flush_due = _instance.flush_due
+flush = _instance.flush
+get_stats = _instance.get_stats
@@ -0,0 +1,79 @@
+from bot_tracker import BotTracker
+
+
+def make_tracker(tmp_path):
+    return BotTracker(str(tmp_path / "bot_hits.json"))
+
+
+def test_record_only_touches_memory(tmp_path):
+    """Recording hits does not write anything until a flush"""
+    tracker = make_tracker(tmp_path)
+    tracker.record('abc123', '1.2.3.4', 'Bot / bot@example.com')
+    assert not (tmp_path / "bot_hits.json").exists()
+
+
+def test_flush_merges_counts(tmp_path):
+    """Flushed counts are totalled per event and per source"""
+    tracker = make_tracker(tmp_path)
+    tracker.record('abc123', '1.2.3.4')
+    tracker.record('abc123', '1.2.3.4')
+    tracker.record('def456', '5.6.7.8')
+    tracker.flush(alert_threshold=100, window_seconds=300, now=1000.0)
+
+    stats = tracker.get_stats()
+    assert stats['events'] == {'abc123': 2, 'def456': 1}
+    assert stats['sources'] == {'1.2.3.4': 2, '5.6.7.8': 1}
+
+
+def test_flush_combines_workers(tmp_path):
+    """Two trackers (two workers) flushing to one file add up"""
+    first = make_tracker(tmp_path)
+    second = make_tracker(tmp_path)
+    first.record('abc123', '1.2.3.4')
+    second.record('abc123', '5.6.7.8')
+    first.flush(alert_threshold=100, window_seconds=300, now=1000.0)
+    second.flush(alert_threshold=100, window_seconds=300, now=1001.0)
+
+    assert first.get_stats()['events'] == {'abc123': 2}
+
+
+def test_alert_fires_once_per_window(tmp_path):
+    """Crossing the threshold alerts once, then stays quiet until the window rolls"""
+    tracker = make_tracker(tmp_path)
+    for _ in range(3):
+        tracker.record('abc123', '1.2.3.4')
+    assert tracker.flush(alert_threshold=3, window_seconds=300, now=1000.0) == 3
+
+    tracker.record('abc123', '1.2.3.4')
+    assert tracker.flush(alert_threshold=3, window_seconds=300, now=1010.0) is None
+
+    for _ in range(3):
+        tracker.record('abc123', '1.2.3.4')
+    assert tracker.flush(alert_threshold=3, window_seconds=300, now=1400.0) == 3
+
+
+def test_below_threshold_no_alert(tmp_path):
+    """A trickle of bot hits never alerts"""
+    tracker = make_tracker(tmp_path)
+    tracker.record('abc123', '1.2.3.4')
+    assert tracker.flush(alert_threshold=3, window_seconds=300, now=1000.0) is None
+
+
+def test_samples_are_capped(tmp_path):
+    """Only a bounded sample of submissions is kept, newest first"""
+    tracker = make_tracker(tmp_path)
+    for i in range(50):
+        tracker.record('abc123', '1.2.3.4', f'Bot {i}')
+    tracker.flush(alert_threshold=100, window_seconds=300, now=1000.0)
+
+    samples = tracker.get_stats()['samples']
+    assert len(samples) == 20
+    assert samples[0]['sample'] == 'Bot 19'
+
+
+def test_flush_due(tmp_path):
+    """flush_due reports when the interval has elapsed since the last flush"""
+    tracker = make_tracker(tmp_path)
+    tracker.flush(alert_threshold=100, window_seconds=300, now=1000.0)
+    assert not tracker.flush_due(60, now=1030.0)
+    assert tracker.flush_due(60, now=1060.0)
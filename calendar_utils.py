@@ -1,12 +1,13 @@
 import urllib.parse
 from datetime import datetime, timedelta
 from flask import Response, redirect
-import dateutil.parser
+
+from datetime_parsing import parse_datetime
 
 
 def parse_event_datetime(date_str, start_time_str, end_time_str=None):
     """
-    Parse event date and time into datetime objects using dateutil.parser
+    Parse event date and time into datetime objects (see datetime_parsing)
 
     Args:
         date_str: Date string (e.g., "November 15, 2024" or "2024-01-01")
@@ -17,23 +18,11 @@ def parse_event_datetime(date_str, start_time_str, end_time_str=None):
         tuple: (start_datetime, end_datetime)
     """
     try:
-        # Handle month-year format by adding a default day
-        if ',' in date_str and len(date_str.split(',')) == 2:
-            # Check if there's no day specified (e.g., "November, 2024")
-            month_part = date_str.split(',')[0].strip()
-            if not any(char.isdigit() for char in month_part):
-                # Add the 15th as default day
-                month, year = date_str.split(',')
-                date_str = f"{month.strip()} 15, {year.strip()}"
-
-        # Parse start time
-        start_datetime_str = f"{date_str} {start_time_str}"
-        start_date = dateutil.parser.parse(start_datetime_str)
+        start_date = parse_datetime(date_str, start_time_str)
 
         # Parse end time if provided, otherwise default to 2 hours later
         if end_time_str:
-            end_datetime_str = f"{date_str} {end_time_str}"
-            end_date = dateutil.parser.parse(end_datetime_str)
+            end_date = parse_datetime(date_str, end_time_str)
         else:
             end_date = start_date + timedelta(hours=2)
 
@@ -46,6 +35,18 @@ def parse_event_datetime(date_str, start_time_str, end_time_str=None):
     return start_date, end_date
 
 
+def event_datetimes(event_config):
+    """Start and end of an event, from its stored ISO fields when it has them."""
+    if event_config.get('starts_at') and event_config.get('ends_at'):
+        return (datetime.fromisoformat(event_config['starts_at']),
+                datetime.fromisoformat(event_config['ends_at']))
+    return parse_event_datetime(
+        event_config['date'],
+        event_config['start_time'],
+        event_config.get('end_time') or None
+    )
+
+
 def generate_google_calendar_url(event_config):
     """
     Generate Google Calendar URL for an event
@@ -56,11 +57,7 @@ def generate_google_calendar_url(event_config):
     Returns:
         str: Google Calendar URL
     """
-    start_date, end_date = parse_event_datetime(
-        event_config['date'],
-        event_config['start_time'],
-        event_config.get('end_time') or None
-    )
+    start_date, end_date = event_datetimes(event_config)
 
     # Format dates for Google Calendar
     start_str = start_date.strftime("%Y%m%dT%H%M%S")
@@ -89,11 +86,7 @@ def generate_ics_file(event_config):
     Returns:
         str: ICS file content
     """
-    start_date, end_date = parse_event_datetime(
-        event_config['date'],
-        event_config['start_time'],
-        event_config.get('end_time') or None
-    )
+    start_date, end_date = event_datetimes(event_config)
 
     # Format dates for ICS
     start_str = start_date.strftime("%Y%m%dT%H%M%S")
@@ -1,3 +1,4 @@
+import sys
 import pytest
 
 
@@ -20,4 +21,113 @@ def _isolate_event_config(tmp_path, monkeypatch):
     events_dir = tmp_path / "events"
     events_dir.mkdir()
     monkeypatch.setattr(_instance, 'events_dir', str(events_dir))
+    monkeypatch.setattr(_instance, 'images_dir', str(tmp_path / "uploads"))
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _isolate_rsvp_feed(tmp_path, monkeypatch):
+    """Keep RSVP change feeds written during tests out of the prod data dir."""
+    from rsvp_feed import _instance
+    monkeypatch.setattr(_instance, 'feed_dir', str(tmp_path / "feed"))
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _isolate_rate_limit(tmp_path, monkeypatch):
+    """Give each test its own rate limiter state file."""
+    from rate_limit import _instance
+    monkeypatch.setattr(_instance, 'state_file', str(tmp_path / "ratelimit.bin"))
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _isolate_bot_tracker(tmp_path, monkeypatch):
+    """Keep bot-hit tallies written during tests out of the prod data dir."""
+    from bot_tracker import _instance
+    monkeypatch.setattr(_instance, 'state_file', str(tmp_path / "bot_hits.json"))
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _isolate_metrics(tmp_path, monkeypatch):
+    """Keep per-worker metric files written during tests out of the prod data dir."""
+    from metrics import _instance
+    monkeypatch.setattr(_instance, 'metrics_dir', str(tmp_path / "metrics"))
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _isolate_slow_request_log(tmp_path, monkeypatch):
+    """Keep slow-request records written during tests out of the prod data dir."""
+    from tracing import _instance
+    monkeypatch.setattr(_instance, 'log_path', str(tmp_path / "slow_requests.log"))
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _isolate_profiler(tmp_path, monkeypatch):
+    """Keep profiles captured during tests out of the prod data dir."""
+    from profiler import _instance
+    monkeypatch.setattr(_instance, 'profile_dir', str(tmp_path / "profiles"))
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _isolate_memory_snapshots(tmp_path, monkeypatch):
+    """Keep tracemalloc snapshots taken during tests out of the prod data dir."""
+    from memory_stats import _instance
+    monkeypatch.setattr(_instance, 'snapshot_dir', str(tmp_path / "memory"))
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _isolate_token_index(tmp_path, monkeypatch):
+    """Keep RSVP token index entries written during tests out of the prod data dir."""
+    from token_index import _instance
+    monkeypatch.setattr(_instance, 'index_dir', str(tmp_path / "tokens"))
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _isolate_idempotency(tmp_path, monkeypatch):
+    """Keep idempotency keys claimed during tests out of the prod data dir."""
+    from idempotency import _instance
+    monkeypatch.setattr(_instance, 'store_dir', str(tmp_path / "idempotency"))
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _isolate_archive(tmp_path, monkeypatch):
+    """Keep events archived during tests out of the prod data dir."""
+    from archive import _instance
+    monkeypatch.setattr(_instance, 'archive_dir', str(tmp_path / "archive"))
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _isolate_snapshots(tmp_path, monkeypatch):
+    """Keep data snapshots taken during tests out of the prod data dir."""
+    from snapshot import _instance
+    monkeypatch.setattr(_instance, 'snapshot_dir', str(tmp_path / "snapshots"))
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _isolate_guest_index(tmp_path, monkeypatch):
+    """Keep guest index entries written during tests out of the prod data dir."""
+    from guest_index import _instance
+    monkeypatch.setattr(_instance, 'index_dir', str(tmp_path / "guests"))
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _isolate_jinja_bytecode_cache(tmp_path, monkeypatch):
+    """Keep templates compiled during tests out of the prod bytecode cache."""
+    import preload
+    monkeypatch.setattr(preload, 'DEFAULT_BYTECODE_CACHE_DIR', str(tmp_path / "jinja_cache"))
+    app_module = sys.modules.get('app')
+    if app_module is not None:
+        monkeypatch.setattr(app_module.app.jinja_env, 'bytecode_cache',
+                            preload._BytecodeCache(str(tmp_path / "jinja_cache")))
     yield
@@ -1,6 +1,7 @@
 import re
 from datetime import datetime
-import dateutil.parser
+
+from datetime_parsing import parse_datetime
 
 def validate_date_time(date_str, start_time_str, end_time_str=None, require_future=True):
     """
@@ -19,23 +20,11 @@ def validate_date_time(date_str, start_time_str, end_time_str=None, require_futu
         return False, "Date and start time are required."
 
     try:
-        # Handle month-year format by adding a default day
-        if ',' in date_str and len(date_str.split(',')) == 2:
-            # Check if there's no day specified (e.g., "November, 2024")
-            month_part = date_str.split(',')[0].strip()
-            if not any(char.isdigit() for char in month_part):
-                # Add the 15th as default day
-                month, year = date_str.split(',')
-                date_str = f"{month.strip()} 15, {year.strip()}"
-
-        # Validate start time
-        start_datetime_str = f"{date_str} {start_time_str}"
-        parsed_start = dateutil.parser.parse(start_datetime_str)
+        parsed_start = parse_datetime(date_str, start_time_str)
 
         # Validate end time if provided
         if end_time_str:
-            end_datetime_str = f"{date_str} {end_time_str}"
-            parsed_end = dateutil.parser.parse(end_datetime_str)
+            parsed_end = parse_datetime(date_str, end_time_str)
 
             # Check that end time is after start time
             if parsed_end <= parsed_start:
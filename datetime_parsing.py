@@ -0,0 +1,100 @@
+"""Parsing of the free-form date and time strings events are created with.
+
+Admins type dates and times by hand, so dateutil's heuristic parser is
+the catch-all, but it is slow. Most strings follow one of the formats
+shown on the event form (date_format_examples() and
+time_format_examples() in date_validation), so those are tried first as
+precompiled patterns; anything they don't match, or that doesn't make a
+valid date, goes to dateutil as before. Results are memoized per input
+string.
+"""
+import re
+from datetime import datetime
+from functools import lru_cache
+
+_MONTHS = {}
+for _number, _name in enumerate(['january', 'february', 'march', 'april', 'may', 'june', 'july',
+                                 'august', 'september', 'october', 'november', 'december'], 1):
+    _MONTHS[_name] = _MONTHS[_name[:3]] = _number
+_MONTHS['sept'] = 9
+
+# "November 15, 2024", "2024-11-15", "11/15/2024", "15 November 2024"
+_DATE_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'(?P<month_name>[a-z]+)\.? (?P<day>\d{1,2}),? (?P<year>\d{4})',
+    r'(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})',
+    r'(?P<month>\d{1,2})/(?P<day>\d{1,2})/(?P<year>\d{4})',
+    r'(?P<day>\d{1,2}) (?P<month_name>[a-z]+)\.?,? (?P<year>\d{4})',
+)]
+
+# "7:00 PM", "19:00", "7:30 AM", "14:30"
+_TIME_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'(?P<hour>\d{1,2})(?::(?P<minute>\d{2}))? ?(?P<meridiem>[ap])\.?m\.?',
+    r'(?P<hour>\d{1,2}):(?P<minute>\d{2})',
+)]
+
+
+def normalize_date(date_str):
+    """Give a month-year date such as "November, 2024" a default day (the 15th)."""
+    if ',' in date_str and len(date_str.split(',')) == 2:
+        month, year = date_str.split(',')
+        if not any(char.isdigit() for char in month):
+            return f"{month.strip()} 15, {year.strip()}"
+    return date_str
+
+
+def _match_date(date_str):
+    for pattern in _DATE_PATTERNS:
+        match = pattern.fullmatch(date_str)
+        if match:
+            fields = match.groupdict()
+            if fields.get('month_name'):
+                month = _MONTHS.get(fields['month_name'].lower())
+                if month is None:
+                    return None
+            else:
+                month = int(fields['month'])
+            return int(fields['year']), month, int(fields['day'])
+    return None
+
+
+def _match_time(time_str):
+    for pattern in _TIME_PATTERNS:
+        match = pattern.fullmatch(time_str)
+        if match:
+            fields = match.groupdict()
+            hour, minute = int(fields['hour']), int(fields['minute'] or 0)
+            meridiem = fields.get('meridiem')
+            if meridiem:
+                if not 1 <= hour <= 12:
+                    return None
+                hour = hour % 12 + (12 if meridiem.lower() == 'p' else 0)
+            return hour, minute
+    return None
+
+
+def _fast_parse(date_str, time_str):
+    date = _match_date(date_str.strip())
+    time = _match_time(time_str.strip())
+    if date is None or time is None:
+        return None
+    try:
+        return datetime(*date, *time)
+    except ValueError:
+        # e.g. "11/31/2024"; let dateutil decide and word the error
+        return None
+
+
+@lru_cache(maxsize=1024)
+def parse_datetime(date_str, time_str):
+    """Parse a date string plus a time string into one datetime.
+
+    Raises ValueError (or OverflowError) when the strings can't be parsed,
+    with dateutil's message.
+    """
+    date_str = normalize_date(date_str)
+    parsed = _fast_parse(date_str, time_str)
+    if parsed is not None:
+        return parsed
+
+    import dateutil.parser  # loaded on first use to keep worker startup light
+    return dateutil.parser.parse(f"{date_str} {time_str}")
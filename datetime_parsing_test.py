@@ -0,0 +1,57 @@
+import dateutil.parser
+import pytest
+from datetime import datetime
+from date_validation import date_format_examples, time_format_examples, validate_date_time
+import datetime_parsing
+from datetime_parsing import parse_datetime, normalize_date
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    parse_datetime.cache_clear()
+    yield
+
+
+@pytest.mark.parametrize('date_str', date_format_examples() + [
+    'Nov 15, 2024', 'november 15 2024', 'Sept 3, 2025', '2024-1-5', '1/5/2025', '5 Jan 2025', 'March, 2025',
+])
+@pytest.mark.parametrize('time_str', time_format_examples() + ['7 PM', '12:00 AM', '12:15 pm', '9:05am', '0:30'])
+def test_fast_path_agrees_with_dateutil(date_str, time_str):
+    expected = dateutil.parser.parse(f'{normalize_date(date_str)} {time_str}')
+    assert datetime_parsing._fast_parse(normalize_date(date_str), time_str) == expected
+    assert parse_datetime(date_str, time_str) == expected
+
+
+@pytest.mark.parametrize('date_str, time_str', [
+    ('15/11/2024', '19:00'),          # day first
+    ('Saturday, November 15, 2024', '7:00 PM'),
+    ('Nov. 15th, 2024', '7:00 PM'),
+    ('11/31/2024', '7:00 PM'),        # not a real date
+    ('November 15, 2024', '13:00 PM'),
+])
+def test_other_strings_fall_back_to_dateutil(date_str, time_str):
+    assert datetime_parsing._fast_parse(normalize_date(date_str), time_str) is None
+    try:
+        expected = dateutil.parser.parse(f'{normalize_date(date_str)} {time_str}')
+    except (ValueError, OverflowError) as e:
+        with pytest.raises(type(e)):
+            parse_datetime(date_str, time_str)
+    else:
+        assert parse_datetime(date_str, time_str) == expected
+
+
+def test_month_year_gets_the_15th():
+    assert parse_datetime('November, 2030', '7:00 PM') == datetime(2030, 11, 15, 19, 0)
+
+
+def test_memoized():
+    parse_datetime('November 15, 2030', '7:00 PM')
+    parse_datetime('November 15, 2030', '7:00 PM')
+    assert parse_datetime.cache_info().hits == 1
+
+
+def test_validation_error_messages_unchanged():
+    assert validate_date_time('11/31/2030', '7:00 PM') == (False, 'Invalid day for the specified month.')
+    assert validate_date_time('2030-13-01', '7:00 PM') == (False, 'Invalid month specified.')
+    assert validate_date_time('November 15, 2030', '9:00 PM', '7:00 PM') == (False, 'End time must be after start time.')
+    assert validate_date_time('November 15, 2030', '7:00 PM', '11:00 PM') == (True, None)
@@ -1,22 +1,23 @@
 import os
 import pickle
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from base64 import urlsafe_b64encode
-import markdown as md
 from flask import current_app, url_for
+from tracing import traced
 
 SCOPES = ['https://www.googleapis.com/auth/gmail.send']
 
 CREDENTIALS_FILE_PATH = "credentials.json"
 TOKEN_FILE_PATH = "token.pickle"
 
+# The Google client libraries and markdown are imported on first use so a
+# worker that never sends email doesn't pay for loading them
+
 def get_credentials():
+    from google.auth.transport.requests import Request
+    from google_auth_oauthlib.flow import Flow
+
     creds = None
     if os.path.exists(TOKEN_FILE_PATH):
         with open(TOKEN_FILE_PATH, 'rb') as token:
@@ -54,11 +55,16 @@ def build_message(destination, subject, body, html_body=None):
     if html_body:
         message.attach(MIMEText(html_body, 'html'))
     else:
+        import markdown as md
         message.attach(MIMEText(md.markdown(body), 'html'))
     
     return {'raw': urlsafe_b64encode(message.as_bytes()).decode()}
 
+@traced('send_email')
 def send_email(destination, subject, body, html_body=None):
+    from googleapiclient.discovery import build
+    from googleapiclient.errors import HttpError
+
     creds = get_credentials()
     try:
         service = build('gmail', 'v1', credentials=creds)
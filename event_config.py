@@ -1,14 +1,44 @@
-import json
 import os
 import uuid
+from datetime import datetime, timedelta
+
+import json_store
+from datetime_parsing import parse_datetime
+from inline_images import DEFAULT_IMAGES_DIR, extract_inline_images
 from event_slug import generate_unique_slug, validate_slug
 
 DEFAULT_EVENTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'data', 'events'))
 
+# Events without an end time are treated as lasting this long
+DEFAULT_DURATION = timedelta(hours=2)
+
+
+def set_event_datetimes(event):
+    """Store canonical ISO ``starts_at``/``ends_at`` next to the display strings.
+
+    The display strings stay what the admin typed; these are what sorting,
+    filtering and calendar exports read. Both are dropped if the date or
+    times don't parse. Times are wall-clock, like the display strings.
+    """
+    try:
+        starts_at = parse_datetime(event['date'], event['start_time']).replace(tzinfo=None)
+        if event.get('end_time'):
+            ends_at = parse_datetime(event['date'], event['end_time']).replace(tzinfo=None)
+        else:
+            ends_at = starts_at + DEFAULT_DURATION
+    except (KeyError, TypeError, ValueError, OverflowError):
+        event.pop('starts_at', None)
+        event.pop('ends_at', None)
+        return event
+    event['starts_at'] = starts_at.isoformat()
+    event['ends_at'] = ends_at.isoformat()
+    return event
+
 
 class EventConfig:
-    def __init__(self, events_dir=None):
+    def __init__(self, events_dir=None, images_dir=None):
         self.events_dir = events_dir if events_dir is not None else DEFAULT_EVENTS_DIR
+        self.images_dir = images_dir if images_dir is not None else DEFAULT_IMAGES_DIR
         self._events = self._load_config()
 
     def _load_config(self):
@@ -20,11 +50,10 @@ class EventConfig:
                 continue
             path = os.path.join(self.events_dir, filename)
             try:
-                with open(path, 'r') as f:
-                    event = json.load(f)
+                event = json_store.load(path)
                 if isinstance(event, dict):
                     events.append(event)
-            except (json.JSONDecodeError, OSError):
+            except (json_store.JSONDecodeError, OSError):
                 continue
         return events
 
@@ -44,13 +73,14 @@ class EventConfig:
         slug = event.get('slug')
         if not slug:
             raise ValueError("Event must have a slug")
-        target = self._event_path(slug)
-        tmp = target + '.tmp'
-        with open(tmp, 'w') as f:
-            json.dump(event, f, indent=2)
-            f.flush()
-            os.fsync(f.fileno())
-        os.replace(tmp, target)
+        # Refreshed on every write so they can't drift from the display strings
+        set_event_datetimes(event)
+        # Pasted images go to static/uploads so they aren't inlined everywhere
+        # the description is sent; absolute URLs so they also work in emails
+        if event.get('description'):
+            event['description'] = extract_inline_images(
+                event['description'], self.images_dir, f"https://{event.get('domain') or 'partymail.app'}")
+        json_store.atomic_write(self._event_path(slug), event)
 
     def _delete_event_file(self, slug):
         self._assert_safe_write()
@@ -77,9 +107,29 @@ class EventConfig:
 
         return None
 
+    def get_event_by_id(self, event_id):
+        for event in self._events:
+            if isinstance(event, dict) and event.get('id') == event_id:
+                return event
+        return None
+
     def get_all_events(self):
         return {event['slug']: event for event in self._events if isinstance(event, dict)}
 
+    def get_upcoming_events(self, now=None):
+        """Events that haven't ended yet, soonest first."""
+        now = (now or datetime.now()).isoformat()
+        upcoming = [event for event in self._events
+                    if isinstance(event, dict) and event.get('ends_at') and event['ends_at'] >= now]
+        return sorted(upcoming, key=lambda event: event['starts_at'])
+
+    def get_past_events(self, now=None):
+        """Events that have ended, most recent first."""
+        now = (now or datetime.now()).isoformat()
+        past = [event for event in self._events
+                if isinstance(event, dict) and event.get('ends_at') and event['ends_at'] < now]
+        return sorted(past, key=lambda event: event['starts_at'], reverse=True)
+
     def get_existing_slugs(self):
         return {event.get('slug') for event in self._events if isinstance(event, dict)}
 
@@ -95,6 +145,12 @@ class EventConfig:
         self._events.append(new_config)
         self._save_event(new_config)
 
+    def remove_event(self, slug):
+        """Drop an event from the live set and delete its file (see archive.py)."""
+        self._events[:] = [event for event in self._events
+                           if not (isinstance(event, dict) and event.get('slug') == slug)]
+        self._delete_event_file(slug)
+
     def add_new_event(self, event_data):
         event_id = str(uuid.uuid4())[:8]
 
@@ -138,9 +194,12 @@ _instance = EventConfig()
 # Export the instance methods as module-level functions
 get_event_config = _instance.get_event_config
 get_all_events = _instance.get_all_events
+get_event_by_id = _instance.get_event_by_id
 update_event_config = _instance.update_event_config
 add_new_event = _instance.add_new_event
 get_existing_slugs = _instance.get_existing_slugs
+get_upcoming_events = _instance.get_upcoming_events
+get_past_events = _instance.get_past_events
 
 # Define save_event_config for testing
 def save_event_config(events_list):
@@ -6,6 +6,7 @@ from event_config import (
     get_existing_slugs,
     add_new_event,
     get_event_config,
+    get_event_by_id,
     events,
     save_event_config,
     _instance
@@ -194,3 +195,54 @@ def test_add_new_event_with_duplicate_manual_slug(mock_events):
     with pytest.raises(ValueError, match="already in use"):
         add_new_event(new_event_data)
 
+
+def test_add_new_event_stores_iso_datetimes(mock_events):
+    """Canonical start/end are persisted next to the display strings"""
+    event_id = add_new_event({
+        "name": "Dinner",
+        "date": "November 15, 2030",
+        "start_time": "7:00 PM",
+        "end_time": "10:30 PM",
+        "location": "Home",
+        "description": "",
+        "max_guests_per_invite": "2",
+    })
+    added_event = next(e for e in events if e["id"] == event_id)
+    with open(os.path.join(_instance.events_dir, f"{added_event['slug']}.json")) as f:
+        saved = json.load(f)
+    assert saved["date"] == "November 15, 2030"
+    assert saved["starts_at"] == "2030-11-15T19:00:00"
+    assert saved["ends_at"] == "2030-11-15T22:30:00"
+
+def test_update_event_config_refreshes_iso_datetimes(mock_events):
+    """Editing the display strings moves starts_at/ends_at with them"""
+    updated = dict(SAMPLE_EVENTS[1], date="2031-03-02", start_time="11:00 AM", end_time="",
+                   starts_at="2024-02-01T15:00:00", ends_at="2024-02-01T18:00:00")
+    _instance.update_event_config("wedding-ceremony", updated)
+    event = get_event_config("wedding-ceremony")
+    assert event["starts_at"] == "2031-03-02T11:00:00"
+    assert event["ends_at"] == "2031-03-02T13:00:00"
+
+def test_unparseable_dates_store_no_iso_datetimes():
+    from event_config import set_event_datetimes
+    event = {"date": "sometime soon", "start_time": "7:00 PM", "starts_at": "x", "ends_at": "y"}
+    assert "starts_at" not in set_event_datetimes(event)
+    assert "ends_at" not in event
+
+def test_upcoming_and_past_events(mock_events):
+    from datetime import datetime
+    from event_config import set_event_datetimes
+    events.clear()
+    for slug, date in [("later", "2030-06-01"), ("soon", "2030-01-01"), ("old", "2020-01-01"),
+                       ("older", "2019-01-01"), ("undated", "someday")]:
+        events.append(set_event_datetimes({"slug": slug, "date": date, "start_time": "18:00", "end_time": ""}))
+    now = datetime(2025, 1, 1)
+    assert [e["slug"] for e in _instance.get_upcoming_events(now)] == ["soon", "later"]
+    assert [e["slug"] for e in _instance.get_past_events(now)] == ["old", "older"]
+    # An event in progress is still upcoming until it ends
+    assert [e["slug"] for e in _instance.get_upcoming_events(datetime(2030, 1, 1, 19))] == ["soon", "later"]
+
+def test_get_event_by_id(mock_events):
+    """Test looking an event up by its id"""
+    assert get_event_by_id("abc123")["slug"] == "birthday-party"
+    assert get_event_by_id("missing") is None
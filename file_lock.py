@@ -0,0 +1,21 @@
+import fcntl
+import os
+from contextlib import contextmanager
+
+
+@contextmanager
+def locked(path, shared=False):
+    """Hold an exclusive (or, with ``shared``, a shared) flock on ``path``.
+
+    Used to serialize read-modify-write cycles on shared JSON state across
+    uWSGI workers. The lock file is separate from the data file so atomic
+    renames of the data file don't drop the lock. The file is created if
+    missing.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
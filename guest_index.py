@@ -0,0 +1,196 @@
+#!/usr/bin/python3
+"""Directory of guests across events, keyed by normalized email.
+
+Every RSVP write updates data/guests/<aa>/<sha256 of email>.json, which
+lists each event the guest answered, with their response and headcount.
+Answering "has this person been to our events before?" is then a single
+file read instead of opening every rsvps_*.json. Email addresses are
+hashed for the file name so any address maps to a safe path.
+
+Run this module to rebuild the whole index from the RSVP files in the
+current directory and from archived events, scanning them in parallel:
+
+    python guest_index.py [--workers N]
+
+The rebuilt index replaces the old one at the end, with two renames
+made under data/guests.lock. Every record() holds that lock shared, so
+none of them can recreate the directory between the renames. An RSVP
+written while the rebuild is scanning is indexed again on its next
+write, or by the next rebuild.
+"""
+import argparse
+import gzip
+import hashlib
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import Blueprint, render_template, request
+
+import json_store
+from file_lock import locked
+from passkey_auth import admin_required
+from rsvp_record import load_records
+
+guests_bp = Blueprint('guests', __name__)
+
+DEFAULT_INDEX_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'data', 'guests'))
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+def _event_summary(event):
+    return {
+        'name': event.get('name'),
+        'slug': event.get('slug'),
+        'date': event.get('date'),
+        'starts_at': event.get('starts_at'),
+    }
+
+
+def _guest_record(rsvp):
+    return {
+        'attending': rsvp.get('attending'),
+        'num_adults': rsvp.get('num_adults', 0),
+        'num_children': rsvp.get('num_children', 0),
+        'responded_at': rsvp.get('updated_at') or rsvp.get('timestamp'),
+    }
+
+
+def _scan_rsvps(job):
+    """Read one event's RSVPs (live file or archive); runs in a worker process."""
+    event, path, archived = job
+    try:
+        if archived:
+            with open(path, 'rb') as f:
+                rsvps = json_store.loads(gzip.decompress(f.read()))['rsvps']
+        else:
+            rsvps = load_records(path)
+    except (FileNotFoundError, json_store.JSONDecodeError):
+        rsvps = []
+    return event, [(normalize_email(r.get('email')), r.get('name'), _guest_record(r))
+                   for r in rsvps if normalize_email(r.get('email'))]
+
+
+class GuestIndex:
+    def __init__(self, index_dir=None):
+        self.index_dir = index_dir if index_dir is not None else DEFAULT_INDEX_DIR
+
+    @property
+    def _swap_lock_path(self):
+        return self.index_dir + '.lock'
+
+    @staticmethod
+    def _key(email):
+        return hashlib.sha256(email.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, email, index_dir=None):
+        key = self._key(email)
+        return os.path.join(index_dir or self.index_dir, key[:2], f'{key}.json')
+
+    def lookup(self, email):
+        """Return {'email', 'name', 'events': {event_id: {...}}} or None."""
+        email = normalize_email(email)
+        if not email:
+            return None
+        try:
+            return json_store.load(self._entry_path(email))
+        except (FileNotFoundError, json_store.JSONDecodeError):
+            return None
+
+    def record(self, event, rsvp):
+        """Fold one RSVP write into its guest's entry."""
+        email = normalize_email(rsvp.get('email'))
+        if not email:
+            return
+        path = self._entry_path(email)
+        shard = os.path.dirname(path)
+        with locked(self._swap_lock_path, shared=True):
+            os.makedirs(shard, exist_ok=True)
+            # One lock per shard serializes updates to the same guest from
+            # different workers without a lock file per guest
+            with locked(os.path.join(shard, '.lock')):
+                try:
+                    entry = json_store.load(path)
+                except (FileNotFoundError, json_store.JSONDecodeError):
+                    entry = {'email': email, 'events': {}}
+                entry['name'] = rsvp.get('name')
+                entry['events'][event['id']] = dict(_event_summary(event), **_guest_record(rsvp))
+                json_store.atomic_write(path, entry, fsync=False)
+
+    def rebuild(self, events, rsvps_dir='.', archived=(), archive_dir=None, workers=None):
+        """Re-index every RSVP of ``events`` and of ``archived`` index entries.
+
+        Returns the number of guests indexed.
+        """
+        jobs = [(dict(_event_summary(event), id=event['id']),
+                 os.path.join(rsvps_dir, f"rsvps_{event['id']}.json"), False) for event in events]
+        jobs += [(dict(_event_summary(entry), id=entry['id']),
+                  os.path.join(archive_dir, f"{entry['id']}.json.gz"), True) for entry in archived]
+
+        guests = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for event, rows in pool.map(_scan_rsvps, jobs, chunksize=16):
+                event_id = event.pop('id')
+                for email, name, record in rows:
+                    entry = guests.setdefault(email, {'email': email, 'events': {}})
+                    entry['name'] = name
+                    entry['events'][event_id] = dict(event, **record)
+
+        staging = self.index_dir + '.rebuild'
+        shutil.rmtree(staging, ignore_errors=True)
+        for email, entry in guests.items():
+            path = self._entry_path(email, staging)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            json_store.atomic_write(path, entry, fsync=False)
+        os.makedirs(staging, exist_ok=True)
+
+        retired = self.index_dir + '.old'
+        shutil.rmtree(retired, ignore_errors=True)
+        with locked(self._swap_lock_path):
+            if os.path.exists(self.index_dir):
+                os.rename(self.index_dir, retired)
+            try:
+                os.rename(staging, self.index_dir)
+            except OSError:
+                if os.path.exists(retired):
+                    os.rename(retired, self.index_dir)
+                raise
+        shutil.rmtree(retired, ignore_errors=True)
+        return len(guests)
+
+
+# Create a singleton instance
+_instance = GuestIndex()
+
+record = _instance.record
+lookup = _instance.lookup
+
+
+@guests_bp.route('/admin/guests')
+@admin_required
+def guest_lookup():
+    """Look a guest up by email and list every event they answered."""
+    email = request.args.get('email', '')
+    entry = _instance.lookup(email) if email else None
+    events = []
+    if entry:
+        events = sorted(entry['events'].values(), key=lambda e: e.get('starts_at') or '', reverse=True)
+    attended = [e for e in events if e.get('attending') == 'yes']
+    return render_template('admin_guests.html', email=email, guest=entry, events=events,
+                           attended_count=len(attended),
+                           headcount=sum(e.get('num_adults', 0) + e.get('num_children', 0) for e in attended))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=None, help='processes to scan with (default: one per CPU)')
+    args = parser.parse_args()
+
+    import archive
+    from event_config import get_all_events
+    count = _instance.rebuild(get_all_events().values(), archived=archive._instance.list_events(),
+                              archive_dir=archive._instance.archive_dir, workers=args.workers)
+    print(f"Indexed {count} guests into {_instance.index_dir}")
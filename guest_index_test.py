@@ -0,0 +1,99 @@
+import os
+import gzip
+import threading
+import pytest
+import json_store
+from file_lock import locked
+from guest_index import GuestIndex, normalize_email
+from rsvp_record import RSVPRecord
+
+EVENT = {'id': 'ev1', 'slug': 'summer-party', 'name': 'Summer Party', 'date': 'July 1, 2030',
+         'starts_at': '2030-07-01T18:00:00'}
+
+
+def make_rsvp(email='alex@example.com', attending='yes', **fields):
+    rsvp = {'name': 'Alex Smith', 'email': email, 'attending': attending, 'num_adults': 2,
+            'num_children': 1, 'timestamp': '2030-01-01T12:00:00'}
+    rsvp.update(fields)
+    return rsvp
+
+
+def test_normalize_email():
+    assert normalize_email('  Alex@Example.COM ') == 'alex@example.com'
+    assert normalize_email(None) == ''
+
+
+def test_record_and_lookup(tmp_path):
+    index = GuestIndex(str(tmp_path / 'guests'))
+    index.record(EVENT, RSVPRecord.from_dict(make_rsvp(email='Alex@Example.com ')))
+    index.record(dict(EVENT, id='ev2', name='Winter Party'), make_rsvp(attending='no', num_adults=0, num_children=0))
+
+    entry = index.lookup('ALEX@example.com')
+    assert entry['email'] == 'alex@example.com'
+    assert entry['events']['ev1'] == {'name': 'Summer Party', 'slug': 'summer-party', 'date': 'July 1, 2030',
+                                      'starts_at': '2030-07-01T18:00:00', 'attending': 'yes', 'num_adults': 2,
+                                      'num_children': 1, 'responded_at': '2030-01-01T12:00:00'}
+    assert entry['events']['ev2']['attending'] == 'no'
+    assert index.lookup('sam@example.com') is None
+    assert index.lookup('') is None
+
+
+def test_update_replaces_event_record(tmp_path):
+    index = GuestIndex(str(tmp_path / 'guests'))
+    index.record(EVENT, make_rsvp())
+    index.record(EVENT, make_rsvp(attending='no', num_adults=0, num_children=0, updated_at='2030-02-01T00:00:00'))
+    events = index.lookup('alex@example.com')['events']
+    assert list(events) == ['ev1']
+    assert events['ev1']['attending'] == 'no'
+    assert events['ev1']['responded_at'] == '2030-02-01T00:00:00'
+
+
+def test_rebuild_scans_live_and_archived_rsvps(tmp_path):
+    json_store.atomic_write(str(tmp_path / 'rsvps_ev1.json'),
+                            [make_rsvp(), make_rsvp(email='sam@example.com', name='Sam'), make_rsvp(email='')])
+    archive_dir = tmp_path / 'archive'
+    archive_dir.mkdir()
+    old_event = {'id': 'old1', 'slug': 'old-party', 'name': 'Old Party', 'date': '2020-01-01'}
+    (archive_dir / 'old1.json.gz').write_bytes(gzip.compress(json_store.dumps(
+        {'event': old_event, 'rsvps': [make_rsvp(email='ALEX@example.com')]})))
+
+    index = GuestIndex(str(tmp_path / 'guests'))
+    index.record(EVENT, make_rsvp(email='stale@example.com'))
+    count = index.rebuild([EVENT, dict(EVENT, id='no-rsvps')], rsvps_dir=str(tmp_path),
+                          archived=[old_event], archive_dir=str(archive_dir), workers=2)
+
+    assert count == 2
+    assert sorted(index.lookup('alex@example.com')['events']) == ['ev1', 'old1']
+    assert index.lookup('sam@example.com')['name'] == 'Sam'
+    assert index.lookup('stale@example.com') is None
+    assert not os.path.exists(str(tmp_path / 'guests') + '.rebuild')
+    assert not os.path.exists(str(tmp_path / 'guests') + '.old')
+
+
+def test_failed_swap_keeps_old_index(tmp_path, monkeypatch):
+    index = GuestIndex(str(tmp_path / 'guests'))
+    index.record(EVENT, make_rsvp())
+    rename = os.rename
+
+    def fail_second_rename(src, dst):
+        if src.endswith('.rebuild'):
+            raise OSError('simulated')
+        rename(src, dst)
+    monkeypatch.setattr(os, 'rename', fail_second_rename)
+
+    with pytest.raises(OSError):
+        index.rebuild([], rsvps_dir=str(tmp_path), workers=1)
+    assert index.lookup('alex@example.com')['name'] == 'Alex Smith'
+
+
+def test_record_waits_for_swap(tmp_path):
+    """record() cannot recreate the index directory in the middle of a swap"""
+    index = GuestIndex(str(tmp_path / 'guests'))
+    with locked(str(tmp_path / 'guests') + '.lock'):
+        writer = threading.Thread(target=index.record, args=(EVENT, make_rsvp()))
+        writer.start()
+        writer.join(0.2)
+        assert writer.is_alive()
+        assert not os.path.exists(tmp_path / 'guests')
+    writer.join(5)
+    assert index.lookup('alex@example.com') is not None
@@ -0,0 +1,143 @@
+"""Idempotency keys for RSVP form submissions, shared by uWSGI workers.
+
+The event page embeds a random key in the RSVP form. The first request
+carrying a key claims it by creating data/idempotency/<key>.json with
+O_EXCL, so only one worker can win, and stores the redirect it sent once
+it is done. A replay of the same submission (a double click, a mobile
+retry) gets that redirect back without saving, emailing or notifying
+again. begin() never waits: a replay that arrives while the first
+request is still running is reported as pending, and the caller answers
+it at once rather than holding a worker until the first one finishes.
+
+Each entry also keeps a fingerprint of the submitted form. If the key
+comes back with different answers (the guest went back and changed the
+form), the submission is processed normally. Entries expire after
+``ttl_seconds``.
+"""
+import hashlib
+import os
+import re
+import time
+
+import json_store
+
+DEFAULT_STORE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'data', 'idempotency'))
+DEFAULT_TTL_SECONDS = 3600
+FORM_FIELD = 'idempotency_key'
+
+_KEY_PATTERN = re.compile(r'^[A-Za-z0-9-]{8,64}$')
+
+
+def is_valid_key(key):
+    return bool(_KEY_PATTERN.match(key or ''))
+
+
+def fingerprint(scope, form):
+    """Hash of one submission's answers to ``scope``, ignoring the key itself."""
+    digest = hashlib.sha256(scope.encode())
+    for name, value in sorted(form.items(multi=True)):
+        if name != FORM_FIELD:
+            digest.update(f'\0{name}\0{value}'.encode())
+    return digest.hexdigest()
+
+
+class IdempotencyStore:
+    def __init__(self, store_dir=None, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.store_dir = store_dir if store_dir is not None else DEFAULT_STORE_DIR
+        self.ttl_seconds = ttl_seconds
+        self._last_prune = 0.0
+
+    def _path(self, key):
+        return os.path.join(self.store_dir, f'{key}.json')
+
+    def _read(self, path):
+        """The entry at ``path``; None if it is missing or expired."""
+        try:
+            if time.time() - os.stat(path).st_mtime > self.ttl_seconds:
+                return None
+            return json_store.load(path)
+        except FileNotFoundError:
+            return None
+        except json_store.JSONDecodeError:
+            # Claimed a moment ago and not written yet
+            return {'fingerprint': None, 'location': None}
+
+    def _claim(self, key, fp):
+        path = self._path(key)
+        os.makedirs(self.store_dir, exist_ok=True)
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            except FileExistsError:
+                entry = self._read(path)
+                if entry is not None:
+                    return entry
+                # Expired; clear it and claim the key afresh
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                continue
+            with os.fdopen(fd, 'wb') as f:
+                f.write(json_store.dumps({'fingerprint': fp, 'location': None}))
+            return None
+        return {'fingerprint': None, 'location': None}
+
+    def begin(self, key, fp):
+        """Claim ``key`` for a submission with fingerprint ``fp``.
+
+        Returns (claimed, location, pending). ``location`` is set when this
+        is a replay of a finished submission and should be redirected to
+        as-is; ``pending`` when the submission that claimed the key is
+        still running. Otherwise the caller processes the submission, and
+        if ``claimed`` is true, reports the result with complete() or
+        release().
+        """
+        if not is_valid_key(key):
+            return False, None, False
+        self._prune_if_due()
+        entry = self._claim(key, fp)
+        if entry is None:
+            return True, None, False
+        if entry.get('fingerprint') not in (fp, None):
+            return False, None, False
+        if entry.get('location'):
+            return False, entry['location'], False
+        return False, None, True
+
+    def complete(self, key, fp, location):
+        """Record the redirect sent for the submission that claimed ``key``."""
+        json_store.atomic_write(self._path(key), {'fingerprint': fp, 'location': location}, fsync=False)
+
+    def release(self, key):
+        """Give up a claim after a failed request so a retry is processed."""
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _prune_if_due(self):
+        now = time.time()
+        if now - self._last_prune < self.ttl_seconds:
+            return
+        self._last_prune = now
+        try:
+            names = os.listdir(self.store_dir)
+        except FileNotFoundError:
+            return
+        for name in names:
+            path = os.path.join(self.store_dir, name)
+            try:
+                if now - os.stat(path).st_mtime > self.ttl_seconds:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+# Create a singleton instance
+_instance = IdempotencyStore()
+
+begin = _instance.begin
+complete = _instance.complete
+release = _instance.release
+
@@ -0,0 +1,81 @@
+import os
+import time
+import uuid
+from werkzeug.datastructures import MultiDict
+from idempotency import IdempotencyStore, fingerprint
+
+
+def make_form(**overrides):
+    form = {'name': 'Alex Smith', 'email': 'alex@example.com', 'attending': 'yes',
+            'num_adults': '2', 'num_children': '0', 'idempotency_key': 'ignored-key'}
+    form.update(overrides)
+    return MultiDict(form)
+
+
+def test_fingerprint_ignores_key_but_not_answers():
+    assert fingerprint('ev1', make_form()) == fingerprint('ev1', make_form(idempotency_key='another-key'))
+    assert fingerprint('ev1', make_form()) != fingerprint('ev1', make_form(attending='no'))
+    assert fingerprint('ev1', make_form()) != fingerprint('ev2', make_form())
+
+
+def test_first_request_claims_and_replay_gets_location(tmp_path):
+    store = IdempotencyStore(str(tmp_path))
+    key = str(uuid.uuid4())
+    assert store.begin(key, 'fp') == (True, None, False)
+    store.complete(key, 'fp', '/party/thank-you?name=Alex')
+    assert store.begin(key, 'fp') == (False, '/party/thank-you?name=Alex', False)
+
+
+def test_replay_of_request_in_flight_is_pending(tmp_path):
+    """A replay while the first request runs is answered at once, without waiting"""
+    store = IdempotencyStore(str(tmp_path))
+    key = str(uuid.uuid4())
+    assert store.begin(key, 'fp') == (True, None, False)
+    started = time.monotonic()
+    assert store.begin(key, 'fp') == (False, None, True)
+    assert time.monotonic() - started < 1
+
+
+def test_changed_answers_are_not_replayed(tmp_path):
+    """A guest who goes back and changes the form gets a fresh submission"""
+    store = IdempotencyStore(str(tmp_path))
+    key = str(uuid.uuid4())
+    store.begin(key, 'fp')
+    store.complete(key, 'fp', '/done')
+    assert store.begin(key, 'other-fp') == (False, None, False)
+
+
+def test_release_lets_retry_claim(tmp_path):
+    store = IdempotencyStore(str(tmp_path))
+    key = str(uuid.uuid4())
+    store.begin(key, 'fp')
+    store.release(key)
+    assert store.begin(key, 'fp') == (True, None, False)
+
+
+def test_expired_entries(tmp_path):
+    store = IdempotencyStore(str(tmp_path), ttl_seconds=60)
+    key = str(uuid.uuid4())
+    store.begin(key, 'fp')
+    store.complete(key, 'fp', '/done')
+    old = time.time() - 120
+    os.utime(tmp_path / f'{key}.json', (old, old))
+    assert store.begin(key, 'fp') == (True, None, False)
+
+
+def test_prune_removes_expired_entries(tmp_path):
+    store = IdempotencyStore(str(tmp_path), ttl_seconds=60)
+    stale = tmp_path / 'stale-key-0001.json'
+    stale.write_text('{}')
+    old = time.time() - 120
+    os.utime(stale, (old, old))
+    store.begin(str(uuid.uuid4()), 'fp')
+    assert not stale.exists()
+
+
+def test_invalid_keys_are_not_stored(tmp_path):
+    store = IdempotencyStore(str(tmp_path / 'keys'))
+    for key in ['', None, '../../admins', 'short']:
+        assert store.begin(key, 'fp') == (False, None, False)
+    assert not os.path.exists(tmp_path / 'keys')
+
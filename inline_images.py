@@ -0,0 +1,119 @@
+#!/usr/bin/python3
+"""Move images pasted into event descriptions out of the event files.
+
+Pasting an image into the description box leaves a
+``data:image/...;base64,...`` blob in the Markdown, which then goes out
+with every page view, ICS download, Google Calendar link and
+confirmation email. When an event is saved, each blob is decoded into
+static/uploads/<sha256>.<ext> and the data URI is replaced by an
+absolute URL to that file. Files are named by their content, so the same
+image pasted twice (or into two events) is stored once, and they are
+served as immutable.
+
+Only raster formats are extracted; SVG can carry script, so it is left
+inline rather than served from the site's own origin. Line breaks inside
+the base64 payload (as some editors and mail clients wrap it) are
+allowed. A blob is only extracted if it decodes to a complete image of
+the type it claims to be; anything else, such as a payload cut short
+while pasting, is left inline untouched.
+
+Run this module to extract images from events saved before this existed:
+
+    python inline_images.py
+"""
+import base64
+import binascii
+import hashlib
+import os
+import re
+
+from static_assets import STATIC_DIR, UPLOADS_DIR_NAME
+
+DEFAULT_IMAGES_DIR = os.path.join(STATIC_DIR, UPLOADS_DIR_NAME)
+
+_EXTENSIONS = {'png': '.png', 'jpeg': '.jpg', 'jpg': '.jpg', 'gif': '.gif', 'webp': '.webp', 'avif': '.avif'}
+_DATA_URI_PATTERN = re.compile(
+    r'data:image/(png|jpe?g|gif|webp|avif);base64,'
+    r'([A-Za-z0-9+/](?:[A-Za-z0-9+/\s]*[A-Za-z0-9+/])?(?:\s*=){0,2})',
+    re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+_PNG_END = b'\x00\x00\x00\x00IEND\xaeB`\x82'
+
+
+def _isobmff_complete(data):
+    """Top-level boxes of an AVIF (ISO BMFF) file add up to its length."""
+    offset = 0
+    while offset < len(data):
+        if offset + 8 > len(data):
+            return False
+        size = int.from_bytes(data[offset:offset + 4], 'big')
+        if size == 1:
+            if offset + 16 > len(data):
+                return False
+            size = int.from_bytes(data[offset + 8:offset + 16], 'big')
+        elif size == 0:
+            size = len(data) - offset  # box runs to the end of the file
+        if size < 8:
+            return False
+        offset += size
+    return offset == len(data)
+
+
+def _is_complete_image(data, ext):
+    """Whether ``data`` starts and ends the way a whole file of type ``ext`` does."""
+    if ext == '.png':
+        return data.startswith(_PNG_SIGNATURE) and data.endswith(_PNG_END)
+    if ext == '.jpg':
+        return data.startswith(b'\xff\xd8\xff') and data.rstrip(b'\x00').endswith(b'\xff\xd9')
+    if ext == '.gif':
+        return data[:6] in (b'GIF87a', b'GIF89a') and data.endswith(b';')
+    if ext == '.webp':
+        return (data[:4] == b'RIFF' and data[8:12] == b'WEBP'
+                and int.from_bytes(data[4:8], 'little') + 8 == len(data))
+    if ext == '.avif':
+        return data[4:8] == b'ftyp' and data[8:12] in (b'avif', b'avis') and _isobmff_complete(data)
+    return False
+
+
+def _store_image(data, ext, images_dir):
+    name = f'{hashlib.sha256(data).hexdigest()[:32]}{ext}'
+    path = os.path.join(images_dir, name)
+    if not os.path.exists(path):
+        os.makedirs(images_dir, exist_ok=True)
+        temp_file = f'{path}.{os.getpid()}.tmp'
+        with open(temp_file, 'wb') as f:
+            f.write(data)
+        os.replace(temp_file, path)
+    return name
+
+
+def extract_inline_images(text, images_dir, base_url):
+    """Replace base64 image data URIs in ``text`` with URLs under ``base_url``."""
+    if not text or 'data:image/' not in text:
+        return text
+
+    def replace(match):
+        try:
+            data = base64.b64decode(_WHITESPACE.sub('', match.group(2)), validate=True)
+        except (binascii.Error, ValueError):
+            return match.group(0)
+        ext = _EXTENSIONS[match.group(1).lower()]
+        if not _is_complete_image(data, ext):
+            return match.group(0)
+        name = _store_image(data, ext, images_dir)
+        return f'{base_url}/static/{UPLOADS_DIR_NAME}/{name}'
+
+    return _DATA_URI_PATTERN.sub(replace, text)
+
+
+if __name__ == '__main__':
+    from event_config import _instance
+
+    moved = 0
+    for event in _instance._events:
+        if 'data:image/' in event.get('description', ''):
+            _instance._save_event(event)
+            moved += 1
+    print(f"Re-saved {moved} events with inline images into {_instance.images_dir}")
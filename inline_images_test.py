@@ -0,0 +1,78 @@
+import base64
+import os
+from inline_images import extract_inline_images
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 64 + b'\x00\x00\x00\x00IEND\xaeB`\x82'
+GIF = b'GIF89a' + b'\x01' * 32 + b';'
+
+
+def data_uri(data, mime='image/png'):
+    return f'data:{mime};base64,{base64.b64encode(data).decode()}'
+
+
+def test_extracts_and_rewrites(tmp_path):
+    text = f'Party!\n\n![map]({data_uri(PNG)})\n\n<img src="{data_uri(GIF, "image/gif")}">'
+    result = extract_inline_images(text, str(tmp_path / 'images'), 'https://partymail.app')
+
+    assert 'base64' not in result
+    names = sorted(os.listdir(tmp_path / 'images'))
+    assert sorted(os.path.splitext(name)[1] for name in names) == ['.gif', '.png']
+    for name in names:
+        assert f'https://partymail.app/static/uploads/{name}' in result
+    png_name = next(name for name in names if name.endswith('.png'))
+    assert (tmp_path / 'images' / png_name).read_bytes() == PNG
+
+
+def test_same_image_stored_once(tmp_path):
+    text = f'![a]({data_uri(PNG)}) ![b]({data_uri(PNG, "image/png")})'
+    result = extract_inline_images(text, str(tmp_path / 'images'), 'https://partymail.app')
+    assert len(os.listdir(tmp_path / 'images')) == 1
+    name = os.listdir(tmp_path / 'images')[0]
+    url = f'https://partymail.app/static/uploads/{name}'
+    assert result == f'![a]({url}) ![b]({url})'
+
+
+def test_leaves_svg_and_invalid_data_inline(tmp_path):
+    svg = data_uri(b'<svg xmlns="http://www.w3.org/2000/svg"/>', 'image/svg+xml')
+    text = f'![x]({svg}) ![y](data:image/png;base64,abc)'
+    assert extract_inline_images(text, str(tmp_path / 'images'), 'https://partymail.app') == text
+    assert not os.path.exists(tmp_path / 'images')
+
+
+def test_payload_wrapped_across_lines(tmp_path):
+    encoded = base64.b64encode(PNG).decode()
+    wrapped = '\n'.join(encoded[i:i + 20] for i in range(0, len(encoded), 20))
+    text = f'![map](data:image/png;base64,{wrapped}) and more'
+    result = extract_inline_images(text, str(tmp_path / 'images'), 'https://partymail.app')
+    [name] = os.listdir(tmp_path / 'images')
+    assert result == f'![map](https://partymail.app/static/uploads/{name}) and more'
+    assert (tmp_path / 'images' / name).read_bytes() == PNG
+
+
+def test_truncated_or_mislabelled_images_left_inline(tmp_path):
+    truncated = data_uri(PNG[:40])
+    mislabelled = data_uri(GIF, 'image/png')
+    text = f'![a]({truncated}) ![b]({mislabelled})'
+    assert extract_inline_images(text, str(tmp_path / 'images'), 'https://partymail.app') == text
+    assert not os.path.exists(tmp_path / 'images')
+
+
+def test_plain_text_untouched(tmp_path):
+    assert extract_inline_images('No images here', str(tmp_path / 'uploads'), 'https://x') == 'No images here'
+    assert not os.path.exists(tmp_path / 'uploads')
+
+
+def test_event_save_extracts_images(monkeypatch):
+    import json
+    from event_config import _instance
+    monkeypatch.setattr(_instance, '_events', [])
+    event_id = _instance.add_new_event({
+        'name': 'Picture Party', 'date': '2030-01-01', 'start_time': '18:00', 'location': 'Home',
+        'description': f'Look: ![pic]({data_uri(PNG)})', 'max_guests_per_invite': 2,
+    })
+    event = _instance.get_event_by_id(event_id)
+    with open(os.path.join(_instance.events_dir, f"{event['slug']}.json")) as f:
+        saved = json.load(f)
+    name = os.listdir(_instance.images_dir)[0]
+    assert saved['description'] == f'Look: ![pic](https://partymail.app/static/uploads/{name})'
+    assert event['description'] == saved['description']
@@ -0,0 +1,192 @@
+"""Per-request filesystem I/O accounting.
+
+While installed, builtins.open and os.fsync are wrapped so that files
+opened inside a request count their opens, bytes read and written, and
+fsyncs against that request. The raw descriptor calls the stores use for
+appends, lock files and exclusive creates (os.open, os.read, os.write,
+os.pread, os.pwrite) are wrapped too, and code that writes through a
+memory map reports its bytes with count(). At teardown the totals are added to the
+metrics counters (rsvp_io_opens_total, rsvp_io_read_bytes_total,
+rsvp_io_written_bytes_total, rsvp_io_fsyncs_total) labelled by endpoint,
+so a GET route that starts writing admins.json shows up on /admin/metrics.
+
+Text-mode files count characters rather than bytes. Reads that happen
+while a response body streams (send_file) land after teardown and are
+not counted.
+"""
+import builtins
+import os
+
+from flask import g, has_request_context, request
+
+import metrics
+
+IO_COUNTERS = ('opens', 'read_bytes', 'written_bytes', 'fsyncs')
+
+_real_open = builtins.open
+_real_fsync = os.fsync
+_real_os_open = os.open
+_real_read = os.read
+_real_write = os.write
+_real_pread = os.pread
+_real_pwrite = os.pwrite
+
+
+def _current_counts():
+    return g.get('io_counts') if has_request_context() else None
+
+
+class _CountingFile:
+    """Proxy around a file object that tallies what passes through it."""
+    __slots__ = ('_file', '_counts')
+
+    def __init__(self, file, counts):
+        self._file = file
+        self._counts = counts
+
+    def read(self, *args):
+        data = self._file.read(*args)
+        self._counts['read_bytes'] += len(data)
+        return data
+
+    def readline(self, *args):
+        line = self._file.readline(*args)
+        self._counts['read_bytes'] += len(line)
+        return line
+
+    def readlines(self, *args):
+        lines = self._file.readlines(*args)
+        self._counts['read_bytes'] += sum(len(line) for line in lines)
+        return lines
+
+    def readinto(self, buffer):
+        n = self._file.readinto(buffer)
+        self._counts['read_bytes'] += n or 0
+        return n
+
+    def write(self, data):
+        n = self._file.write(data)
+        self._counts['written_bytes'] += len(data) if n is None else n
+        return n
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def __iter__(self):
+        for line in self._file:
+            self._counts['read_bytes'] += len(line)
+            yield line
+
+    def __enter__(self):
+        self._file.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._file.__exit__(*exc_info)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+def _counting_open(*args, **kwargs):
+    f = _real_open(*args, **kwargs)
+    counts = _current_counts()
+    if counts is None:
+        return f
+    counts['opens'] += 1
+    return _CountingFile(f, counts)
+
+
+def _counting_fsync(fd):
+    counts = _current_counts()
+    if counts is not None:
+        counts['fsyncs'] += 1
+    return _real_fsync(fd)
+
+
+def _counting_os_open(*args, **kwargs):
+    fd = _real_os_open(*args, **kwargs)
+    count('opens')
+    return fd
+
+
+def _counting_read(fd, n):
+    data = _real_read(fd, n)
+    count('read_bytes', len(data))
+    return data
+
+
+def _counting_write(fd, data):
+    n = _real_write(fd, data)
+    count('written_bytes', n)
+    return n
+
+
+def _counting_pread(fd, n, offset):
+    data = _real_pread(fd, n, offset)
+    count('read_bytes', len(data))
+    return data
+
+
+def _counting_pwrite(fd, data, offset):
+    n = _real_pwrite(fd, data, offset)
+    count('written_bytes', n)
+    return n
+
+
+def count(name, n=1):
+    """Add ``n`` to the current request's ``name`` counter, if there is one."""
+    counts = _current_counts()
+    if counts is not None:
+        counts[name] += n
+
+
+def is_installed():
+    return builtins.open is _counting_open
+
+
+def install():
+    """Swap in the counting open(), fsync() and raw descriptor calls."""
+    builtins.open = _counting_open
+    os.fsync = _counting_fsync
+    os.open = _counting_os_open
+    os.read = _counting_read
+    os.write = _counting_write
+    os.pread = _counting_pread
+    os.pwrite = _counting_pwrite
+
+
+def uninstall():
+    builtins.open = _real_open
+    os.fsync = _real_fsync
+    os.open = _real_os_open
+    os.read = _real_read
+    os.write = _real_write
+    os.pread = _real_pread
+    os.pwrite = _real_pwrite
+
+
+def init_app(app):
+    """Count each request's file I/O when IO_ACCOUNTING is on (the default).
+
+    Call after metrics.init_app so the totals are in place before the
+    metrics teardown decides whether to flush.
+    """
+    if not app.config.get('IO_ACCOUNTING', True):
+        return
+    install()
+
+    @app.before_request
+    def _start_io_accounting():
+        g.io_counts = dict.fromkeys(IO_COUNTERS, 0)
+
+    @app.teardown_request
+    def _record_io(exc):
+        counts = g.pop('io_counts', None)
+        if counts is None:
+            return
+        labels = {'endpoint': request.endpoint or 'unmatched'}
+        for name in IO_COUNTERS:
+            if counts[name]:
+                metrics.inc(f'io_{name}_total', labels, counts[name])
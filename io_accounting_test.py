@@ -0,0 +1,84 @@
+import os
+import pytest
+from flask import Flask
+import io_accounting
+import metrics
+
+
+@pytest.fixture
+def client(tmp_path):
+    was_installed = io_accounting.is_installed()
+    app = Flask(__name__)
+    metrics.init_app(app)
+    io_accounting.init_app(app)
+    data_file = tmp_path / "data.json"
+    data_file.write_text('{"a": 1}')
+
+    @app.route('/io-read')
+    def io_read():
+        with open(data_file) as f:
+            return f.read()
+
+    @app.route('/io-write', methods=['POST'])
+    def io_write():
+        with open(tmp_path / "out.json", 'w') as f:
+            f.write('hello')
+            f.flush()
+            os.fsync(f.fileno())
+        return "ok"
+
+    @app.route('/io-append', methods=['POST'])
+    def io_append():
+        fd = os.open(tmp_path / "log", os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, b'one line\n')
+        finally:
+            os.close(fd)
+        return "ok"
+
+    yield app.test_client()
+    # Leave the wrappers as this test found them: the app module, if
+    # imported, installed them for the whole process
+    if not was_installed:
+        io_accounting.uninstall()
+
+
+def _counter(name, endpoint):
+    counters = metrics._instance.snapshot()['counters'].get(name, {})
+    return counters.get(f'endpoint={endpoint}', 0)
+
+
+def test_reads_counted_per_endpoint(client):
+    before = _counter('io_opens_total', 'io_read')
+    response = client.get('/io-read')
+    assert response.data == b'{"a": 1}'
+    assert _counter('io_opens_total', 'io_read') == before + 1
+    assert _counter('io_read_bytes_total', 'io_read') >= 8
+    assert _counter('io_written_bytes_total', 'io_read') == 0
+
+
+def test_writes_and_fsyncs_counted(client):
+    before = _counter('io_fsyncs_total', 'io_write')
+    client.post('/io-write')
+    assert _counter('io_written_bytes_total', 'io_write') >= 5
+    assert _counter('io_fsyncs_total', 'io_write') == before + 1
+
+
+def test_io_outside_requests_not_proxied(client, tmp_path):
+    path = tmp_path / "plain.txt"
+    with open(path, 'w') as f:
+        assert not isinstance(f, io_accounting._CountingFile)
+
+
+def test_raw_descriptor_writes_counted(client):
+    before = _counter('io_opens_total', 'io_append')
+    client.post('/io-append')
+    assert _counter('io_opens_total', 'io_append') == before + 1
+    assert _counter('io_written_bytes_total', 'io_append') >= 9
+
+
+def test_uninstall_restores_os_functions(client):
+    io_accounting.uninstall()
+    assert os.open is io_accounting._real_os_open
+    assert os.write is io_accounting._real_write
+    io_accounting.install()
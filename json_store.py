@@ -0,0 +1,67 @@
+"""One JSON codec for every file the app persists.
+
+Files are written compactly, with orjson when it is installed and the
+stdlib json module otherwise; both read files written by the other, as
+well as the older indent=2 files. Set RSVP_JSON_PRETTY=1 in the
+environment to write indented JSON while debugging.
+"""
+import json
+import os
+
+from tracing import span
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+PRETTY = bool(os.environ.get('RSVP_JSON_PRETTY'))
+
+# orjson.JSONDecodeError subclasses this, so callers catch one type
+JSONDecodeError = json.JSONDecodeError
+
+
+def _default(obj):
+    # Record types such as RSVPRecord serialize through to_json()
+    to_json = getattr(obj, 'to_json', None)
+    if to_json is None:
+        raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+    return to_json()
+
+
+def dumps(obj):
+    """Serialize ``obj`` to UTF-8 bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_INDENT_2 if PRETTY else 0)
+    if PRETTY:
+        return json.dumps(obj, default=_default, indent=2, ensure_ascii=False).encode('utf-8')
+    return json.dumps(obj, default=_default, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def loads(data):
+    """Parse JSON from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load(path):
+    """Read and parse a JSON file. Raises FileNotFoundError or JSONDecodeError."""
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def atomic_write(path, obj, fsync=True):
+    """Write ``obj`` to ``path`` so readers only ever see a complete file.
+
+    The temp file name includes the pid so workers writing the same file
+    at once don't rename each other's half-written temp files.
+    """
+    temp_file = f'{path}.{os.getpid()}.tmp'
+    with open(temp_file, 'wb') as f:
+        f.write(dumps(obj))
+        if fsync:
+            f.flush()
+            with span('fsync'):
+                os.fsync(f.fileno())
+    os.replace(temp_file, path)
@@ -0,0 +1,54 @@
+import json
+import os
+import pytest
+import json_store
+
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def backend(request, monkeypatch):
+    if request.param == 'orjson':
+        if json_store.orjson is None:
+            pytest.skip("orjson not installed")
+    else:
+        monkeypatch.setattr(json_store, 'orjson', None)
+    return request.param
+
+
+def test_round_trip(tmp_path, backend):
+    data = [{'name': 'Zoë Ñandú', 'num_adults': 2, 'comment': 'line\nbreak'}]
+    path = str(tmp_path / "rsvps.json")
+    json_store.atomic_write(path, data)
+    assert json_store.load(path) == data
+
+
+def test_compact_by_default(backend):
+    assert json_store.dumps({'a': [1, 2]}) == b'{"a":[1,2]}'
+
+
+def test_pretty_for_debugging(backend, monkeypatch):
+    monkeypatch.setattr(json_store, 'PRETTY', True)
+    assert json_store.dumps({'a': 1}) == b'{\n  "a": 1\n}'
+
+
+def test_reads_legacy_indented_files(tmp_path, backend):
+    """Files written by the old json.dump(indent=2) code still load"""
+    path = tmp_path / "admins.json"
+    path.write_text(json.dumps({'admins': [], 'invites': []}, indent=2))
+    assert json_store.load(str(path)) == {'admins': [], 'invites': []}
+
+
+def test_corrupt_file_raises_decode_error(tmp_path, backend):
+    path = tmp_path / "bad.json"
+    path.write_text('{"truncated": ')
+    with pytest.raises(json_store.JSONDecodeError):
+        json_store.load(str(path))
+
+
+def test_atomic_write_leaves_no_temp_file(tmp_path):
+    store_dir = tmp_path / "store"
+    store_dir.mkdir()
+    path = str(store_dir / "event.json")
+    json_store.atomic_write(path, {'slug': 'party'})
+    json_store.atomic_write(path, {'slug': 'party', 'name': 'Party'})
+    assert os.listdir(store_dir) == ['event.json']
+    assert json_store.load(path)['name'] == 'Party'
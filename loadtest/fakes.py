@@ -0,0 +1,53 @@
+"""Local stand-ins for Gmail and notify-service with configurable latency.
+
+Latencies come from LOADTEST_EMAIL_LATENCY_MS and LOADTEST_NOTIFY_LATENCY_MS
+so the harness can pass them through to every uWSGI worker.
+"""
+import os
+import sys
+import time
+import types
+
+
+def _latency(name, default_ms):
+    return float(os.environ.get(name, default_ms)) / 1000
+
+
+class FakeNotifyClient:
+    """Mimics notify_service.client.NotifyClient.phone()."""
+
+    def __init__(self, *args, **kwargs):
+        self.latency = _latency('LOADTEST_NOTIFY_LATENCY_MS', 150)
+
+    def phone(self, message, url=None):
+        time.sleep(self.latency)
+        return 200, {'ok': True}
+
+
+_notify_client = FakeNotifyClient()
+
+
+def fake_notify_phone(message, url=None):
+    """notify_phone() through the fake client.
+
+    The real notify_phone() skips sending whenever unittest has been
+    imported, which some dependencies do, so the app's reference is
+    replaced outright.
+    """
+    status, body = _notify_client.phone(message=message, url=url)
+    return bool(body and body.get('ok'))
+
+
+def fake_send_email(to, subject, body):
+    time.sleep(_latency('LOADTEST_EMAIL_LATENCY_MS', 400))
+    return True
+
+
+def install_notify_service():
+    """Register a fake notify_service.client before notifications.py imports it."""
+    package = types.ModuleType('notify_service')
+    client = types.ModuleType('notify_service.client')
+    client.NotifyClient = FakeNotifyClient
+    package.client = client
+    sys.modules['notify_service'] = package
+    sys.modules['notify_service.client'] = client
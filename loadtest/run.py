@@ -0,0 +1,213 @@
+#!/usr/bin/python3
+"""Invite-surge load test against the app under multi-process uWSGI.
+
+    python -m loadtest.run --requests 2000 --concurrency 100 --processes 5
+
+Starts uWSGI on a local port with loadtest.wsgi (the real app, with fake
+Gmail and notify-service that sleep for --email-latency-ms and
+--notify-latency-ms). It then fires --requests RSVPs with distinct emails
+at one synthetic event and prints a JSON report. The report has
+throughput, latency percentiles, status counts and lost updates, which
+are RSVPs the server accepted that are missing from rsvps_<id>.json
+afterwards.
+
+Needs uwsgi on PATH and config.py, like the server itself.
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from benchmarks.synthetic import make_event, write_events
+from rsvp_record import load_records
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(data_dir, port, processes, email_latency_ms, notify_latency_ms, log_path):
+    """Launch uWSGI serving loadtest.wsgi and wait until it answers."""
+    if not shutil.which('uwsgi'):
+        raise RuntimeError("uwsgi is not on PATH; pip install uwsgi")
+    env = dict(os.environ,
+               LOADTEST_DATA_DIR=data_dir,
+               LOADTEST_EMAIL_LATENCY_MS=str(email_latency_ms),
+               LOADTEST_NOTIFY_LATENCY_MS=str(notify_latency_ms),
+               PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, os.environ.get('PYTHONPATH')])))
+    log = open(log_path, 'w')
+    process = subprocess.Popen([
+        'uwsgi',
+        '--http', f'127.0.0.1:{port}',
+        '--module', 'loadtest.wsgi:application',
+        '--chdir', REPO_DIR,
+        '--master',
+        '--processes', str(processes),
+        '--enable-threads',
+        '--die-on-term',
+        '--listen', '1024',
+        '--disable-logging',
+    ], env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uwsgi exited with {process.returncode}; see {log_path}")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/')
+            conn.getresponse().read()
+            conn.close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"uwsgi did not start within 30s; see {log_path}")
+
+
+def stop_server(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def post_rsvp(port, slug, i, timeout):
+    """Submit one RSVP; returns (status, seconds, email)."""
+    email = f'surge.guest{i}@example.com'
+    body = urlencode({
+        'name': f'Surge Guest{i}',
+        'email': email,
+        'attending': 'yes',
+        'num_adults': '1',
+        'num_children': '0',
+    })
+    start = time.perf_counter()
+    try:
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+        conn.request('POST', f'/{slug}/rsvp', body, {'Content-Type': 'application/x-www-form-urlencoded'})
+        response = conn.getresponse()
+        response.read()
+        status = response.status
+        conn.close()
+    except OSError:
+        status = 'error'
+    return status, time.perf_counter() - start, email
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(results, elapsed, stored_emails):
+    """Build the report from (status, seconds, email) tuples and the emails on disk."""
+    latencies = sorted(seconds for _, seconds, _ in results)
+    statuses = Counter(str(status) for status, _, _ in results)
+    # The RSVP view redirects to the thank-you page once the RSVP is saved
+    accepted = {email for status, _, email in results if status == 302}
+    lost = accepted - stored_emails
+    return {
+        'requests': len(results),
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(results) / elapsed, 2) if elapsed else None,
+        'latency_ms': {
+            name: round(percentile(latencies, q) * 1000, 2) if latencies else None
+            for name, q in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99), ('max', 1.0))
+        },
+        'statuses': dict(statuses),
+        'accepted': len(accepted),
+        'stored': len(stored_emails),
+        'lost_updates': len(lost),
+    }
+
+
+def run(requests, concurrency, processes, email_latency_ms, notify_latency_ms, timeout=60, keep=False):
+    data_dir = tempfile.mkdtemp(prefix='rsvp-loadtest-')
+    event = make_event(0)
+    write_events(os.path.join(data_dir, 'events'), 1)
+    port = _free_port()
+    log_path = os.path.join(data_dir, 'uwsgi.log')
+
+    server = start_server(data_dir, port, processes, email_latency_ms, notify_latency_ms, log_path)
+    try:
+        progress = Counter()
+        lock = threading.Lock()
+
+        def submit(i):
+            result = post_rsvp(port, event['slug'], i, timeout)
+            with lock:
+                progress['done'] += 1
+                if progress['done'] % 500 == 0:
+                    print(f"{progress['done']}/{requests} sent", file=sys.stderr)
+            return result
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(submit, range(requests)))
+        elapsed = time.perf_counter() - started
+    finally:
+        stop_server(server)
+
+    try:
+        stored = {rsvp['email'] for rsvp in load_records(os.path.join(data_dir, f"rsvps_{event['id']}.json"))}
+    except (FileNotFoundError, json.JSONDecodeError):
+        stored = set()
+
+    report = summarize(results, elapsed, stored)
+    report['config'] = {
+        'concurrency': concurrency,
+        'processes': processes,
+        'email_latency_ms': email_latency_ms,
+        'notify_latency_ms': notify_latency_ms,
+    }
+    if keep:
+        report['data_dir'] = data_dir
+    else:
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--processes', type=int, default=5, help='uWSGI worker processes (prod runs 5)')
+    parser.add_argument('--email-latency-ms', type=float, default=400)
+    parser.add_argument('--notify-latency-ms', type=float, default=150)
+    parser.add_argument('--timeout', type=float, default=60, help='per-request timeout in seconds')
+    parser.add_argument('--keep', action='store_true', help='keep the data directory and uwsgi.log')
+    parser.add_argument('--output', help='write the report JSON here as well as stdout')
+    args = parser.parse_args(argv)
+
+    report = run(args.requests, args.concurrency, args.processes, args.email_latency_ms,
+                 args.notify_latency_ms, args.timeout, args.keep)
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    return 1 if report['lost_updates'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,30 @@
+"""uWSGI entry point for load tests: the real app with faked side effects.
+
+Every store is pointed into LOADTEST_DATA_DIR, outbound email and phone
+notifications go to the fakes in loadtest.fakes, and the RSVP rate limits
+are raised so a surge from one client address isn't throttled.
+"""
+import os
+
+from benchmarks.synthetic import isolate_stores
+from loadtest.fakes import fake_notify_phone, fake_send_email, install_notify_service
+
+install_notify_service()
+isolate_stores(os.path.abspath(os.environ['LOADTEST_DATA_DIR']))
+
+import app as app_module  # noqa: E402
+
+app_module.send_email = fake_send_email
+app_module.notify_phone = fake_notify_phone
+app_module.app.config.update(
+    RSVP_IP_RATE_PER_MINUTE=10 ** 9, RSVP_IP_BURST=10 ** 9,
+    RSVP_EMAIL_RATE_PER_MINUTE=10 ** 9, RSVP_EMAIL_BURST=10 ** 9,
+    RSVP_BACKLOG_THRESHOLD=10 ** 9,
+)
+
+# Warm the master the way wsgi.py does in production
+from preload import preload  # noqa: E402
+
+preload(app_module.app, app_module.render_markdown)
+
+application = app_module.app
@@ -0,0 +1,31 @@
+from loadtest.fakes import FakeNotifyClient
+from loadtest.run import percentile, summarize
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile(values, 1.0) == 100
+    assert percentile([], 0.5) is None
+
+
+def test_summarize_counts_lost_updates():
+    """Accepted RSVPs missing from the stored file count as lost"""
+    results = [
+        (302, 0.1, 'a@example.com'),
+        (302, 0.2, 'b@example.com'),
+        (302, 0.3, 'c@example.com'),
+        (500, 0.4, 'd@example.com'),
+    ]
+    report = summarize(results, 2.0, {'a@example.com', 'd@example.com'})
+    assert report['accepted'] == 3
+    assert report['stored'] == 2
+    assert report['lost_updates'] == 2
+    assert report['statuses'] == {'302': 3, '500': 1}
+    assert report['throughput_rps'] == 2.0
+
+
+def test_fake_notify_client_latency(monkeypatch):
+    monkeypatch.setenv('LOADTEST_NOTIFY_LATENCY_MS', '0')
+    assert FakeNotifyClient().phone('hi') == (200, {'ok': True})
@@ -0,0 +1,174 @@
+"""Owner-only worker memory introspection.
+
+/admin/memory reports the serving worker's RSS alongside every live
+worker's RSS from the metrics files. tracemalloc can be switched on in
+the serving worker, snapshots saved to data/memory/, and any two
+snapshots diffed to see which lines of code the growth came from.
+Each worker traces and snapshots independently; compare snapshots with
+the same pid.
+"""
+import os
+import re
+import tracemalloc
+from datetime import datetime
+
+from flask import Blueprint, jsonify, request
+
+import metrics
+from passkey_auth import owner_required
+
+memory_bp = Blueprint('memory', __name__)
+
+DEFAULT_SNAPSHOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'data', 'memory'))
+DEFAULT_FRAMES = 10
+TOP_LIMIT = 25
+
+_SNAPSHOT_NAME = re.compile(r'^snapshot-\d+-[\d-]+\.tracemalloc$')
+
+# Allocations made by tracemalloc itself and the import machinery are noise
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def _format_stat(stat):
+    frame = stat.traceback[0]
+    return {
+        'location': f'{frame.filename}:{frame.lineno}',
+        'size_bytes': stat.size,
+        'count': stat.count,
+        'traceback': [f'{f.filename}:{f.lineno}' for f in stat.traceback],
+    }
+
+
+def _format_diff(stat):
+    result = _format_stat(stat)
+    result['size_diff_bytes'] = stat.size_diff
+    result['count_diff'] = stat.count_diff
+    return result
+
+
+class MemoryInspector:
+    def __init__(self, snapshot_dir=None):
+        self.snapshot_dir = snapshot_dir if snapshot_dir is not None else DEFAULT_SNAPSHOT_DIR
+
+    def start(self, frames=DEFAULT_FRAMES):
+        """Start tracing allocations in this worker; False if already tracing."""
+        if tracemalloc.is_tracing():
+            return False
+        tracemalloc.start(frames)
+        return True
+
+    def stop(self):
+        tracemalloc.stop()
+
+    def take_snapshot(self):
+        """Save a filtered snapshot to disk; returns (name, snapshot)."""
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        name = f"snapshot-{os.getpid()}-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.tracemalloc"
+        snapshot.dump(os.path.join(self.snapshot_dir, name))
+        return name, snapshot
+
+    def load_snapshot(self, name):
+        if not _SNAPSHOT_NAME.match(name):
+            raise FileNotFoundError(name)
+        return tracemalloc.Snapshot.load(os.path.join(self.snapshot_dir, name))
+
+    def list_snapshots(self):
+        if not os.path.isdir(self.snapshot_dir):
+            return []
+        return sorted(name for name in os.listdir(self.snapshot_dir) if _SNAPSHOT_NAME.match(name))
+
+    def top(self, snapshot, limit=TOP_LIMIT, key_type='lineno'):
+        return [_format_stat(stat) for stat in snapshot.statistics(key_type)[:limit]]
+
+    def diff(self, old_name, new_name, limit=TOP_LIMIT, key_type='lineno'):
+        """Largest changes in allocated size between two saved snapshots."""
+        old = self.load_snapshot(old_name)
+        new = self.load_snapshot(new_name)
+        return [_format_diff(stat) for stat in new.compare_to(old, key_type)[:limit]]
+
+
+# Create a singleton instance
+_instance = MemoryInspector()
+
+
+def _key_type():
+    key_type = request.args.get('group_by', 'lineno')
+    return key_type if key_type in ('lineno', 'filename', 'traceback') else 'lineno'
+
+
+def _limit():
+    try:
+        return max(1, min(int(request.args.get('limit', TOP_LIMIT)), 500))
+    except ValueError:
+        return TOP_LIMIT
+
+
+@memory_bp.route('/admin/memory')
+@owner_required
+def memory_status():
+    """RSS of this worker and every live worker, plus tracemalloc state."""
+    status = {
+        'pid': os.getpid(),
+        'rss_bytes': metrics.current_rss_bytes(),
+        'workers': metrics.worker_stats(),
+        'tracing': tracemalloc.is_tracing(),
+        'snapshots': _instance.list_snapshots(),
+    }
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        status['traced_bytes'] = current
+        status['traced_peak_bytes'] = peak
+    return jsonify(status)
+
+
+@memory_bp.route('/admin/memory/tracemalloc/start', methods=['POST'])
+@owner_required
+def start_tracemalloc():
+    body = request.get_json(silent=True) or request.form
+    try:
+        frames = max(1, min(int(body.get('frames') or DEFAULT_FRAMES), 100))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'frames must be a number'}), 400
+    if not _instance.start(frames):
+        return jsonify({'success': False, 'error': 'tracemalloc is already running in this worker'})
+    return jsonify({'success': True, 'pid': os.getpid()})
+
+
+@memory_bp.route('/admin/memory/tracemalloc/stop', methods=['POST'])
+@owner_required
+def stop_tracemalloc():
+    _instance.stop()
+    return jsonify({'success': True, 'pid': os.getpid()})
+
+
+@memory_bp.route('/admin/memory/snapshot', methods=['POST'])
+@owner_required
+def take_memory_snapshot():
+    """Save a snapshot of this worker's traced allocations and show the top sites."""
+    if not tracemalloc.is_tracing():
+        return jsonify({'success': False, 'error': 'tracemalloc is not running in this worker'}), 409
+    name, snapshot = _instance.take_snapshot()
+    return jsonify({
+        'success': True,
+        'pid': os.getpid(),
+        'name': name,
+        'top': _instance.top(snapshot, _limit(), _key_type()),
+    })
+
+
+@memory_bp.route('/admin/memory/diff')
+@owner_required
+def diff_memory_snapshots():
+    """Compare two saved snapshots: ?old=<name>&new=<name>."""
+    try:
+        stats = _instance.diff(request.args.get('old', ''), request.args.get('new', ''),
+                               _limit(), _key_type())
+    except FileNotFoundError:
+        return jsonify({'success': False, 'error': 'Snapshot not found'}), 404
+    return jsonify({'success': True, 'diff': stats})
@@ -0,0 +1,56 @@
+import os
+import tracemalloc
+import pytest
+import metrics
+from memory_stats import MemoryInspector
+
+
+@pytest.fixture
+def inspector(tmp_path):
+    inspector = MemoryInspector(str(tmp_path))
+    inspector.start(frames=5)
+    yield inspector
+    inspector.stop()
+
+
+def test_snapshot_reports_allocation_site(inspector):
+    """The top allocation sites point at the code that allocated"""
+    hoard = [bytearray(1024) for _ in range(2000)]
+    name, snapshot = inspector.take_snapshot()
+
+    assert inspector.list_snapshots() == [name]
+    top = inspector.top(snapshot, limit=5)
+    assert any(entry['location'].startswith(__file__) for entry in top)
+    del hoard
+
+
+def test_diff_shows_growth(inspector):
+    old_name, _ = inspector.take_snapshot()
+    hoard = [bytearray(1024) for _ in range(2000)]
+    new_name, _ = inspector.take_snapshot()
+
+    diff = inspector.diff(old_name, new_name, limit=5)
+    assert diff[0]['location'].startswith(__file__)
+    assert diff[0]['size_diff_bytes'] >= 2000 * 1024
+    del hoard
+
+
+def test_start_twice_refused(inspector):
+    assert tracemalloc.is_tracing()
+    assert not inspector.start()
+
+
+def test_load_rejects_unknown_names(inspector):
+    with pytest.raises(FileNotFoundError):
+        inspector.load_snapshot('../admins.json')
+
+
+def test_worker_rss_in_metrics(tmp_path):
+    """Each flush records the worker's RSS, reported for live workers"""
+    registry = metrics.MetricsRegistry(str(tmp_path))
+    registry.flush()
+
+    workers = registry.worker_stats()
+    assert [w['pid'] for w in workers] == [os.getpid()]
+    assert workers[0]['rss_bytes'] > 0
+    assert f'rsvp_worker_rss_bytes{{pid="{os.getpid()}"}}' in registry.render_prometheus()
@@ -0,0 +1,322 @@
+"""Per-route request metrics aggregated across uWSGI workers.
+
+Each worker keeps latency histograms, status code counts and other
+counters in memory and every few seconds rewrites its own
+data/metrics/worker-<pid>-<id>.json. /admin/metrics merges every live
+worker's file and renders the totals in Prometheus text format, along
+with each live worker's resident set size.
+
+Files left by workers that have exited are added into retired.json and
+deleted, so the totals keep their requests without the directory
+growing with every restart. The random id keeps a later process that
+gets the same PID from overwriting a file that has not been retired
+yet; a worker retires any other file with its own PID on its first
+flush.
+"""
+import glob
+import json
+import os
+import re
+import threading
+import time
+import uuid
+
+from flask import Blueprint, Response, g, request
+
+import json_store
+from file_lock import locked
+from passkey_auth import admin_required
+
+metrics_bp = Blueprint('metrics', __name__)
+
+DEFAULT_METRICS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'data', 'metrics'))
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.9, 0.99)
+RETIRED_FILE = 'retired.json'
+
+_WORKER_FILE_PATTERN = re.compile(r'^worker-(\d+)(?:-[0-9a-f]+)?\.json$')
+
+
+def _label_key(labels):
+    return ','.join(f'{k}={v}' for k, v in sorted(labels.items()))
+
+
+def _parse_label_key(key):
+    return dict(item.split('=', 1) for item in key.split(',')) if key else {}
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    inner = ','.join('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"'))
+                     for k, v in labels.items())
+    return '{' + inner + '}'
+
+
+def current_rss_bytes():
+    """Resident set size of this process, from /proc where available."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        # Peak rather than current RSS, in KiB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _empty_snapshot():
+    return {'latency': {}, 'counters': {}}
+
+
+def merge_snapshots(snapshots):
+    """Add several worker snapshots together."""
+    merged = _empty_snapshot()
+    for snapshot in snapshots:
+        for endpoint, hist in snapshot.get('latency', {}).items():
+            target = merged['latency'].setdefault(
+                endpoint, {'buckets': [0] * (len(LATENCY_BUCKETS) + 1), 'count': 0, 'sum': 0.0})
+            target['buckets'] = [a + b for a, b in zip(target['buckets'], hist['buckets'])]
+            target['count'] += hist['count']
+            target['sum'] += hist['sum']
+        for name, series in snapshot.get('counters', {}).items():
+            target = merged['counters'].setdefault(name, {})
+            for key, value in series.items():
+                target[key] = target.get(key, 0) + value
+    return merged
+
+
+def estimate_quantile(q, buckets, count):
+    """Estimate a quantile from histogram buckets, as Prometheus' histogram_quantile does."""
+    if not count:
+        return None
+    rank = q * count
+    cumulative = 0
+    lower = 0.0
+    for upper, n in zip(LATENCY_BUCKETS, buckets):
+        if n and cumulative + n >= rank:
+            return lower + (upper - lower) * (rank - cumulative) / n
+        cumulative += n
+        lower = upper
+    return LATENCY_BUCKETS[-1]
+
+
+class MetricsRegistry:
+    def __init__(self, metrics_dir=None):
+        self.metrics_dir = metrics_dir if metrics_dir is not None else DEFAULT_METRICS_DIR
+        self._lock = threading.Lock()
+        self._data = _empty_snapshot()
+        self._last_flush = time.time()
+        self._worker_pid = None
+        self._worker_file = None
+
+    def observe(self, endpoint, seconds, status):
+        """Record one request's latency and status code."""
+        index = next((i for i, upper in enumerate(LATENCY_BUCKETS) if seconds <= upper), len(LATENCY_BUCKETS))
+        with self._lock:
+            hist = self._data['latency'].get(endpoint)
+            if hist is None:
+                hist = self._data['latency'][endpoint] = {
+                    'buckets': [0] * (len(LATENCY_BUCKETS) + 1), 'count': 0, 'sum': 0.0}
+            hist['buckets'][index] += 1
+            hist['count'] += 1
+            hist['sum'] += seconds
+        self.inc('requests_total', {'endpoint': endpoint, 'status': status})
+
+    def inc(self, name, labels, value=1):
+        """Add ``value`` to a labelled counter."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._data['counters'].setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def snapshot(self):
+        with self._lock:
+            return json.loads(json.dumps(self._data))
+
+    def _worker_path(self):
+        pid = os.getpid()
+        if self._worker_pid != pid:
+            self._worker_pid = pid
+            self._worker_file = f'worker-{pid}-{uuid.uuid4().hex[:8]}.json'
+        return os.path.join(self.metrics_dir, self._worker_file)
+
+    def _is_retired(self, name):
+        """Whether the worker that wrote file ``name`` has exited."""
+        match = _WORKER_FILE_PATTERN.match(name)
+        if not match:
+            return False
+        pid = int(match.group(1))
+        if pid == os.getpid():
+            # Another file with this PID was left by an earlier process
+            return name != self._worker_file
+        return not _pid_alive(pid)
+
+    def flush_due(self, interval, now=None):
+        now = time.time() if now is None else now
+        return now - self._last_flush >= interval
+
+    def flush(self):
+        """Write this worker's cumulative totals to its own file."""
+        self._last_flush = time.time()
+        os.makedirs(self.metrics_dir, exist_ok=True)
+        first_flush = self._worker_pid != os.getpid()
+        snapshot = self.snapshot()
+        snapshot['worker'] = {'pid': os.getpid(), 'rss_bytes': current_rss_bytes(), 'flushed_at': time.time()}
+        json_store.atomic_write(self._worker_path(), snapshot, fsync=False)
+        if first_flush:
+            self._read_snapshots()
+
+    def _retire(self, paths, retired):
+        """Add the files at ``paths`` into ``retired``, then delete them.
+
+        Called with the retired.json lock held. The names folded in are
+        saved with the totals, so files left behind by a collector that
+        died before deleting them are not counted twice.
+        """
+        already_folded = set(retired.get('folded', ()))
+        folded = []
+        snapshots = [retired]
+        for path in paths:
+            name = os.path.basename(path)
+            if name in already_folded:
+                continue
+            try:
+                snapshots.append(json_store.load(path))
+            except FileNotFoundError:
+                continue
+            except json_store.JSONDecodeError:
+                pass
+            folded.append(name)
+        if folded:
+            retired = merge_snapshots(snapshots)
+            retired['folded'] = folded
+            json_store.atomic_write(os.path.join(self.metrics_dir, RETIRED_FILE), retired, fsync=False)
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return retired
+
+    def _read_snapshots(self):
+        """Return (retired totals, live workers' snapshots), retiring dead workers' files."""
+        retired_path = os.path.join(self.metrics_dir, RETIRED_FILE)
+        with locked(retired_path + '.lock'):
+            try:
+                retired = json_store.load(retired_path)
+            except (FileNotFoundError, json_store.JSONDecodeError):
+                retired = _empty_snapshot()
+            live, dead = [], []
+            for path in glob.glob(os.path.join(self.metrics_dir, 'worker-*.json')):
+                (dead if self._is_retired(os.path.basename(path)) else live).append(path)
+            if dead:
+                retired = self._retire(dead, retired)
+            snapshots = []
+            for path in live:
+                try:
+                    snapshots.append(json_store.load(path))
+                except (OSError, json_store.JSONDecodeError):
+                    continue
+        return retired, snapshots
+
+    def collect(self):
+        """Merge the retired totals with the file of every live worker."""
+        retired, snapshots = self._read_snapshots()
+        return merge_snapshots([retired] + snapshots), len(snapshots)
+
+    def worker_stats(self):
+        """Per-worker RSS as of each worker's last flush, live workers only."""
+        workers = [s['worker'] for s in self._read_snapshots()[1] if 'worker' in s]
+        return sorted(workers, key=lambda w: w['pid'])
+
+    def render_prometheus(self):
+        """Render the merged metrics in Prometheus text exposition format."""
+        merged, workers = self.collect()
+        lines = [
+            '# HELP rsvp_workers Live worker metric files merged into this response.',
+            '# TYPE rsvp_workers gauge',
+            f'rsvp_workers {workers}',
+            '# HELP rsvp_request_duration_seconds Request latency by Flask endpoint.',
+            '# TYPE rsvp_request_duration_seconds histogram',
+        ]
+        for endpoint, hist in sorted(merged['latency'].items()):
+            cumulative = 0
+            for upper, n in zip(LATENCY_BUCKETS + ('+Inf',), hist['buckets']):
+                cumulative += n
+                lines.append(f'rsvp_request_duration_seconds_bucket'
+                             f'{_format_labels({"endpoint": endpoint, "le": upper})} {cumulative}')
+            lines.append(f'rsvp_request_duration_seconds_sum{_format_labels({"endpoint": endpoint})} {hist["sum"]}')
+            lines.append(f'rsvp_request_duration_seconds_count{_format_labels({"endpoint": endpoint})} {hist["count"]}')
+
+        lines.append('# HELP rsvp_worker_rss_bytes Resident set size of each live worker at its last flush.')
+        lines.append('# TYPE rsvp_worker_rss_bytes gauge')
+        for worker in self.worker_stats():
+            lines.append(f'rsvp_worker_rss_bytes{_format_labels({"pid": worker["pid"]})} {worker["rss_bytes"]}')
+
+        lines.append('# HELP rsvp_request_duration_estimate_seconds Latency quantiles estimated from the histogram.')
+        lines.append('# TYPE rsvp_request_duration_estimate_seconds gauge')
+        for endpoint, hist in sorted(merged['latency'].items()):
+            for q in QUANTILES:
+                value = estimate_quantile(q, hist['buckets'], hist['count'])
+                if value is not None:
+                    lines.append(f'rsvp_request_duration_estimate_seconds'
+                                 f'{_format_labels({"endpoint": endpoint, "quantile": q})} {value:.6f}')
+
+        for name, series in sorted(merged['counters'].items()):
+            lines.append(f'# TYPE rsvp_{name} counter')
+            for key, value in sorted(series.items()):
+                lines.append(f'rsvp_{name}{_format_labels(_parse_label_key(key))} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+# Create a singleton instance
+_instance = MetricsRegistry()
+
+observe = _instance.observe
+inc = _instance.inc
+worker_stats = _instance.worker_stats
+
+
+def init_app(app):
+    """Time every request and record it against its endpoint."""
+    @app.before_request
+    def _start_request_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            _instance.observe(request.endpoint or 'unmatched', time.perf_counter() - start,
+                              response.status_code)
+        return response
+
+    @app.teardown_request
+    def _flush_metrics(exc):
+        # An unhandled exception skips after_request; count it as a 500
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            _instance.observe(request.endpoint or 'unmatched', time.perf_counter() - start, 500)
+        if _instance.flush_due(app.config.get('METRICS_FLUSH_SECONDS', 10)):
+            try:
+                _instance.flush()
+            except OSError as e:
+                app.logger.error(f"Failed to write metrics: {e}")
+
+
+@metrics_bp.route('/admin/metrics')
+@admin_required
+def metrics_endpoint():
+    """Prometheus metrics for logged-in admins."""
+    _instance.flush()
+    return Response(_instance.render_prometheus(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,158 @@
+import os
+import pytest
+from flask import Flask
+import metrics
+from metrics import MetricsRegistry, merge_snapshots, estimate_quantile, LATENCY_BUCKETS
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    metrics.init_app(app)
+
+    @app.route('/ok')
+    def ok():
+        return "ok"
+
+    @app.route('/missing')
+    def missing():
+        return "nope", 404
+
+    return app.test_client()
+
+
+def test_observe_buckets_latency(tmp_path):
+    """Each observation lands in the first bucket that fits it"""
+    registry = MetricsRegistry(str(tmp_path))
+    registry.observe('rsvp', 0.003, 302)
+    registry.observe('rsvp', 0.3, 302)
+    registry.observe('rsvp', 60, 500)
+
+    hist = registry.snapshot()['latency']['rsvp']
+    assert hist['count'] == 3
+    assert hist['buckets'][0] == 1
+    assert hist['buckets'][LATENCY_BUCKETS.index(0.5)] == 1
+    assert hist['buckets'][-1] == 1
+
+
+def test_status_codes_counted(tmp_path):
+    registry = MetricsRegistry(str(tmp_path))
+    registry.observe('rsvp', 0.01, 302)
+    registry.observe('rsvp', 0.01, 302)
+    registry.observe('rsvp', 0.01, 429)
+
+    counters = registry.snapshot()['counters']['requests_total']
+    assert counters == {'endpoint=rsvp,status=302': 2, 'endpoint=rsvp,status=429': 1}
+
+
+def test_collect_merges_workers(tmp_path, monkeypatch):
+    """Files flushed by different workers are added together"""
+    first = MetricsRegistry(str(tmp_path))
+    second = MetricsRegistry(str(tmp_path))
+    first.observe('event_page', 0.01, 200)
+    second.observe('event_page', 0.02, 200)
+
+    monkeypatch.setattr(metrics, '_pid_alive', lambda pid: True)
+    monkeypatch.setattr('os.getpid', lambda: 1001)
+    first.flush()
+    monkeypatch.setattr('os.getpid', lambda: 1002)
+    second.flush()
+    monkeypatch.setattr('os.getpid', lambda: 1003)
+
+    merged, workers = first.collect()
+    assert workers == 2
+    assert merged['latency']['event_page']['count'] == 2
+    assert merged['counters']['requests_total']['endpoint=event_page,status=200'] == 2
+
+
+def test_exited_workers_are_retired(tmp_path, monkeypatch):
+    """A dead worker's file is added into retired.json and deleted"""
+    dead = MetricsRegistry(str(tmp_path))
+    dead.observe('rsvp', 0.01, 302)
+    monkeypatch.setattr('os.getpid', lambda: 1001)
+    dead.flush()
+    monkeypatch.undo()
+
+    live = MetricsRegistry(str(tmp_path))
+    live.observe('rsvp', 0.01, 302)
+    live.flush()
+    monkeypatch.setattr(metrics, '_pid_alive', lambda pid: pid != 1001)
+
+    for _ in range(2):
+        merged, workers = live.collect()
+        assert workers == 1
+        assert merged['counters']['requests_total']['endpoint=rsvp,status=302'] == 2
+    assert sorted(p.name for p in tmp_path.glob('*.json')) == ['retired.json', live._worker_file]
+
+
+def test_reused_pid_does_not_overwrite_dead_worker(tmp_path, monkeypatch):
+    """A new process with a dead worker's PID retires its file instead of replacing it"""
+    monkeypatch.setattr('os.getpid', lambda: 1001)
+    monkeypatch.setattr(metrics, '_pid_alive', lambda pid: True)
+    old = MetricsRegistry(str(tmp_path))
+    old.observe('rsvp', 0.01, 302)
+    old.flush()
+
+    new = MetricsRegistry(str(tmp_path))
+    new.observe('rsvp', 0.01, 302)
+    new.flush()
+
+    merged, workers = new.collect()
+    assert workers == 1
+    assert merged['counters']['requests_total']['endpoint=rsvp,status=302'] == 2
+    assert not (tmp_path / old._worker_file).exists()
+
+
+def test_retired_files_left_behind_are_not_counted_twice(tmp_path, monkeypatch):
+    """A file folded in by a collector that died before deleting it is only removed"""
+    dead = MetricsRegistry(str(tmp_path))
+    dead.observe('rsvp', 0.01, 302)
+    monkeypatch.setattr('os.getpid', lambda: 1001)
+    dead.flush()
+    monkeypatch.undo()
+    monkeypatch.setattr(metrics, '_pid_alive', lambda pid: pid != 1001)
+    monkeypatch.setattr(os, 'remove', lambda path: None)
+    MetricsRegistry(str(tmp_path)).collect()
+    monkeypatch.undo()
+    monkeypatch.setattr(metrics, '_pid_alive', lambda pid: pid != 1001)
+
+    merged, workers = MetricsRegistry(str(tmp_path)).collect()
+    assert merged['counters']['requests_total']['endpoint=rsvp,status=302'] == 1
+    assert not (tmp_path / dead._worker_file).exists()
+
+
+def test_merge_snapshots_empty():
+    assert merge_snapshots([]) == {'latency': {}, 'counters': {}}
+
+
+def test_estimate_quantile():
+    """Quantiles interpolate within the bucket holding the target rank"""
+    buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+    buckets[LATENCY_BUCKETS.index(0.1)] = 100  # all between 0.05 and 0.1
+    assert estimate_quantile(0.5, buckets, 100) == pytest.approx(0.075)
+    assert estimate_quantile(0.5, buckets, 0) is None
+
+
+def test_render_prometheus(tmp_path):
+    registry = MetricsRegistry(str(tmp_path))
+    registry.observe('rsvp', 0.01, 302)
+    registry.flush()
+
+    text = registry.render_prometheus()
+    assert 'rsvp_workers 1' in text
+    assert 'rsvp_request_duration_seconds_bucket{endpoint="rsvp",le="+Inf"} 1' in text
+    assert 'rsvp_request_duration_seconds_count{endpoint="rsvp"} 1' in text
+    assert 'rsvp_requests_total{endpoint="rsvp",status="302"} 1' in text
+    assert 'rsvp_request_duration_estimate_seconds{endpoint="rsvp",quantile="0.5"}' in text
+
+
+def test_middleware_records_requests(client):
+    """Requests through the app are timed against their endpoint"""
+    client.get('/ok')
+    client.get('/missing')
+    client.get('/no-such-route')
+
+    counters = metrics._instance.snapshot()['counters']['requests_total']
+    assert counters['endpoint=ok,status=200'] == 1
+    assert counters['endpoint=missing,status=404'] == 1
+    assert counters['endpoint=unmatched,status=404'] == 1
@@ -12,11 +12,13 @@ import logging
 import sys
 
 from notify_service.client import NotifyClient
+from tracing import traced
 
 
 _client = NotifyClient()
 
 
+@traced('notify_phone')
 def notify_phone(message: str = "Hello World", url=None):
   """Send a push notification to phone via notify-service.
 
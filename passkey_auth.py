@@ -1,24 +1,14 @@
-import json
 import os
 import uuid
 from datetime import datetime, timedelta
 from functools import wraps
 
 from flask import Blueprint, current_app, jsonify, request, session, redirect, url_for, render_template, flash
-from webauthn import (
-    generate_registration_options,
-    verify_registration_response,
-    generate_authentication_options,
-    verify_authentication_response,
-    options_to_json,
-)
-from webauthn.helpers.structs import (
-    AuthenticatorSelectionCriteria,
-    ResidentKeyRequirement,
-    UserVerificationRequirement,
-    PublicKeyCredentialDescriptor,
-)
-from webauthn.helpers import bytes_to_base64url, base64url_to_bytes
+
+import json_store
+
+# webauthn (and the cryptography stack under it) is imported inside the
+# passkey routes so workers that only serve event pages never load it.
 
 passkey_bp = Blueprint('passkey', __name__)
 
@@ -30,18 +20,12 @@ def _load_data():
     """Load admins.json, returning default structure if missing."""
     if not os.path.exists(ADMINS_FILE):
         return {"admins": [], "invites": []}
-    with open(ADMINS_FILE, 'r') as f:
-        return json.load(f)
+    return json_store.load(ADMINS_FILE)
 
 
 def _save_data(data):
     """Atomically save admins.json."""
-    temp_file = ADMINS_FILE + '.tmp'
-    with open(temp_file, 'w') as f:
-        json.dump(data, f, indent=2)
-        f.flush()
-        os.fsync(f.fileno())
-    os.replace(temp_file, ADMINS_FILE)
+    json_store.atomic_write(ADMINS_FILE, data)
 
 
 def get_admin_by_id(admin_id):
@@ -123,6 +107,15 @@ def _clean_expired_invites(data):
 @admin_required
 def register_options():
     """Generate WebAuthn registration options for the current admin."""
+    from webauthn import generate_registration_options, options_to_json
+    from webauthn.helpers import base64url_to_bytes, bytes_to_base64url
+    from webauthn.helpers.structs import (
+        AuthenticatorSelectionCriteria,
+        PublicKeyCredentialDescriptor,
+        ResidentKeyRequirement,
+        UserVerificationRequirement,
+    )
+
     admin = get_current_admin()
     exclude = [
         PublicKeyCredentialDescriptor(id=base64url_to_bytes(c['credential_id']))
@@ -150,6 +143,9 @@ def register_options():
 @admin_required
 def register_verify():
     """Verify and store a new passkey for the current admin."""
+    from webauthn import verify_registration_response
+    from webauthn.helpers import base64url_to_bytes, bytes_to_base64url
+
     challenge = session.pop('webauthn_challenge', None)
     if not challenge:
         return jsonify({'success': False, 'error': 'No challenge in session'})
@@ -182,6 +178,10 @@ def register_verify():
 @passkey_bp.route('/admin/passkey/auth/options', methods=['POST'])
 def auth_options():
     """Generate WebAuthn authentication options."""
+    from webauthn import generate_authentication_options, options_to_json
+    from webauthn.helpers import base64url_to_bytes, bytes_to_base64url
+    from webauthn.helpers.structs import PublicKeyCredentialDescriptor, UserVerificationRequirement
+
     all_creds = _all_credentials()
     allow = [
         PublicKeyCredentialDescriptor(id=base64url_to_bytes(cred['credential_id']))
@@ -201,6 +201,9 @@ def auth_options():
 @passkey_bp.route('/admin/passkey/auth/verify', methods=['POST'])
 def auth_verify():
     """Verify passkey authentication and create session."""
+    from webauthn import verify_authentication_response
+    from webauthn.helpers import base64url_to_bytes
+
     challenge = session.pop('webauthn_challenge', None)
     if not challenge:
         return jsonify({'success': False, 'error': 'No challenge in session'})
@@ -346,6 +349,14 @@ def invite_page(token):
 @passkey_bp.route('/admin/invite/<token>/register/options', methods=['POST'])
 def invite_register_options(token):
     """Generate registration options for an invitee."""
+    from webauthn import generate_registration_options, options_to_json
+    from webauthn.helpers import bytes_to_base64url
+    from webauthn.helpers.structs import (
+        AuthenticatorSelectionCriteria,
+        ResidentKeyRequirement,
+        UserVerificationRequirement,
+    )
+
     data = _load_data()
     _clean_expired_invites(data)
 
@@ -381,6 +392,9 @@ def invite_register_options(token):
 @passkey_bp.route('/admin/invite/<token>/register/verify', methods=['POST'])
 def invite_register_verify(token):
     """Verify invitee's passkey and create their admin account."""
+    from webauthn import verify_registration_response
+    from webauthn.helpers import base64url_to_bytes, bytes_to_base64url
+
     challenge = session.pop('webauthn_challenge', None)
     if not challenge:
         return jsonify({'success': False, 'error': 'No challenge in session'})
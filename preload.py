@@ -0,0 +1,81 @@
+"""Warm the app in the uWSGI master so forked workers start hot.
+
+wsgi.py calls preload() after importing the app. It builds the event
+index, compiles every template, renders each event's Markdown into
+render_markdown's cache, and loads the static manifest. It then freezes
+the GC so those objects stay in pages that workers share copy-on-write.
+Respawned workers are forked from the same warm master.
+
+Compiled templates are also kept on disk in a Jinja bytecode cache
+(JINJA_BYTECODE_CACHE_DIR, default data/jinja_cache). Running this module
+at deploy time fills it, so no worker compiles templates from source:
+
+    python preload.py
+"""
+import gc
+import os
+import time
+
+from jinja2 import FileSystemBytecodeCache
+
+DEFAULT_BYTECODE_CACHE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'data', 'jinja_cache'))
+
+
+class _BytecodeCache(FileSystemBytecodeCache):
+    # Creates the directory on the first write, so importing the app
+    # leaves nothing on disk
+    def dump_bytecode(self, bucket):
+        os.makedirs(self.directory, exist_ok=True)
+        super().dump_bytecode(bucket)
+
+
+def init_bytecode_cache(flask_app):
+    """Persist compiled templates across workers, respawns and restarts."""
+    cache_dir = flask_app.config.get('JINJA_BYTECODE_CACHE_DIR', DEFAULT_BYTECODE_CACHE_DIR)
+    flask_app.jinja_env.bytecode_cache = _BytecodeCache(cache_dir)
+
+
+def compile_templates(flask_app):
+    """Load every template into the Jinja environment's cache."""
+    names = flask_app.jinja_env.list_templates(extensions=['html'])
+    for name in names:
+        flask_app.jinja_env.get_template(name)
+    return len(names)
+
+
+def prerender_markdown(events, render_markdown):
+    """Fill render_markdown's cache with every event description."""
+    count = 0
+    for event in events:
+        if isinstance(event, dict) and event.get('description'):
+            render_markdown(event['description'])
+            count += 1
+    return count
+
+
+def preload(flask_app, render_markdown):
+    """Warm caches, then freeze everything allocated so far out of the GC."""
+    start = time.perf_counter()
+    from event_config import get_all_events
+    from static_assets import load_manifest
+    import dateutil.parser  # noqa: F401 -- fallback for dates the fast-path patterns miss
+
+    templates = compile_templates(flask_app)
+    descriptions = prerender_markdown(get_all_events().values(), render_markdown)
+    load_manifest()
+
+    # Objects moved to the permanent generation are never traversed by
+    # the collector, so workers don't dirty the shared pages they live in
+    gc.collect()
+    gc.freeze()
+
+    flask_app.logger.info(
+        f"Preloaded {templates} templates and {descriptions} event descriptions "
+        f"in {(time.perf_counter() - start) * 1000:.0f} ms; {gc.get_freeze_count()} objects frozen")
+
+
+if __name__ == '__main__':
+    from app import app
+
+    count = compile_templates(app)
+    print(f"Compiled {count} templates into {app.jinja_env.bytecode_cache.directory}")
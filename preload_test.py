@@ -0,0 +1,76 @@
+import gc
+import os
+from functools import lru_cache
+from flask import Flask
+import event_config
+from event_config import add_new_event, format_event_time
+from preload import compile_templates, init_bytecode_cache, prerender_markdown, preload
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), 'templates')
+
+
+def make_app():
+    app = Flask(__name__, template_folder=TEMPLATES_DIR)
+    app.jinja_env.filters['format_time'] = format_event_time
+    return app
+
+
+def test_compile_templates_fills_jinja_cache():
+    app = make_app()
+    count = compile_templates(app)
+    assert count == len(os.listdir(TEMPLATES_DIR))
+    assert len(app.jinja_env.cache) == count
+
+
+def test_prerender_markdown_skips_events_without_description():
+    rendered = []
+    events = [{'description': '**a**'}, {'description': ''}, {'name': 'no description'}]
+    assert prerender_markdown(events, rendered.append) == 1
+    assert rendered == ['**a**']
+
+
+def test_preload_warms_cache_and_freezes_gc(monkeypatch):
+    monkeypatch.setattr(event_config._instance, '_events', [])
+    add_new_event({
+        'name': 'Preloaded Party',
+        'date': 'November 15, 2030',
+        'start_time': '7:00 PM',
+        'location': 'Home',
+        'description': '# Welcome',
+        'max_guests_per_invite': '2',
+    })
+    calls = []
+
+    @lru_cache(maxsize=None)
+    def render(text):
+        calls.append(text)
+        return text.upper()
+
+    app = make_app()
+    try:
+        preload(app, render)
+        assert gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
+
+    assert calls == ['# Welcome']
+    render('# Welcome')
+    assert render.cache_info().hits == 1
+
+
+def test_bytecode_cache_written(tmp_path):
+    """Compiling templates leaves bytecode a fresh worker can load"""
+    app = make_app()
+    app.config['JINJA_BYTECODE_CACHE_DIR'] = str(tmp_path / "jinja_cache")
+    init_bytecode_cache(app)
+    count = compile_templates(app)
+    assert len(os.listdir(tmp_path / "jinja_cache")) == count
+
+    fresh = make_app()
+    fresh.config['JINJA_BYTECODE_CACHE_DIR'] = str(tmp_path / "jinja_cache")
+    init_bytecode_cache(fresh)
+    path = os.path.join(TEMPLATES_DIR, 'landing.html')
+    with open(path) as f:
+        source = f.read()
+    bucket = fresh.jinja_env.bytecode_cache.get_bucket(fresh.jinja_env, 'landing.html', path, source)
+    assert bucket.code is not None
@@ -0,0 +1,162 @@
+"""On-demand statistical sampling profiler for one worker.
+
+An owner arms the profiler from the settings page for the next N
+requests or T seconds. A background thread then samples every thread's
+Python stack every few milliseconds and writes the counts in collapsed
+stack format (one "frame;frame;frame count" line per stack), which
+flamegraph.pl and speedscope read directly. Only the worker that served
+the request to arm it is profiled.
+"""
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import Blueprint, jsonify, request, send_from_directory
+
+from passkey_auth import owner_required
+
+profiler_bp = Blueprint('profiler', __name__)
+
+DEFAULT_PROFILE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'data', 'profiles'))
+SAMPLE_INTERVAL = 0.005
+MAX_REQUESTS = 10000
+MAX_SECONDS = 600
+
+_PROFILE_NAME = re.compile(r'^profile-\d+-[\d-]+\.folded$')
+
+
+def _collapse(frame):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ';'.join(reversed(stack))
+
+
+class SamplingProfiler:
+    def __init__(self, profile_dir=None, interval=SAMPLE_INTERVAL):
+        self.profile_dir = profile_dir if profile_dir is not None else DEFAULT_PROFILE_DIR
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._stacks = Counter()
+        self._requests_left = None
+        self._deadline = None
+        self.last_profile = None
+
+    @property
+    def active(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, requests=None, seconds=None):
+        """Begin sampling until ``requests`` more requests finish or ``seconds`` pass."""
+        with self._lock:
+            if self.active:
+                return False
+            self._stacks = Counter()
+            self._requests_left = min(requests, MAX_REQUESTS) if requests else None
+            seconds = min(seconds, MAX_SECONDS) if seconds else (None if requests else MAX_SECONDS)
+            self._deadline = time.monotonic() + seconds if seconds else None
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        """Stop sampling and wait for the profile to be written; returns its path."""
+        thread = self._thread
+        self._stop.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        return self.last_profile
+
+    def request_finished(self):
+        """Count a finished request against the armed request budget."""
+        if self._requests_left is None or not self.active:
+            return
+        with self._lock:
+            self._requests_left -= 1
+            done = self._requests_left <= 0
+        if done:
+            self._stop.set()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.is_set():
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self._stacks[_collapse(frame)] += 1
+            if self._deadline is not None and time.monotonic() >= self._deadline:
+                break
+            self._stop.wait(self.interval)
+        self.last_profile = self._write()
+
+    def _write(self):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        name = f"profile-{os.getpid()}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.folded"
+        path = os.path.join(self.profile_dir, name)
+        with open(path, 'w') as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+    def list_profiles(self):
+        if not os.path.isdir(self.profile_dir):
+            return []
+        return sorted((name for name in os.listdir(self.profile_dir) if _PROFILE_NAME.match(name)),
+                      reverse=True)
+
+
+# Create a singleton instance
+_instance = SamplingProfiler()
+
+
+def init_app(app):
+    """Let the armed profiler count finished requests."""
+    @app.after_request
+    def _count_profiled_request(response):
+        if request.blueprint != 'profiler':
+            _instance.request_finished()
+        return response
+
+
+@profiler_bp.route('/admin/profiler')
+@owner_required
+def profiler_status():
+    """Return whether this worker is profiling, plus the saved profiles."""
+    return jsonify({
+        'active': _instance.active,
+        'pid': os.getpid(),
+        'profiles': _instance.list_profiles(),
+    })
+
+
+@profiler_bp.route('/admin/profiler/start', methods=['POST'])
+@owner_required
+def start_profiler():
+    """Arm the profiler in this worker for the next N requests or T seconds."""
+    body = request.get_json(silent=True) or request.form
+    try:
+        requests_count = int(body.get('requests') or 0)
+        seconds = int(body.get('seconds') or 0)
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'requests and seconds must be numbers'}), 400
+
+    if not _instance.start(requests=requests_count or None, seconds=seconds or None):
+        return jsonify({'success': False, 'error': 'Profiler is already running in this worker'})
+    return jsonify({'success': True, 'pid': os.getpid()})
+
+
+@profiler_bp.route('/admin/profiler/<name>')
+@owner_required
+def download_profile(name):
+    """Download a saved collapsed-stack profile."""
+    if not _PROFILE_NAME.match(name):
+        return "Profile not found", 404
+    return send_from_directory(_instance.profile_dir, name, mimetype='text/plain', as_attachment=True)
@@ -0,0 +1,44 @@
+import os
+import time
+from profiler import SamplingProfiler
+
+
+def busy_wait(seconds):
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pass
+
+
+def test_profile_for_seconds(tmp_path):
+    """Sampling for a fixed time writes collapsed stacks of the busy code"""
+    profiler = SamplingProfiler(str(tmp_path), interval=0.001)
+    assert profiler.start(seconds=1)
+    busy_wait(0.2)
+    path = profiler.stop()
+
+    with open(path) as f:
+        lines = f.read().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(' ', 1)
+    assert int(count) > 0
+    assert any('profiler_test.py:busy_wait' in line for line in lines)
+    assert profiler.list_profiles() == [os.path.basename(path)]
+
+
+def test_profile_for_requests(tmp_path):
+    """The profiler stops itself after the armed number of requests"""
+    profiler = SamplingProfiler(str(tmp_path), interval=0.001)
+    profiler.start(requests=2)
+    profiler.request_finished()
+    assert profiler.active
+    profiler.request_finished()
+    profiler._thread.join(timeout=5)
+    assert not profiler.active
+    assert profiler.last_profile is not None
+
+
+def test_start_while_running_is_refused(tmp_path):
+    profiler = SamplingProfiler(str(tmp_path), interval=0.001)
+    assert profiler.start(seconds=5)
+    assert not profiler.start(seconds=5)
+    profiler.stop()
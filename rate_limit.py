@@ -0,0 +1,288 @@
+"""Token-bucket rate limiting and admission control shared by uWSGI workers.
+
+Bucket state lives in a small memory-mapped file (data/ratelimit.bin)
+so every worker sees the same counts. A check is one flock plus a few
+struct reads and writes on the mapped page; the RSVP files are never
+touched, which lets a flood be turned away before any real work.
+
+Each worker counts its own in-flight RSVP requests in a slot keyed by
+its pid. Slots of processes that no longer exist are ignored and freed,
+so a worker killed mid-request (harakiri, OOM) cannot leave the backlog
+stuck above the threshold.
+
+The file also remembers, by hash, the submissions it has let through
+(the form's idempotency key plus its answers). A double click or retry
+of one of those goes straight to the view, which answers it from the
+idempotency store, without spending the guest's tokens or being turned
+away.
+"""
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, request
+
+import idempotency
+import io_accounting
+
+DEFAULT_STATE_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), 'data', 'ratelimit.bin'))
+SLOT_COUNT = 4096
+WORKER_SLOTS = 256
+SUBMISSION_SLOTS = 1024
+SUBMISSION_TTL_SECONDS = idempotency.DEFAULT_TTL_SECONDS
+
+_MAGIC = b'rlimit03'                # files in an older layout are reset on open
+_WORKER = struct.Struct('qq')      # pid, RSVP requests it has in flight
+_SUBMISSION = struct.Struct('Qd')  # submission hash, time it was let through
+_SLOT = struct.Struct('Qdd')       # key hash, tokens left, last refill time
+_SUBMISSIONS_OFFSET = len(_MAGIC) + WORKER_SLOTS * _WORKER.size
+_HEADER_SIZE = _SUBMISSIONS_OFFSET + SUBMISSION_SLOTS * _SUBMISSION.size
+
+try:
+    import uwsgi
+except ImportError:
+    uwsgi = None
+
+
+class RateLimiter:
+    def __init__(self, state_file=None, slots=SLOT_COUNT):
+        self.state_file = state_file if state_file is not None else DEFAULT_STATE_FILE
+        self.slots = slots
+        self._fd = None
+        self._map = None
+        self._opened = None
+
+    def _open(self):
+        # flock is tied to the open file description, which a forked worker
+        # would share with the master, so each process maps the file itself.
+        opened = (os.getpid(), self.state_file)
+        if self._opened == opened:
+            return
+        # The state file was re-pointed, or this is a forked child holding
+        # the parent's copies; either way they are not used again
+        self.close()
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        size = _HEADER_SIZE + self.slots * _SLOT.size
+        fd = os.open(self.state_file, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if os.pread(fd, len(_MAGIC), 0) != _MAGIC:
+                os.ftruncate(fd, 0)
+                os.pwrite(fd, _MAGIC, 0)
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            m = mmap.mmap(fd, size)
+            # A new worker may have been given the pid of one that died
+            # mid-request; whatever that one left behind is not ours
+            slot = self._worker_slot(m, opened[0])
+            if slot is not None:
+                _WORKER.pack_into(m, slot, 0, 0)
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+        self._map = m
+        self._opened = opened
+
+    def close(self):
+        """Unmap the state file and close its descriptor, if open."""
+        if self._map is not None:
+            self._map.close()
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = self._map = self._opened = None
+
+    @contextmanager
+    def _locked(self):
+        self._open()
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield self._map
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _slot(self, key):
+        key_hash = _key_hash(key)
+        return key_hash, _HEADER_SIZE + (key_hash % self.slots) * _SLOT.size
+
+    @staticmethod
+    def _worker_slot(m, pid):
+        """Offset of ``pid``'s in-flight slot, or None if it has none."""
+        for i in range(WORKER_SLOTS):
+            offset = len(_MAGIC) + i * _WORKER.size
+            if _WORKER.unpack_from(m, offset)[0] == pid:
+                return offset
+        return None
+
+    @staticmethod
+    def _running(m):
+        """Sum the in-flight counts of live processes, freeing dead ones' slots."""
+        running = 0
+        for i in range(WORKER_SLOTS):
+            offset = len(_MAGIC) + i * _WORKER.size
+            pid, count = _WORKER.unpack_from(m, offset)
+            if not pid:
+                continue
+            if _pid_alive(pid):
+                running += max(0, count)
+            else:
+                _WORKER.pack_into(m, offset, 0, 0)
+        return running
+
+    def _add_in_flight(self, m, delta):
+        pid = os.getpid()
+        offset = self._worker_slot(m, pid)
+        if offset is None:
+            offset = self._worker_slot(m, 0)
+            if offset is None:
+                return  # Every slot taken: this worker goes uncounted
+        count = max(0, _WORKER.unpack_from(m, offset)[1] + delta)
+        _WORKER.pack_into(m, offset, pid if count else 0, count)
+        io_accounting.count('written_bytes', _WORKER.size)
+
+    def hit(self, key, per_minute, burst, now=None):
+        """Take a token from ``key``'s bucket.
+
+        Returns 0 when a token was available, otherwise the number of
+        seconds until the next one. Keys that hash to the same slot evict
+        each other, which can only make the limiter more lenient.
+        """
+        now = time.time() if now is None else now
+        rate = per_minute / 60.0
+        key_hash, offset = self._slot(key)
+        with self._locked() as m:
+            stored_hash, tokens, updated = _SLOT.unpack_from(m, offset)
+            if stored_hash != key_hash:
+                tokens, updated = float(burst), now
+            tokens = min(float(burst), tokens + max(0.0, now - updated) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                retry_after = 0.0
+            else:
+                retry_after = (1 - tokens) / rate if rate else 60.0
+            _SLOT.pack_into(m, offset, key_hash, tokens, now)
+        io_accounting.count('written_bytes', _SLOT.size)  # through the map, not write()
+        return retry_after
+
+    def admitted(self, submission, now=None):
+        """Whether ``submission`` was let through in the last SUBMISSION_TTL_SECONDS."""
+        now = time.time() if now is None else now
+        submission_hash = _key_hash(submission)
+        offset = _SUBMISSIONS_OFFSET + (submission_hash % SUBMISSION_SLOTS) * _SUBMISSION.size
+        with self._locked() as m:
+            stored_hash, admitted_at = _SUBMISSION.unpack_from(m, offset)
+        return stored_hash == submission_hash and now - admitted_at < SUBMISSION_TTL_SECONDS
+
+    def admit(self, submission, now=None):
+        """Remember that ``submission`` was let through.
+
+        Submissions that hash to the same slot evict each other; a replay
+        of an evicted one is simply rate limited like a new submission.
+        """
+        now = time.time() if now is None else now
+        submission_hash = _key_hash(submission)
+        offset = _SUBMISSIONS_OFFSET + (submission_hash % SUBMISSION_SLOTS) * _SUBMISSION.size
+        with self._locked() as m:
+            _SUBMISSION.pack_into(m, offset, submission_hash, now)
+        io_accounting.count('written_bytes', _SUBMISSION.size)
+
+    def in_flight_count(self):
+        with self._locked() as m:
+            return self._running(m)
+
+    @contextmanager
+    def in_flight(self):
+        """Count a request as running; yields how many others were already running."""
+        with self._locked() as m:
+            running = self._running(m)
+            self._add_in_flight(m, 1)
+        try:
+            yield running
+        finally:
+            with self._locked() as m:
+                self._add_in_flight(m, -1)
+
+
+def _key_hash(key):
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Exists, owned by another user
+    return True
+
+
+# Create a singleton instance
+_instance = RateLimiter()
+
+
+def _listen_queue():
+    """Requests waiting in uWSGI's socket backlog, when running under uWSGI."""
+    if uwsgi is None:
+        return 0
+    try:
+        return uwsgi.listen_queue()
+    except Exception:
+        return 0
+
+
+def _submission():
+    """One filled-in form: its idempotency key and answers; None without a key."""
+    key = request.form.get(idempotency.FORM_FIELD, '')
+    if not idempotency.is_valid_key(key):
+        return None
+    return f"submission:{key}:{idempotency.fingerprint(request.path, request.form)}"
+
+
+def rsvp_rate_limited(f):
+    """Decorator applying per-IP and per-email token buckets to an RSVP POST.
+
+    Buckets are always drained so they reflect recent traffic, but a
+    request is only turned away once the backlog (RSVPs in flight across
+    workers plus uWSGI's listen queue) reaches RSVP_BACKLOG_THRESHOLD.
+    A resubmission of a form that was already let through skips the
+    buckets.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        config = current_app.config
+        submission = _submission()
+        with _instance.in_flight() as running:
+            if submission and _instance.admitted(submission):
+                return f(*args, **kwargs)
+            retry_after = _instance.hit(
+                f"ip:{request.remote_addr}",
+                config.get('RSVP_IP_RATE_PER_MINUTE', 10),
+                config.get('RSVP_IP_BURST', 10),
+            )
+            email = request.form.get('email', '').strip().lower()
+            if email:
+                retry_after = max(retry_after, _instance.hit(
+                    f"email:{email}",
+                    config.get('RSVP_EMAIL_RATE_PER_MINUTE', 3),
+                    config.get('RSVP_EMAIL_BURST', 3),
+                ))
+
+            backlog = running + _listen_queue()
+            if retry_after and backlog >= config.get('RSVP_BACKLOG_THRESHOLD', 2):
+                current_app.logger.warning(
+                    f"Rate limited RSVP from {request.remote_addr} (backlog {backlog})")
+                return "Too many requests, please try again shortly", 429, {
+                    'Retry-After': str(int(retry_after) + 1)
+                }
+            if submission:
+                _instance.admit(submission)
+            return f(*args, **kwargs)
+    return decorated_function
@@ -0,0 +1,165 @@
+import os
+import subprocess
+import uuid
+import pytest
+from flask import Flask
+from rate_limit import RateLimiter, rsvp_rate_limited, _instance, _MAGIC, _WORKER, SUBMISSION_TTL_SECONDS
+
+
+@pytest.fixture
+def limiter(tmp_path):
+    return RateLimiter(str(tmp_path / "ratelimit.bin"), slots=64)
+
+
+@pytest.fixture
+def client():
+    """A minimal app with a rate limited endpoint standing in for rsvp()."""
+    app = Flask(__name__)
+    app.config.update(
+        RSVP_IP_RATE_PER_MINUTE=60,
+        RSVP_IP_BURST=2,
+        RSVP_EMAIL_RATE_PER_MINUTE=60,
+        RSVP_EMAIL_BURST=5,
+        RSVP_BACKLOG_THRESHOLD=0,
+    )
+
+    @app.route('/rsvp', methods=['POST'])
+    @rsvp_rate_limited
+    def rsvp():
+        return "ok"
+
+    return app.test_client()
+
+
+def test_hit_allows_burst_then_limits(limiter):
+    """A bucket allows `burst` hits and then asks the caller to wait"""
+    assert limiter.hit('ip:1.2.3.4', 60, 3, now=100.0) == 0
+    assert limiter.hit('ip:1.2.3.4', 60, 3, now=100.0) == 0
+    assert limiter.hit('ip:1.2.3.4', 60, 3, now=100.0) == 0
+    assert limiter.hit('ip:1.2.3.4', 60, 3, now=100.0) == pytest.approx(1.0)
+
+
+def test_hit_refills_over_time(limiter):
+    """Tokens come back at the configured rate"""
+    limiter.hit('ip:1.2.3.4', 60, 1, now=100.0)
+    assert limiter.hit('ip:1.2.3.4', 60, 1, now=100.5) > 0
+    assert limiter.hit('ip:1.2.3.4', 60, 1, now=102.0) == 0
+
+
+def test_keys_are_independent(limiter):
+    """Draining one key's bucket does not affect another"""
+    limiter.hit('ip:1.2.3.4', 60, 1, now=100.0)
+    assert limiter.hit('ip:1.2.3.4', 60, 1, now=100.0) > 0
+    assert limiter.hit('ip:5.6.7.8', 60, 1, now=100.0) == 0
+
+
+def test_state_shared_between_instances(tmp_path):
+    """Two limiters on the same file (two workers) share buckets"""
+    path = str(tmp_path / "shared.bin")
+    first = RateLimiter(path, slots=64)
+    second = RateLimiter(path, slots=64)
+    first.hit('email:a@example.com', 60, 1, now=100.0)
+    assert second.hit('email:a@example.com', 60, 1, now=100.0) > 0
+
+
+def test_in_flight_counts_running_requests(limiter):
+    """in_flight reports how many requests were already running"""
+    with limiter.in_flight() as first:
+        assert first == 0
+        with limiter.in_flight() as second:
+            assert second == 1
+            assert limiter.in_flight_count() == 2
+    assert limiter.in_flight_count() == 0
+
+
+def _leave_requests_in_flight(path, pid, count):
+    """Fill a worker slot as a process that died mid-request would have left it"""
+    fd = os.open(path, os.O_RDWR)
+    try:
+        os.pwrite(fd, _WORKER.pack(pid, count), len(_MAGIC))
+    finally:
+        os.close(fd)
+
+
+def test_dead_workers_in_flight_requests_ignored(limiter):
+    """A worker killed mid-request does not keep the backlog up forever"""
+    limiter.in_flight_count()  # create the file
+    dead = subprocess.Popen(['true'])
+    dead.wait()
+    _leave_requests_in_flight(limiter.state_file, dead.pid, 50)
+    assert limiter.in_flight_count() == 0
+    with limiter.in_flight() as running:
+        assert running == 0
+
+
+def test_reused_pid_starts_from_zero(tmp_path):
+    """A new worker that inherits a dead worker's pid drops its count"""
+    path = str(tmp_path / "ratelimit.bin")
+    RateLimiter(path, slots=64).in_flight_count()
+    _leave_requests_in_flight(path, os.getpid(), 50)
+    assert RateLimiter(path, slots=64).in_flight_count() == 0
+
+
+def test_older_layout_is_reset(tmp_path):
+    """A file written before per-worker slots is not misread as live counts"""
+    path = tmp_path / "ratelimit.bin"
+    path.write_bytes(b'\x07' * 4096)
+    assert RateLimiter(str(path), slots=64).in_flight_count() == 0
+
+
+def test_decorator_rejects_over_limit(client):
+    """Requests past the per-IP burst get a 429 with Retry-After"""
+    assert client.post('/rsvp', data={'email': 'a@example.com'}).status_code == 200
+    assert client.post('/rsvp', data={'email': 'b@example.com'}).status_code == 200
+    response = client.post('/rsvp', data={'email': 'c@example.com'})
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+
+
+def test_decorator_allows_over_limit_below_backlog_threshold(client):
+    """Without a backlog, over-limit requests are still let through"""
+    client.application.config['RSVP_BACKLOG_THRESHOLD'] = 1
+    for _ in range(5):
+        assert client.post('/rsvp', data={'email': 'a@example.com'}).status_code == 200
+    assert _instance.in_flight_count() == 0
+
+
+def test_resubmitted_form_skips_buckets(client):
+    """A double click of an admitted form is not rate limited"""
+    form = {'email': 'a@example.com', 'idempotency_key': str(uuid.uuid4())}
+    for _ in range(5):
+        assert client.post('/rsvp', data=form).status_code == 200
+    assert client.post('/rsvp', data={'email': 'b@example.com'}).status_code == 200
+    assert client.post('/rsvp', data={'email': 'c@example.com'}).status_code == 429
+
+
+def test_rejected_form_is_not_admitted(client):
+    """Only a form that got through skips the buckets when it comes back"""
+    for email in ('a@example.com', 'b@example.com'):
+        client.post('/rsvp', data={'email': email})
+    form = {'email': 'c@example.com', 'idempotency_key': str(uuid.uuid4())}
+    assert client.post('/rsvp', data=form).status_code == 429
+    assert client.post('/rsvp', data=form).status_code == 429
+    assert client.post('/rsvp', data=dict(form, email='d@example.com')).status_code == 429
+
+
+def test_admitted_submissions_expire(limiter):
+    limiter.admit('submission:abc', now=100.0)
+    assert limiter.admitted('submission:abc', now=101.0)
+    assert not limiter.admitted('submission:other', now=101.0)
+    assert not limiter.admitted('submission:abc', now=100.0 + SUBMISSION_TTL_SECONDS)
+
+
+def test_repointing_closes_previous_file(tmp_path):
+    """Moving the limiter to another state file does not leak the old descriptor"""
+    limiter = RateLimiter(str(tmp_path / "0.bin"), slots=64)
+    limiter.hit('ip:1.2.3.4', 60, 1, now=100.0)
+    old_map = limiter._map
+    open_fds = len(os.listdir('/proc/self/fd'))
+    for i in range(1, 6):
+        limiter.state_file = str(tmp_path / f"{i}.bin")
+        assert limiter.hit('ip:1.2.3.4', 60, 1, now=100.0) == 0
+    assert old_map.closed
+    assert len(os.listdir('/proc/self/fd')) == open_fds
+    limiter.close()
+    assert len(os.listdir('/proc/self/fd')) < open_fds
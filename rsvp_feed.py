@@ -0,0 +1,130 @@
+"""Per-event RSVP change feed shared by all uWSGI workers.
+
+Every RSVP write appends one JSON line to data/feed/<event_id>.log. The
+byte offset just past a line is its sequence number, so any worker can
+answer "what changed since N?" with a single seek instead of needing a
+broker to fan changes out between processes. The admin page polls for
+that with short requests that return at once, so no worker is held open
+waiting for changes.
+
+Once a log passes MAX_LOG_BYTES the next change starts a new one. Its
+first line, {"base": N}, carries the sequence numbers on from the old
+log, so they keep increasing. A reader that is behind the new log's
+base gets None from read_changes() and reloads the table instead.
+"""
+import fcntl
+import json
+import os
+
+DEFAULT_FEED_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'data', 'feed'))
+MAX_LOG_BYTES = 1024 * 1024
+
+# Fields the admin RSVP table displays; tokens never leave the server.
+FEED_FIELDS = ('name', 'email', 'attending', 'num_guests', 'num_adults', 'num_children',
+               'comment', 'timestamp', 'updated_at')
+
+_HEADER_PREFIX = b'{"base":'
+
+
+def _parse_header(first_line):
+    """Return (base, header length) for a log starting with ``first_line``."""
+    if first_line.startswith(_HEADER_PREFIX) and first_line.endswith(b'\n'):
+        return json.loads(first_line)['base'], len(first_line)
+    return 0, 0
+
+
+class RSVPFeed:
+    def __init__(self, feed_dir=None, max_log_bytes=MAX_LOG_BYTES):
+        self.feed_dir = feed_dir if feed_dir is not None else DEFAULT_FEED_DIR
+        self.max_log_bytes = max_log_bytes
+
+    def _feed_path(self, event_id):
+        return os.path.join(self.feed_dir, f'{event_id}.log')
+
+    def _open_locked(self, path):
+        # A writer that was waiting for the lock while another one rotated
+        # the log holds the old, unlinked file; reopen until the lock is
+        # held on the file the path names.
+        while True:
+            fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(fd).st_ino == os.stat(path).st_ino:
+                    return fd
+            except FileNotFoundError:
+                pass
+            os.close(fd)
+
+    def record_change(self, event_id, position, rsvp):
+        """Append a change for the RSVP at ``position`` and return its sequence number."""
+        os.makedirs(self.feed_dir, exist_ok=True)
+        change = {
+            'position': position,
+            'rsvp': {key: rsvp[key] for key in FEED_FIELDS if key in rsvp},
+        }
+        line = (json.dumps(change) + '\n').encode('utf-8')
+        path = self._feed_path(event_id)
+        # One write per line under an exclusive lock keeps lines whole
+        # when several workers record changes at the same time.
+        fd = self._open_locked(path)
+        try:
+            size = os.fstat(fd).st_size
+            base, header_length = _parse_header(os.pread(fd, 64, 0).split(b'\n', 1)[0] + b'\n')
+            seq = base + size - header_length
+            if size and size + len(line) > self.max_log_bytes:
+                header = (json.dumps({'base': seq}) + '\n').encode('utf-8')
+                temp_file = f'{path}.{os.getpid()}.tmp'
+                with open(temp_file, 'wb') as f:
+                    f.write(header + line)
+                os.replace(temp_file, path)
+                return seq + len(line)
+            os.write(fd, line)
+            return seq + len(line)
+        finally:
+            os.close(fd)
+
+    def current_seq(self, event_id):
+        """Return the sequence number of the latest change (0 if none)."""
+        try:
+            with open(self._feed_path(event_id), 'rb') as f:
+                base, header_length = _parse_header(f.readline())
+                return base + os.fstat(f.fileno()).st_size - header_length
+        except OSError:
+            return 0
+
+    def read_changes(self, event_id, since=0):
+        """Return a list of (seq, change) tuples recorded after ``since``.
+
+        Returns None when ``since`` is not in the current log: the changes
+        after it were rotated away, or it came from a log that was removed.
+        """
+        try:
+            with open(self._feed_path(event_id), 'rb') as f:
+                base, header_length = _parse_header(f.readline())
+                end = base + os.fstat(f.fileno()).st_size - header_length
+                if since < base or since > end:
+                    return None
+                f.seek(header_length + since - base)
+                data = f.read()
+        except OSError:
+            return None if since else []
+
+        changes = []
+        seq = since
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b'\n'):
+                break  # Partially written line; pick it up on the next poll
+            seq += len(line)
+            try:
+                changes.append((seq, json.loads(line)))
+            except ValueError:
+                continue
+        return changes
+
+
+# Create a singleton instance
+_instance = RSVPFeed()
+
+record_change = _instance.record_change
+current_seq = _instance.current_seq
+read_changes = _instance.read_changes
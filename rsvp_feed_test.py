@@ -0,0 +1,92 @@
+import os
+from rsvp_feed import RSVPFeed, record_change, read_changes, current_seq, _instance
+
+SAMPLE_RSVP = {
+    'timestamp': '2024-11-01T12:00:00',
+    'name': 'Jane Doe',
+    'email': 'jane@example.com',
+    'attending': 'yes',
+    'num_adults': 2,
+    'num_children': 1,
+    'comment': 'See you there',
+    'token': 'secret-token',
+}
+
+
+def test_current_seq_empty_feed():
+    """A feed that has never been written starts at sequence 0"""
+    assert current_seq('abc123') == 0
+    assert read_changes('abc123') == []
+
+
+def test_record_and_read_changes():
+    """Changes come back in order with increasing sequence numbers"""
+    first = record_change('abc123', 0, SAMPLE_RSVP)
+    second = record_change('abc123', 1, dict(SAMPLE_RSVP, name='John Roe'))
+
+    assert 0 < first < second
+    assert current_seq('abc123') == second
+
+    changes = read_changes('abc123')
+    assert [seq for seq, _ in changes] == [first, second]
+    assert changes[0][1]['position'] == 0
+    assert changes[1][1]['rsvp']['name'] == 'John Roe'
+
+
+def test_read_changes_since_sequence():
+    """Reading from a sequence number only returns later changes"""
+    first = record_change('abc123', 0, SAMPLE_RSVP)
+    record_change('abc123', 1, SAMPLE_RSVP)
+
+    changes = read_changes('abc123', since=first)
+    assert len(changes) == 1
+    assert changes[0][1]['position'] == 1
+
+
+def test_token_not_exposed():
+    """The update token is never written to the feed"""
+    record_change('abc123', 0, SAMPLE_RSVP)
+    _, change = read_changes('abc123')[0]
+    assert 'token' not in change['rsvp']
+    assert change['rsvp']['email'] == 'jane@example.com'
+
+
+def test_partial_line_ignored():
+    """A line still being written by another worker is not returned yet"""
+    seq = record_change('abc123', 0, SAMPLE_RSVP)
+    with open(os.path.join(_instance.feed_dir, 'abc123.log'), 'a') as f:
+        f.write('{"position": 1')
+
+    changes = read_changes('abc123')
+    assert [s for s, _ in changes] == [seq]
+
+
+def test_shared_between_instances(tmp_path):
+    """A second instance (another worker) sees changes from the first"""
+    writer = RSVPFeed(str(tmp_path / "shared"))
+    reader = RSVPFeed(str(tmp_path / "shared"))
+    seq = writer.record_change('abc123', 0, SAMPLE_RSVP)
+    assert reader.current_seq('abc123') == seq
+    assert reader.read_changes('abc123')[0][1]['rsvp']['name'] == 'Jane Doe'
+
+
+def test_rotation_keeps_sequence_numbers_increasing(tmp_path):
+    """A full log starts a new one that carries the sequence numbers on"""
+    feed = RSVPFeed(str(tmp_path / "feed"), max_log_bytes=400)
+    seqs = [feed.record_change('abc123', i, SAMPLE_RSVP) for i in range(5)]
+    assert seqs == sorted(seqs)
+    assert os.path.getsize(tmp_path / "feed" / "abc123.log") < 400
+    assert feed.current_seq('abc123') == seqs[-1]
+
+    # A reader that kept up only sees the newer changes
+    changes = feed.read_changes('abc123', since=seqs[-2])
+    assert [(seq, change['position']) for seq, change in changes] == [(seqs[-1], 4)]
+    # One that fell behind the rotation is told to reload
+    assert feed.read_changes('abc123', since=seqs[0]) is None
+
+
+def test_sequence_from_elsewhere_needs_reload():
+    """A sequence number past the end of the log (e.g. a wiped feed) resets"""
+    seq = record_change('abc123', 0, SAMPLE_RSVP)
+    assert read_changes('abc123', since=seq + 100) is None
+    assert read_changes('missing', since=seq) is None
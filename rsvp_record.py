@@ -0,0 +1,198 @@
+"""Compact in-memory representation of one RSVP.
+
+A large event keeps tens of thousands of RSVPs in memory while a request
+works on them. As plain dicts each one carries a hash table with a slot
+per key. RSVPRecord stores the known fields in __slots__ instead, and
+keeps any other keys from older files in a small side dict. It still
+behaves like a dict (rsvp['name'], rsvp.get('email'), rsvp.items(),
+**rsvp), so existing code and templates work unchanged. A field set to
+None reads as absent.
+
+Values of ``attending`` are interned, so every record shares the same
+'yes'/'no' string objects rather than one copy per RSVP.
+
+rsvps_<id>.json stays a list of dicts, so older releases and anything
+else reading the files are unaffected: records are built when a file is
+loaded and turned back into dicts when it is saved. Files written in the
+short-lived {"fields": [...], "rows": [...]} layout are still read, and
+go back to a list of dicts on their next save.
+"""
+import gc
+import sys
+from collections.abc import Mapping, MutableMapping
+from operator import attrgetter
+
+import json_store
+
+FIELDS = (
+    'timestamp',
+    'name',
+    'email',
+    'attending',
+    'num_adults',
+    'num_children',
+    'dietary_restrictions',
+    'comment',
+    'token',
+    'updated_at',
+)
+_FIELD_SET = frozenset(FIELDS)
+_get_fields = attrgetter(*FIELDS)
+
+ATTENDING_YES = sys.intern('yes')
+ATTENDING_NO = sys.intern('no')
+ATTENDING_VALUES = {ATTENDING_YES: ATTENDING_YES, ATTENDING_NO: ATTENDING_NO}
+
+
+class RSVPRecord(MutableMapping):
+    __slots__ = FIELDS + ('_extra',)
+
+    def __init__(self, **fields):
+        for key in FIELDS:
+            object.__setattr__(self, key, None)
+        self._extra = None
+        for key, value in fields.items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, data):
+        # Hot path when loading a whole event: assign the slots directly
+        record = object.__new__(cls)
+        get = data.get
+        record.timestamp = get('timestamp')
+        record.name = get('name')
+        record.email = get('email')
+        attending = get('attending')
+        record.attending = ATTENDING_VALUES.get(attending, attending) if type(attending) is str else attending
+        record.num_adults = get('num_adults')
+        record.num_children = get('num_children')
+        record.dietary_restrictions = get('dietary_restrictions')
+        record.comment = get('comment')
+        record.token = get('token')
+        record.updated_at = get('updated_at')
+        record._extra = None
+        if not _FIELD_SET.issuperset(data):
+            record._extra = {key: value for key, value in data.items() if key not in _FIELD_SET}
+        return record
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            if value is None:
+                raise KeyError(key)
+            return value
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in _FIELD_SET:
+            if key == 'attending' and type(value) is str:
+                value = ATTENDING_VALUES.get(value, value)
+            object.__setattr__(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in _FIELD_SET:
+            if getattr(self, key) is None:
+                raise KeyError(key)
+            object.__setattr__(self, key, None)
+            return
+        if self._extra is not None and key in self._extra:
+            del self._extra[key]
+            return
+        raise KeyError(key)
+
+    def __iter__(self):
+        for key, value in zip(FIELDS, _get_fields(self)):
+            if value is not None:
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        present = len(FIELDS) - _get_fields(self).count(None)
+        return present + (len(self._extra) if self._extra else 0)
+
+    def __contains__(self, key):
+        if key in _FIELD_SET:
+            return getattr(self, key) is not None
+        return self._extra is not None and key in self._extra
+
+    def get(self, key, default=None):
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            return default if value is None else value
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def items(self):
+        # One pass over the slots, rather than a lookup per key
+        return self.to_dict().items()
+
+    def values(self):
+        return self.to_dict().values()
+
+    def __eq__(self, other):
+        if isinstance(other, Mapping):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f'RSVPRecord({self.to_dict()!r})'
+
+    def __reduce__(self):
+        # copy.copy(), copy.deepcopy() and pickle rebuild from the dict
+        return (self.__class__.from_dict, (self.to_dict(),))
+
+    def copy(self):
+        return self.from_dict(self.to_dict())
+
+    def to_dict(self):
+        result = {key: value for key, value in zip(FIELDS, _get_fields(self)) if value is not None}
+        if self._extra:
+            result.update(self._extra)
+        return result
+
+    # Used by json_store when serializing
+    to_json = to_dict
+
+
+def records_from_dicts(rows):
+    return list(map(RSVPRecord.from_dict, rows))
+
+
+def records_from_json(data):
+    """RSVPRecords from a parsed RSVP file, in either layout."""
+    if isinstance(data, list):
+        return records_from_dicts(data)
+    fields = data['fields']
+    return records_from_dicts(dict(zip(fields, row)) for row in data['rows'])
+
+
+def records_to_json(rsvps):
+    """The list of dicts written to rsvps_<id>.json."""
+    return [rsvp.to_dict() if type(rsvp) is RSVPRecord else rsvp for rsvp in rsvps]
+
+
+def load_records(path):
+    """Read an RSVP file. Raises FileNotFoundError or JSONDecodeError.
+
+    The cyclic garbage collector is paused while the records are built:
+    none of them can form a cycle, and with it running, allocating tens
+    of thousands of objects triggers collections that cost more than the
+    conversion itself.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return records_from_json(json_store.load(path))
+    finally:
+        if enabled:
+            gc.enable()
@@ -0,0 +1,135 @@
+import copy
+import json
+import pickle
+import pytest
+import json_store
+from export_rsvps import generate_rsvps_csv
+from rsvp_record import (RSVPRecord, ATTENDING_YES, load_records, records_from_dicts, records_from_json,
+                         records_to_json)
+
+
+def make_row(**overrides):
+    row = {
+        'timestamp': '2030-01-01T12:00:00',
+        'name': 'Alex Smith',
+        'email': 'alex@example.com',
+        'attending': 'yes',
+        'num_adults': 2,
+        'num_children': 0,
+        'dietary_restrictions': '',
+        'comment': '',
+        'token': 'abc-123',
+    }
+    row.update(overrides)
+    return row
+
+
+def test_behaves_like_the_dict_it_came_from():
+    row = make_row()
+    record = RSVPRecord.from_dict(row)
+    assert record == row
+    assert record['name'] == 'Alex Smith'
+    assert record.get('updated_at') is None
+    assert 'updated_at' not in record
+    assert list(record.keys()) == list(row.keys())
+    with pytest.raises(KeyError):
+        record['updated_at']
+
+
+def test_setting_fields():
+    record = RSVPRecord.from_dict(make_row())
+    record['updated_at'] = '2030-01-02T00:00:00'
+    record['num_adults'] = 0
+    assert record['updated_at'] == '2030-01-02T00:00:00'
+    assert record.to_dict()['num_adults'] == 0
+
+
+def test_unknown_keys_are_kept():
+    """Fields from older files survive a load/save round trip"""
+    record = RSVPRecord.from_dict(make_row(num_guests=3))
+    assert record['num_guests'] == 3
+    assert record.to_dict()['num_guests'] == 3
+
+
+def test_no_instance_dict():
+    record = RSVPRecord.from_dict(make_row())
+    assert not hasattr(record, '__dict__')
+
+
+def test_none_reads_as_absent():
+    record = RSVPRecord.from_dict(make_row(comment=None))
+    assert 'comment' not in record
+    assert len(record) == len(make_row()) - 1
+    del record['token']
+    assert record.get('token') is None
+    with pytest.raises(KeyError):
+        del record['token']
+
+
+def test_mapping_methods_not_list_methods():
+    record = RSVPRecord.from_dict(make_row(num_guests=3))
+    assert record.pop('num_guests') == 3
+    assert record.pop('num_guests', None) is None
+    assert 'Alex Smith' not in record
+    assert record != list(record.values())
+
+
+def test_json_round_trip():
+    """Files stay a list of plain dicts"""
+    rows = [make_row(), make_row(email='sam@example.com', updated_at='2030-01-02T00:00:00', num_guests=2)]
+    data = json_store.loads(json_store.dumps(records_to_json(records_from_dicts(rows))))
+    assert data == rows
+    assert records_from_json(data) == rows
+    assert all(type(record) is RSVPRecord for record in records_from_json(data))
+
+
+def test_stdlib_codec_round_trip(monkeypatch):
+    monkeypatch.setattr(json_store, 'orjson', None)
+    rows = [make_row(), make_row(num_guests=2)]
+    assert json_store.loads(json_store.dumps(records_from_dicts(rows))) == rows
+
+
+def test_reads_row_layout(tmp_path):
+    """Files saved in the {"fields", "rows"} layout still load"""
+    rows = [make_row(), make_row(email='sam@example.com')]
+    json_store.atomic_write(str(tmp_path / 'rsvps_ev1.json'), rows)
+    assert load_records(str(tmp_path / 'rsvps_ev1.json')) == rows
+    reordered = {'fields': ['name', 'email'], 'rows': [['Alex Smith', 'alex@example.com']]}
+    assert records_from_json(reordered) == [{'name': 'Alex Smith', 'email': 'alex@example.com'}]
+
+
+def test_copy_and_pickle():
+    record = RSVPRecord.from_dict(make_row(num_guests=3))
+    for duplicate in (copy.copy(record), copy.deepcopy(record), record.copy(),
+                      pickle.loads(pickle.dumps(record))):
+        assert type(duplicate) is RSVPRecord
+        assert duplicate == make_row(num_guests=3)
+    duplicate = record.copy()
+    duplicate['name'] = 'Sam Smith'
+    assert record['name'] == 'Alex Smith'
+
+
+def test_json_encoders():
+    record = RSVPRecord.from_dict(make_row())
+    assert json_store.loads(json_store.dumps(record)) == make_row()
+    assert json.loads(json.dumps(dict(record))) == make_row()
+    with pytest.raises(TypeError):
+        json.dumps(record)
+
+
+def test_attending_is_interned():
+    record = RSVPRecord.from_dict(json.loads(json.dumps(make_row())))
+    assert record['attending'] is ATTENDING_YES
+    record['attending'] = ''.join(['y', 'es'])
+    assert record['attending'] is ATTENDING_YES
+
+
+def test_csv_export_accepts_records():
+    assert generate_rsvps_csv(records_from_dicts([make_row()])) == generate_rsvps_csv([make_row()])
+
+
+def test_keyword_unpacking():
+    """url_for(..., **rsvp_entry) in the RSVP view relies on this"""
+    def collect(**kwargs):
+        return kwargs
+    assert collect(**RSVPRecord.from_dict(make_row())) == make_row()
@@ -0,0 +1,266 @@
+#!/usr/bin/python3
+"""Point-in-time snapshots of the site's data, taken while it is serving.
+
+A snapshot covers data/events/, the rsvps_*.json files in the working
+directory, admins.json, data/archive/ and the images extracted from
+event descriptions (static/uploads/). Each store is only ever
+written by renaming a finished temp file over the old one
+(json_store.atomic_write), so a file's inode always holds one complete
+version. A snapshot therefore hard-links every file instead of copying
+it. That takes no locks, so RSVP writes carry on. Then it checks that
+every path still points at the inode it linked. Files replaced in the
+meantime are linked again and the check repeats, until a pass finds
+nothing changed. At that point every linked version was current at the
+same moment.
+
+Each snapshot is written to data/snapshots/:
+
+    <name>/          the hard-linked tree (only the newest few are kept)
+    <name>.json      manifest: every file, and which archive holds its version
+    <name>.tar.gz    only the files that changed since the previous snapshot
+
+Restoring a snapshot extracts each file from the archive its manifest
+names (see restore()).
+
+The admin "create snapshot" button runs take_snapshot() inside its
+request, so that worker is busy until the .tar.gz of changed files is
+written. For a large site, run this module from cron instead.
+
+    python snapshot.py                  # take a snapshot
+    python snapshot.py --restore NAME DIR
+"""
+import argparse
+import fnmatch
+import os
+import re
+import shutil
+import tarfile
+from datetime import datetime
+
+from flask import Blueprint, jsonify, send_from_directory
+
+import json_store
+from file_lock import locked
+from passkey_auth import owner_required
+
+snapshot_bp = Blueprint('snapshot', __name__)
+
+DEFAULT_SNAPSHOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'data', 'snapshots'))
+DEFAULT_KEEP_TREES = 3
+# Under a constant stream of writes, give up waiting for a quiet pass
+# after this many and record the snapshot as not consistent
+MAX_PASSES = 10
+
+_SNAPSHOT_NAME = re.compile(r'^\d{8}-\d{6}(-\d+)?$')
+
+
+def default_sources():
+    """(name in the snapshot, directory or file, glob) for every store backed up."""
+    import archive
+    import event_config
+    import passkey_auth
+    return [
+        ('events', event_config._instance.events_dir, '*.json'),
+        ('rsvps', os.getcwd(), 'rsvps_*.json'),
+        ('admins.json', passkey_auth.ADMINS_FILE, None),
+        ('archive', archive._instance.archive_dir, '*.json*'),
+        ('uploads', event_config._instance.images_dir, '*'),
+    ]
+
+
+class SnapshotManager:
+    def __init__(self, snapshot_dir=None, sources=None, keep_trees=DEFAULT_KEEP_TREES):
+        self.snapshot_dir = snapshot_dir if snapshot_dir is not None else DEFAULT_SNAPSHOT_DIR
+        self.sources = sources
+        self.keep_trees = keep_trees
+
+    def _list_files(self):
+        files = {}
+        for name, path, pattern in (self.sources or default_sources()):
+            if pattern is None:
+                if os.path.isfile(path):
+                    files[name] = path
+                continue
+            try:
+                entries = os.listdir(path)
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if fnmatch.fnmatch(entry, pattern) and not entry.endswith(('.tmp', '.lock')):
+                    files[f'{name}/{entry}'] = os.path.join(path, entry)
+        return files
+
+    @staticmethod
+    def _capture(src, dst):
+        """Hard-link ``src`` to ``dst``, copying across filesystems; returns the captured stat."""
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        if os.path.lexists(dst):
+            os.remove(dst)
+        try:
+            os.link(src, dst)
+            return os.stat(dst)
+        except OSError:
+            with open(src, 'rb') as f_src, open(dst, 'wb') as f_dst:
+                shutil.copyfileobj(f_src, f_dst)
+                return os.fstat(f_src.fileno())
+
+    def _capture_stable(self, tree):
+        """Link every source file into ``tree`` until a pass finds none replaced."""
+        captured = {}
+        for _ in range(MAX_PASSES):
+            files = self._list_files()
+            changed = False
+            for rel, src in files.items():
+                try:
+                    st = os.stat(src)
+                except FileNotFoundError:
+                    changed = True
+                    continue
+                if rel in captured and captured[rel].st_ino == st.st_ino:
+                    continue
+                try:
+                    captured[rel] = self._capture(src, os.path.join(tree, rel))
+                except FileNotFoundError:
+                    pass
+                changed = True
+            for rel in set(captured) - set(files):
+                os.remove(os.path.join(tree, rel))
+                del captured[rel]
+                changed = True
+            if not changed:
+                return captured, True
+        return captured, False
+
+    def _snapshot_names(self):
+        try:
+            entries = os.listdir(self.snapshot_dir)
+        except FileNotFoundError:
+            return []
+        return sorted(entry[:-len('.json')] for entry in entries
+                      if entry.endswith('.json') and _SNAPSHOT_NAME.match(entry[:-len('.json')]))
+
+    def load_manifest(self, name):
+        if not _SNAPSHOT_NAME.match(name or ''):
+            return None
+        try:
+            return json_store.load(os.path.join(self.snapshot_dir, f'{name}.json'))
+        except FileNotFoundError:
+            return None
+
+    def list_snapshots(self):
+        """Manifests without their file lists, newest first."""
+        snapshots = []
+        for name in reversed(self._snapshot_names()):
+            manifest = self.load_manifest(name)
+            if manifest:
+                snapshots.append({key: value for key, value in manifest.items() if key != 'files'})
+        return snapshots
+
+    def take_snapshot(self):
+        """Capture every store and write the incremental archive; returns the manifest."""
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        with locked(os.path.join(self.snapshot_dir, '.lock')):
+            names = self._snapshot_names()
+            previous = self.load_manifest(names[-1]) if names else None
+
+            name = datetime.now().strftime('%Y%m%d-%H%M%S')
+            suffix = 1
+            while name in names or os.path.exists(os.path.join(self.snapshot_dir, name)):
+                suffix += 1
+                name = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{suffix}"
+
+            tree = os.path.join(self.snapshot_dir, name)
+            partial = tree + '.partial'
+            shutil.rmtree(partial, ignore_errors=True)
+            captured, consistent = self._capture_stable(partial)
+            os.rename(partial, tree)
+
+            previous_files = previous['files'] if previous else {}
+            files, changed = {}, []
+            for rel, st in sorted(captured.items()):
+                entry = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'inode': st.st_ino, 'archive': name}
+                before = previous_files.get(rel)
+                if before and all(before[key] == entry[key] for key in ('size', 'mtime_ns', 'inode')):
+                    entry['archive'] = before['archive']
+                else:
+                    changed.append(rel)
+                files[rel] = entry
+
+            archive_path = os.path.join(self.snapshot_dir, f'{name}.tar.gz')
+            with tarfile.open(archive_path + '.tmp', 'w:gz') as tar:
+                for rel in changed:
+                    tar.add(os.path.join(tree, rel), arcname=rel)
+            os.replace(archive_path + '.tmp', archive_path)
+
+            manifest = {
+                'name': name,
+                'created_at': datetime.now().isoformat(),
+                'consistent': consistent,
+                'previous': previous['name'] if previous else None,
+                'file_count': len(files),
+                'changed_count': len(changed),
+                'archive_bytes': os.path.getsize(archive_path),
+                'files': files,
+            }
+            json_store.atomic_write(os.path.join(self.snapshot_dir, f'{name}.json'), manifest)
+            self._prune_trees()
+            return manifest
+
+    def _prune_trees(self):
+        names = self._snapshot_names()
+        for name in names[:-self.keep_trees] if self.keep_trees else names:
+            shutil.rmtree(os.path.join(self.snapshot_dir, name), ignore_errors=True)
+
+    def restore(self, name, target_dir):
+        """Extract snapshot ``name`` into ``target_dir`` (events/, rsvps/, admins.json, archive/, uploads/)."""
+        manifest = self.load_manifest(name)
+        if manifest is None:
+            raise FileNotFoundError(f"No snapshot named {name!r}")
+        by_archive = {}
+        for rel, entry in manifest['files'].items():
+            by_archive.setdefault(entry['archive'], []).append(rel)
+        for archive_name, rels in by_archive.items():
+            with tarfile.open(os.path.join(self.snapshot_dir, f'{archive_name}.tar.gz')) as tar:
+                tar.extractall(target_dir, members=[tar.getmember(rel) for rel in rels], filter='data')
+        return sorted(manifest['files'])
+
+
+# Create a singleton instance
+_instance = SnapshotManager()
+
+
+@snapshot_bp.route('/admin/snapshots')
+@owner_required
+def snapshot_list():
+    return jsonify({'snapshots': _instance.list_snapshots()})
+
+
+@snapshot_bp.route('/admin/snapshots/create', methods=['POST'])
+@owner_required
+def create_snapshot():
+    # Runs synchronously: the archive is written before this responds
+    manifest = _instance.take_snapshot()
+    return jsonify({'success': True, 'snapshot': {key: value for key, value in manifest.items() if key != 'files'}})
+
+
+@snapshot_bp.route('/admin/snapshots/<name>.tar.gz')
+@owner_required
+def download_snapshot(name):
+    if not _SNAPSHOT_NAME.match(name):
+        return "Snapshot not found", 404
+    return send_from_directory(_instance.snapshot_dir, f'{name}.tar.gz', as_attachment=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--restore', nargs=2, metavar=('NAME', 'DIR'), help='extract a snapshot into DIR')
+    args = parser.parse_args()
+
+    if args.restore:
+        restored = _instance.restore(*args.restore)
+        print(f"Restored {len(restored)} files into {args.restore[1]}")
+    else:
+        manifest = _instance.take_snapshot()
+        state = 'consistent' if manifest['consistent'] else 'NOT consistent (writes never settled)'
+        print(f"Snapshot {manifest['name']}: {manifest['file_count']} files, "
+              f"{manifest['changed_count']} changed, {state}")
@@ -0,0 +1,125 @@
+import os
+import tarfile
+import threading
+import time
+import json_store
+import snapshot
+from snapshot import SnapshotManager
+
+
+def make_manager(tmp_path, **kwargs):
+    data = tmp_path / 'data'
+    (data / 'events').mkdir(parents=True)
+    (data / 'rsvps').mkdir()
+    sources = [
+        ('events', str(data / 'events'), '*.json'),
+        ('rsvps', str(data / 'rsvps'), 'rsvps_*.json'),
+        ('admins.json', str(data / 'admins.json'), None),
+    ]
+    return SnapshotManager(str(tmp_path / 'snapshots'), sources=sources, **kwargs), data
+
+
+def read_restored(target):
+    return {os.path.relpath(os.path.join(root, name), target): json_store.load(os.path.join(root, name))
+            for root, _, names in os.walk(target) for name in names}
+
+
+def test_snapshot_and_restore(tmp_path):
+    manager, data = make_manager(tmp_path)
+    json_store.atomic_write(str(data / 'events' / 'party.json'), {'slug': 'party'})
+    json_store.atomic_write(str(data / 'rsvps' / 'rsvps_ev1.json'), [{'name': 'Alex'}])
+    json_store.atomic_write(str(data / 'admins.json'), {'admins': []})
+    json_store.atomic_write(str(data / 'rsvps' / 'notes.json'), {})  # not matched by any source
+
+    manifest = manager.take_snapshot()
+    assert manifest['consistent']
+    assert sorted(manifest['files']) == ['admins.json', 'events/party.json', 'rsvps/rsvps_ev1.json']
+
+    manager.restore(manifest['name'], str(tmp_path / 'restored'))
+    assert read_restored(str(tmp_path / 'restored')) == {
+        'admins.json': {'admins': []},
+        'events/party.json': {'slug': 'party'},
+        'rsvps/rsvps_ev1.json': [{'name': 'Alex'}],
+    }
+
+
+def test_second_snapshot_only_archives_changes(tmp_path):
+    manager, data = make_manager(tmp_path)
+    json_store.atomic_write(str(data / 'events' / 'party.json'), {'slug': 'party'})
+    json_store.atomic_write(str(data / 'events' / 'gone.json'), {'slug': 'gone'})
+    json_store.atomic_write(str(data / 'rsvps' / 'rsvps_ev1.json'), [{'name': 'Alex'}])
+    first = manager.take_snapshot()
+
+    json_store.atomic_write(str(data / 'rsvps' / 'rsvps_ev1.json'), [{'name': 'Alex'}, {'name': 'Sam'}])
+    os.remove(data / 'events' / 'gone.json')
+    second = manager.take_snapshot()
+
+    assert second['previous'] == first['name']
+    assert second['changed_count'] == 1
+    with tarfile.open(tmp_path / 'snapshots' / f"{second['name']}.tar.gz") as tar:
+        assert tar.getnames() == ['rsvps/rsvps_ev1.json']
+    assert second['files']['events/party.json']['archive'] == first['name']
+
+    manager.restore(second['name'], str(tmp_path / 'restored'))
+    assert read_restored(str(tmp_path / 'restored')) == {
+        'events/party.json': {'slug': 'party'},
+        'rsvps/rsvps_ev1.json': [{'name': 'Alex'}, {'name': 'Sam'}],
+    }
+    assert [s['name'] for s in manager.list_snapshots()] == [second['name'], first['name']]
+
+
+def test_snapshot_is_consistent_while_writes_continue(tmp_path):
+    """A writer updates two files in order; a snapshot must never see the second ahead of the first"""
+    manager, data = make_manager(tmp_path, keep_trees=0)
+    first, second = str(data / 'rsvps' / 'rsvps_a.json'), str(data / 'rsvps' / 'rsvps_b.json')
+    json_store.atomic_write(first, 0, fsync=False)
+    json_store.atomic_write(second, 0, fsync=False)
+    stop = threading.Event()
+
+    def writer():
+        generation = 0
+        while not stop.is_set():
+            generation += 1
+            json_store.atomic_write(first, generation, fsync=False)
+            json_store.atomic_write(second, generation, fsync=False)
+            time.sleep(0.0005)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        for _ in range(20):
+            manifest = manager.take_snapshot()
+            target = str(tmp_path / 'restored' / manifest['name'])
+            manager.restore(manifest['name'], target)
+            restored = read_restored(target)
+            if manifest['consistent']:
+                assert 0 <= restored['rsvps/rsvps_a.json'] - restored['rsvps/rsvps_b.json'] <= 1
+    finally:
+        stop.set()
+        thread.join()
+
+
+def test_copies_when_hard_links_are_unavailable(tmp_path, monkeypatch):
+    manager, data = make_manager(tmp_path)
+    json_store.atomic_write(str(data / 'admins.json'), {'admins': ['owner']})
+
+    def no_link(src, dst):
+        raise OSError(18, 'Invalid cross-device link')
+    monkeypatch.setattr(snapshot.os, 'link', no_link)
+    manifest = manager.take_snapshot()
+    manager.restore(manifest['name'], str(tmp_path / 'restored'))
+    assert read_restored(str(tmp_path / 'restored')) == {'admins.json': {'admins': ['owner']}}
+
+
+def test_old_trees_are_pruned(tmp_path):
+    manager, data = make_manager(tmp_path, keep_trees=1)
+    json_store.atomic_write(str(data / 'admins.json'), {})
+    names = [manager.take_snapshot()['name'] for _ in range(2)]
+    assert not os.path.isdir(tmp_path / 'snapshots' / names[0])
+    assert os.path.isdir(tmp_path / 'snapshots' / names[1])
+    assert manager.load_manifest('../admins') is None
+
+
+def test_default_sources_include_uploaded_images():
+    import event_config
+    assert ('uploads', event_config._instance.images_dir, '*') in snapshot.default_sources()
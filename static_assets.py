@@ -0,0 +1,281 @@
+#!/usr/bin/python3
+"""Build step and template helpers for fingerprinted static assets.
+
+Running this module copies every file in static/ to static/dist/ under a
+content-hashed name, converts images to WebP/AVIF with resized
+thumbnails (when Pillow is installed), precompresses text assets to
+.gz/.br, and writes static/dist/manifest.json. Templates call
+asset_url()/image_sources(), which resolve through the manifest and fall
+back to the plain /static/ path when it hasn't been built.
+
+Text assets are precompressed both as their hashed copies in dist/ and
+in place in static/, so plain /static/ URLs (templates without
+asset_url(), a tree whose manifest is missing) are compressed too. A
+variant older than its source, left behind when a file was edited
+without rebuilding, is never served.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+from io import BytesIO
+
+from flask import current_app, request, send_from_directory, url_for
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+STATIC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'static'))
+DIST_DIR_NAME = 'dist'
+# Images pulled out of event descriptions, named by content (see inline_images)
+UPLOADS_DIR_NAME = 'uploads'
+MANIFEST_NAME = 'manifest.json'
+
+IMAGE_EXTENSIONS = {'.png': 'PNG', '.jpg': 'JPEG', '.jpeg': 'JPEG'}
+MODERN_FORMATS = (('avif', 'AVIF', 'image/avif'), ('webp', 'WEBP', 'image/webp'))
+# 48px covers the 24px calendar icons on high-DPI screens
+THUMBNAIL_WIDTHS = (48, 480, 960)
+
+IMMUTABLE_MAX_AGE = 31536000
+PRECOMPRESS_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.html')
+# Preferred first when the client accepts both
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+_CSS_URL_PATTERN = re.compile(r"""url\((['"]?)/static/([^'")]+)\1\)""")
+# The names _hashed_name() and inline_images give files; dist/manifest.json
+# is rewritten on every build, so it must not match
+_FINGERPRINTED_PATTERN = re.compile(
+    rf'^(?:{DIST_DIR_NAME}/[^/]+\.[0-9a-f]{{10}}|{UPLOADS_DIR_NAME}/[0-9a-f]{{32}})\.[A-Za-z0-9]+$')
+
+
+def _hashed_name(name, data):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+
+
+def _emit(dist_dir, name, data, files):
+    """Write ``data`` under its content-hashed name and record it in ``files``."""
+    hashed = _hashed_name(name, data)
+    path = os.path.join(dist_dir, hashed)
+    if not os.path.exists(path):
+        with open(path, 'wb') as f:
+            f.write(data)
+    files[name] = hashed
+    return hashed
+
+
+def _precompress(path):
+    """Write .gz (and .br when brotli is installed) next to ``path`` if smaller."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    compressed = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    try:
+        import brotli
+        compressed['.br'] = brotli.compress(data, quality=11)
+    except ImportError:
+        pass
+    for suffix, payload in compressed.items():
+        if len(payload) < len(data):
+            with open(path + suffix, 'wb') as f:
+                f.write(payload)
+
+
+def _image_variants(path, widths):
+    """Yield (width, extension, bytes) for modern formats and thumbnails of one image."""
+    from PIL import Image, features
+
+    with Image.open(path) as img:
+        img.load()
+    original_ext = os.path.splitext(path)[1].lower()
+    original_format = IMAGE_EXTENSIONS[original_ext]
+
+    for width in [w for w in widths if w < img.width] + [img.width]:
+        if width == img.width:
+            resized = img
+        else:
+            resized = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+
+        for ext, pil_format, _ in MODERN_FORMATS:
+            if not features.check(ext):
+                continue
+            buffer = BytesIO()
+            resized.save(buffer, format=pil_format, quality=80)
+            yield width, '.' + ext, buffer.getvalue()
+
+        # Full-size original is copied as-is; only its thumbnails are re-encoded
+        if width != img.width:
+            buffer = BytesIO()
+            save_image = resized.convert('RGB') if original_format == 'JPEG' else resized
+            save_image.save(buffer, format=original_format, optimize=True)
+            yield width, original_ext, buffer.getvalue()
+
+
+def build_assets(static_dir=STATIC_DIR, widths=THUMBNAIL_WIDTHS):
+    """Fingerprint everything in ``static_dir`` into its dist/ folder and write the manifest."""
+    dist_dir = os.path.join(static_dir, DIST_DIR_NAME)
+    os.makedirs(dist_dir, exist_ok=True)
+    manifest = {'files': {}, 'images': {}}
+    files = manifest['files']
+
+    names = sorted(
+        name for name in os.listdir(static_dir)
+        if os.path.isfile(os.path.join(static_dir, name))
+        and not name.endswith(tuple(suffix for _, suffix in ENCODINGS))
+    )
+
+    # Images first so stylesheets can be rewritten to point at hashed names
+    for name in names:
+        stem, ext = os.path.splitext(name)
+        if ext.lower() not in IMAGE_EXTENSIONS:
+            continue
+        path = os.path.join(static_dir, name)
+        with open(path, 'rb') as f:
+            _emit(dist_dir, name, f.read(), files)
+
+        try:
+            variants = list(_image_variants(path, widths))
+        except ImportError:
+            print(f"Pillow not installed; skipping image variants for {name}")
+            continue
+
+        image = manifest['images'][name] = {'variants': {}}
+        for width, variant_ext, data in variants:
+            variant_name = f"{stem}-{width}w{variant_ext}"
+            _emit(dist_dir, variant_name, data, files)
+            image['variants'].setdefault(variant_ext.lstrip('.'), {})[str(width)] = variant_name
+
+    for name in names:
+        if name in files:
+            continue
+        with open(os.path.join(static_dir, name), 'rb') as f:
+            data = f.read()
+        if name.endswith('.css'):
+            css = _CSS_URL_PATTERN.sub(
+                lambda m: f"url({m.group(1)}/static/{DIST_DIR_NAME}/{files.get(m.group(2), m.group(2))}{m.group(1)})"
+                if m.group(2) in files else m.group(0),
+                data.decode('utf-8'))
+            data = css.encode('utf-8')
+        hashed = _emit(dist_dir, name, data, files)
+        if name.endswith(PRECOMPRESS_EXTENSIONS):
+            _precompress(os.path.join(dist_dir, hashed))
+            _precompress(os.path.join(static_dir, name))
+
+    temp_file = os.path.join(dist_dir, MANIFEST_NAME + '.tmp')
+    with open(temp_file, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_file, os.path.join(dist_dir, MANIFEST_NAME))
+    return manifest
+
+
+_manifest = None
+
+
+def load_manifest(static_dir=STATIC_DIR):
+    """Load and cache the manifest; an unbuilt tree gets an empty one."""
+    global _manifest
+    try:
+        with open(os.path.join(static_dir, DIST_DIR_NAME, MANIFEST_NAME), 'r') as f:
+            _manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        _manifest = {'files': {}, 'images': {}}
+    return _manifest
+
+
+def _get_manifest():
+    return _manifest if _manifest is not None else load_manifest()
+
+
+def is_fingerprinted(filename):
+    """True for content-hashed names under dist/ and uploads/, which never change."""
+    return bool(_FINGERPRINTED_PATTERN.match(filename))
+
+
+def asset_url(filename):
+    """Return the URL for a static file, preferring its fingerprinted copy."""
+    hashed = _get_manifest()['files'].get(filename)
+    if hashed:
+        return url_for('static', filename=f'{DIST_DIR_NAME}/{hashed}')
+    return url_for('static', filename=filename)
+
+
+def image_sources(filename):
+    """Return (mime type, srcset) pairs of modern formats for a <picture> element."""
+    manifest = _get_manifest()
+    image = manifest['images'].get(filename)
+    if not image:
+        return []
+    sources = []
+    for ext, _, mime in MODERN_FORMATS:
+        widths = image['variants'].get(ext)
+        if not widths:
+            continue
+        srcset = ', '.join(
+            f"{asset_url(name)} {width}w"
+            for width, name in sorted(widths.items(), key=lambda item: int(item[0]))
+        )
+        sources.append((mime, srcset))
+    return sources
+
+
+def negotiate_encoding(static_dir, filename, accept_encodings):
+    """Pick a precompressed variant of ``filename`` the client accepts.
+
+    Returns (path to send, Content-Encoding or None).
+    """
+    if filename.endswith(PRECOMPRESS_EXTENSIONS):
+        source = safe_join(static_dir, filename)
+        for encoding, suffix in ENCODINGS:
+            if not accept_encodings[encoding]:
+                continue
+            path = safe_join(static_dir, filename + suffix)
+            try:
+                if path and os.stat(path).st_mtime_ns >= os.stat(source).st_mtime_ns:
+                    return filename + suffix, encoding
+            except (FileNotFoundError, TypeError):
+                continue
+    return filename, None
+
+
+def send_static(filename):
+    """Serve a file from static/ for the app's static endpoint.
+
+    Precompressed variants are chosen by Accept-Encoding (STATIC_PRECOMPRESSED,
+    on by default). With STATIC_SENDFILE = 'x-accel-redirect' the body is
+    left to nginx via an internal redirect under STATIC_ACCEL_PREFIX; Flask's
+    own USE_X_SENDFILE covers Apache/lighttpd-style X-Sendfile.
+    """
+    config = current_app.config
+    static_dir = os.path.join(current_app.root_path, 'static')
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    max_age = IMMUTABLE_MAX_AGE if is_fingerprinted(filename) else None
+
+    path, encoding = filename, None
+    if config.get('STATIC_PRECOMPRESSED', True):
+        path, encoding = negotiate_encoding(static_dir, filename, request.accept_encodings)
+
+    if config.get('STATIC_SENDFILE') == 'x-accel-redirect':
+        full_path = safe_join(static_dir, path)
+        if not full_path or not os.path.isfile(full_path):
+            raise NotFound()
+        response = current_app.response_class(mimetype=mimetype)
+        response.headers['X-Accel-Redirect'] = config.get('STATIC_ACCEL_PREFIX', '/_static/') + path
+        if max_age:
+            response.cache_control.public = True
+            response.cache_control.max_age = max_age
+    else:
+        response = send_from_directory(static_dir, path, mimetype=mimetype, max_age=max_age)
+
+    if max_age:
+        # Content-hashed names never change, so browsers can keep them forever
+        response.cache_control.immutable = True
+    if encoding:
+        response.content_encoding = encoding
+    if filename.endswith(PRECOMPRESS_EXTENSIONS):
+        response.vary.add('Accept-Encoding')
+    return response
+
+
+if __name__ == '__main__':
+    built = build_assets()
+    print(f"Built {len(built['files'])} assets into {os.path.join(STATIC_DIR, DIST_DIR_NAME)}")
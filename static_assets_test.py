@@ -0,0 +1,171 @@
+import os
+import pytest
+from flask import Flask
+import static_assets
+from static_assets import build_assets, load_manifest, asset_url, image_sources, is_fingerprinted
+
+
+@pytest.fixture
+def static_dir(tmp_path):
+    """A small static/ folder with a stylesheet that references an image."""
+    directory = tmp_path / "static"
+    directory.mkdir()
+    (directory / "site.css").write_text("body { background: url('/static/bg.png'); }")
+    (directory / "app.js").write_text("console.log('hi');")
+    return directory
+
+
+@pytest.fixture
+def request_context():
+    app = Flask(__name__)
+    with app.test_request_context():
+        yield
+    static_assets._manifest = None
+
+
+def add_png(static_dir, name='bg.png', width=1000):
+    Image = pytest.importorskip('PIL.Image')
+    Image.new('RGB', (width, width // 2), (200, 50, 50)).save(static_dir / name)
+
+
+def test_build_fingerprints_files(static_dir):
+    """Every file is copied to dist/ under a content-hashed name"""
+    manifest = build_assets(str(static_dir))
+    hashed = manifest['files']['app.js']
+    assert hashed.startswith('app.') and hashed.endswith('.js')
+    assert (static_dir / "dist" / hashed).read_text() == "console.log('hi');"
+    assert (static_dir / "dist" / "manifest.json").exists()
+
+
+def test_hash_changes_with_content(static_dir):
+    """Editing a file gives it a new name, so cached copies are never stale"""
+    first = build_assets(str(static_dir))['files']['app.js']
+    (static_dir / "app.js").write_text("console.log('changed');")
+    second = build_assets(str(static_dir))['files']['app.js']
+    assert first != second
+
+
+def test_css_urls_rewritten(static_dir):
+    """Stylesheets point at the fingerprinted copies of the images they use"""
+    add_png(static_dir)
+    manifest = build_assets(str(static_dir))
+    css = (static_dir / "dist" / manifest['files']['site.css']).read_text()
+    assert f"/static/dist/{manifest['files']['bg.png']}" in css
+
+
+def test_image_variants(static_dir):
+    """Images get modern formats and thumbnails narrower than the original"""
+    add_png(static_dir)
+    manifest = build_assets(str(static_dir), widths=(100, 2000))
+    variants = manifest['images']['bg.png']['variants']
+    assert set(variants['webp']) == {'100', '1000'}
+    assert set(variants['png']) == {'100'}
+    for name in variants['webp'].values():
+        assert os.path.exists(static_dir / "dist" / manifest['files'][name])
+
+
+def test_asset_url_without_manifest(tmp_path, request_context):
+    """Without a build, URLs fall back to the plain static path"""
+    load_manifest(str(tmp_path))
+    assert asset_url('app.js') == '/static/app.js'
+    assert image_sources('bg.png') == []
+
+
+def test_asset_url_with_manifest(static_dir, request_context):
+    """After a build, URLs resolve to the fingerprinted copy"""
+    add_png(static_dir)
+    manifest = build_assets(str(static_dir), widths=(100,))
+    load_manifest(str(static_dir))
+
+    assert asset_url('app.js') == f"/static/dist/{manifest['files']['app.js']}"
+    sources = dict(image_sources('bg.png'))
+    assert sources['image/webp'].endswith(' 1000w')
+    assert ' 100w, ' in sources['image/webp']
+
+
+def test_is_fingerprinted():
+    assert is_fingerprinted('dist/app.0123456789.js')
+    assert is_fingerprinted('uploads/0123456789abcdef0123456789abcdef.png')
+    assert not is_fingerprinted('app.js')
+    assert not is_fingerprinted('dist/manifest.json')
+    assert not is_fingerprinted('dist/app.js')
+    assert not is_fingerprinted('uploads/photo.png')
+
+
+@pytest.fixture
+def static_client(tmp_path, static_dir):
+    """An app rooted at tmp_path whose static endpoint uses send_static."""
+    app = Flask(__name__, root_path=str(tmp_path), static_folder=None)
+    app.add_url_rule('/static/<path:filename>', 'static', static_assets.send_static)
+    return app.test_client()
+
+
+def test_build_precompresses_text_assets(static_dir):
+    """Text assets get a gzip variant next to the hashed copy"""
+    (static_dir / "big.css").write_text("body { color: red; }\n" * 200)
+    manifest = build_assets(str(static_dir))
+    assert (static_dir / "dist" / (manifest['files']['big.css'] + '.gz')).exists()
+
+
+def test_serves_gzip_when_accepted(static_dir, static_client):
+    """Clients that accept gzip get the precompressed file"""
+    (static_dir / "big.css").write_text("body { color: red; }\n" * 200)
+    hashed = build_assets(str(static_dir))['files']['big.css']
+
+    response = static_client.get(f'/static/dist/{hashed}', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.mimetype == 'text/css'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert 'immutable' in response.headers['Cache-Control']
+    import gzip
+    assert gzip.decompress(response.data) == (static_dir / "big.css").read_bytes()
+
+
+def test_plain_static_urls_precompressed(static_dir, static_client):
+    """Sources outside dist/ get variants too, and a rebuild doesn't fingerprint them"""
+    (static_dir / "big.css").write_text("body { color: red; }\n" * 200)
+    build_assets(str(static_dir))
+    assert (static_dir / "big.css.gz").exists()
+    assert 'big.css.gz' not in build_assets(str(static_dir))['files']
+
+    response = static_client.get('/static/big.css', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'immutable' not in response.headers.get('Cache-Control', '')
+
+
+def test_stale_variant_not_served(static_dir, static_client):
+    """Editing a source without rebuilding falls back to the source itself"""
+    (static_dir / "big.css").write_text("body { color: red; }\n" * 200)
+    build_assets(str(static_dir))
+    (static_dir / "big.css").write_text("body { color: blue; }\n" * 200)
+    stamp = os.stat(static_dir / "big.css.gz").st_mtime_ns + 1_000_000_000
+    os.utime(static_dir / "big.css", ns=(stamp, stamp))
+
+    response = static_client.get('/static/big.css', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert b'blue' in response.data
+
+
+def test_serves_plain_without_accept_encoding(static_dir, static_client):
+    """Clients that don't accept compression get the original bytes"""
+    (static_dir / "big.css").write_text("body { color: red; }\n" * 200)
+    hashed = build_assets(str(static_dir))['files']['big.css']
+
+    response = static_client.get(f'/static/dist/{hashed}', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.data == (static_dir / "big.css").read_bytes()
+
+
+def test_x_accel_redirect(static_dir, static_client):
+    """In x-accel-redirect mode the body is left to the front-end server"""
+    static_client.application.config['STATIC_SENDFILE'] = 'x-accel-redirect'
+    (static_dir / "big.css").write_text("body { color: red; }\n" * 200)
+    hashed = build_assets(str(static_dir))['files']['big.css']
+
+    response = static_client.get(f'/static/dist/{hashed}', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['X-Accel-Redirect'] == f'/_static/dist/{hashed}.gz'
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.data == b''
+
+    assert static_client.get('/static/missing.css').status_code == 404
@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+"""Index from RSVP update token to the event and position of its RSVP.
+
+Every RSVP write stores data/tokens/<first two chars>/<token>.json with
+the event id and the RSVP's position in that event's list. A token is
+then tied to its event by reading one small file, so the slug-less
+/r/<token> short link and links that carry a stale slug are redirected
+without opening any RSVP file.
+
+The update page itself still loads that one event's rsvps_<id>.json,
+which stays the only copy of the RSVP, so it costs as much as the event
+is large. The position only saves scanning the list for the token, and
+callers check it against the token found there.
+
+Run this module to rebuild the index from the RSVP files in the current
+directory:
+
+    python token_index.py
+"""
+import os
+import re
+
+import json_store
+from rsvp_record import load_records
+
+DEFAULT_INDEX_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'data', 'tokens'))
+
+_TOKEN_PATTERN = re.compile(r'^[A-Za-z0-9-]{8,64}$')
+
+
+def is_valid_token(token):
+    return bool(_TOKEN_PATTERN.match(token or ''))
+
+
+class TokenIndex:
+    def __init__(self, index_dir=None):
+        self.index_dir = index_dir if index_dir is not None else DEFAULT_INDEX_DIR
+
+    def _entry_path(self, token):
+        return os.path.join(self.index_dir, token[:2], f'{token}.json')
+
+    def record(self, token, event_id, position):
+        """Point ``token`` at the RSVP just written at ``position``."""
+        if not is_valid_token(token):
+            return
+        path = self._entry_path(token)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        json_store.atomic_write(path, {'event_id': event_id, 'position': position}, fsync=False)
+
+    def lookup(self, token):
+        """Return {'event_id', 'position'} for ``token``, or None."""
+        if not is_valid_token(token):
+            return None
+        try:
+            return json_store.load(self._entry_path(token))
+        except (FileNotFoundError, json_store.JSONDecodeError):
+            return None
+
+    def rebuild(self, events, rsvps_dir='.'):
+        """Re-index every RSVP of ``events``; returns the number of tokens indexed."""
+        count = 0
+        for event in events:
+            try:
+                rsvps = load_records(os.path.join(rsvps_dir, f"rsvps_{event['id']}.json"))
+            except (FileNotFoundError, json_store.JSONDecodeError):
+                continue
+            for position, rsvp in enumerate(rsvps):
+                if rsvp.get('token'):
+                    self.record(rsvp['token'], event['id'], position)
+                    count += 1
+        return count
+
+
+# Create a singleton instance
+_instance = TokenIndex()
+
+record = _instance.record
+lookup = _instance.lookup
+
+
+if __name__ == '__main__':
+    from event_config import get_all_events
+
+    indexed = _instance.rebuild(get_all_events().values())
+    print(f"Indexed {indexed} RSVP tokens into {_instance.index_dir}")
@@ -0,0 +1,49 @@
+import os
+import uuid
+import json_store
+from token_index import TokenIndex, is_valid_token
+
+
+def make_rsvp(token, name='Alex Smith'):
+    return {'name': name, 'email': 'alex@example.com', 'attending': 'yes', 'token': token}
+
+
+def test_record_and_lookup(tmp_path):
+    index = TokenIndex(str(tmp_path))
+    token = str(uuid.uuid4())
+    index.record(token, 'ev1', 3)
+    assert index.lookup(token) == {'event_id': 'ev1', 'position': 3}
+    assert os.path.exists(tmp_path / token[:2] / f'{token}.json')
+
+
+def test_later_write_replaces_entry(tmp_path):
+    index = TokenIndex(str(tmp_path))
+    token = str(uuid.uuid4())
+    index.record(token, 'ev1', 0)
+    index.record(token, 'ev1', 4)
+    assert index.lookup(token)['position'] == 4
+
+
+def test_unknown_token(tmp_path):
+    assert TokenIndex(str(tmp_path)).lookup(str(uuid.uuid4())) is None
+
+
+def test_rejects_tokens_that_are_not_safe_file_names(tmp_path):
+    index = TokenIndex(str(tmp_path / 'tokens'))
+    for token in ['../../admins', 'a/b/c/d/e', '', None, 'short']:
+        assert not is_valid_token(token)
+        index.record(token, 'ev1', 0)
+        assert index.lookup(token) is None
+    assert not os.path.exists(tmp_path / 'tokens')
+
+
+def test_rebuild_from_rsvp_files(tmp_path):
+    tokens = [str(uuid.uuid4()) for _ in range(3)]
+    json_store.atomic_write(str(tmp_path / 'rsvps_ev1.json'), [make_rsvp(tokens[0]), make_rsvp(tokens[1])])
+    json_store.atomic_write(str(tmp_path / 'rsvps_ev2.json'), [{'name': 'No token'}, make_rsvp(tokens[2])])
+    index = TokenIndex(str(tmp_path / 'tokens'))
+
+    events = [{'id': 'ev1'}, {'id': 'ev2'}, {'id': 'no-rsvps-yet'}]
+    assert index.rebuild(events, rsvps_dir=str(tmp_path)) == 3
+    assert index.lookup(tokens[1])['position'] == 1
+    assert index.lookup(tokens[2]) == {'event_id': 'ev2', 'position': 1}
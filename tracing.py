@@ -0,0 +1,132 @@
+"""Per-request span timing with a structured slow-request log.
+
+Code wraps interesting calls in span()/@traced; each span costs two
+perf_counter() calls and a list append on flask.g. When a request takes
+longer than SLOW_REQUEST_MS (default 500), its span breakdown is written
+as one JSON line to data/slow_requests.log.
+"""
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+from flask import before_render_template, g, has_request_context, request, template_rendered
+
+DEFAULT_SLOW_LOG = os.path.abspath(os.path.join(os.path.dirname(__file__), 'data', 'slow_requests.log'))
+
+
+def _current_spans():
+    return g.get('trace_spans') if has_request_context() else None
+
+
+@contextmanager
+def span(name):
+    """Time the enclosed block as ``name`` within the current request."""
+    spans = _current_spans()
+    if spans is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans.append((name, start, time.perf_counter()))
+
+
+def traced(name):
+    """Decorator form of span()."""
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return f(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class SlowRequestLog:
+    def __init__(self, log_path=None):
+        self.log_path = log_path if log_path is not None else DEFAULT_SLOW_LOG
+
+    def write(self, record):
+        os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+        line = (json.dumps(record) + '\n').encode('utf-8')
+        # One O_APPEND write per record keeps lines whole across workers
+        fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+
+# Create a singleton instance
+_instance = SlowRequestLog()
+
+
+def build_record(start, end, spans, status):
+    """Summarize a finished request and its spans as a JSON-friendly dict."""
+    totals = {}
+    for name, span_start, span_end in spans:
+        totals[name] = totals.get(name, 0.0) + (span_end - span_start) * 1000
+    return {
+        'time': datetime.now().isoformat(),
+        'pid': os.getpid(),
+        'method': request.method,
+        'path': request.path,
+        'endpoint': request.endpoint,
+        'status': status,
+        'duration_ms': round((end - start) * 1000, 3),
+        'totals_ms': {name: round(ms, 3) for name, ms in totals.items()},
+        'spans': [
+            {
+                'name': name,
+                'offset_ms': round((span_start - start) * 1000, 3),
+                'duration_ms': round((span_end - span_start) * 1000, 3),
+            }
+            for name, span_start, span_end in sorted(spans, key=lambda s: s[1])
+        ],
+    }
+
+
+def _template_started(sender, template, context, **extra):
+    if _current_spans() is not None:
+        g.trace_templates.append(time.perf_counter())
+
+
+def _template_finished(sender, template, context, **extra):
+    spans = _current_spans()
+    if spans is not None and g.trace_templates:
+        spans.append((f'render:{template.name}', g.trace_templates.pop(), time.perf_counter()))
+
+
+def init_app(app):
+    """Collect spans for every request and log the slow ones."""
+    before_render_template.connect(_template_started, app)
+    template_rendered.connect(_template_finished, app)
+
+    @app.before_request
+    def _start_trace():
+        g.trace_start = time.perf_counter()
+        g.trace_spans = []
+        g.trace_templates = []
+
+    @app.after_request
+    def _note_status(response):
+        g.trace_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _finish_trace(exc):
+        start = g.pop('trace_start', None)
+        if start is None:
+            return
+        end = time.perf_counter()
+        if (end - start) * 1000 < app.config.get('SLOW_REQUEST_MS', 500):
+            return
+        status = g.get('trace_status', 500 if exc else None)
+        try:
+            _instance.write(build_record(start, end, g.get('trace_spans', []), status))
+        except OSError as e:
+            app.logger.error(f"Failed to write slow request log: {e}")
@@ -0,0 +1,64 @@
+import json
+import os
+import time
+import pytest
+from flask import Flask, render_template_string
+import tracing
+from tracing import span, traced
+
+
+@traced('slow_call')
+def slow_call():
+    time.sleep(0.01)
+    return 'done'
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.config['SLOW_REQUEST_MS'] = 0
+    tracing.init_app(app)
+
+    @app.route('/work')
+    def work():
+        with span('load'):
+            pass
+        slow_call()
+        return render_template_string('<p>{{ value }}</p>', value=slow_call())
+
+    return app.test_client()
+
+
+def read_records():
+    with open(tracing._instance.log_path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_span_outside_request_is_noop():
+    """span() and @traced work (without recording) outside a request"""
+    with span('anything'):
+        pass
+    assert slow_call() == 'done'
+
+
+def test_slow_request_logged_with_spans(client):
+    """A request over the threshold is logged with its span breakdown"""
+    assert client.get('/work').status_code == 200
+
+    record = read_records()[0]
+    assert record['path'] == '/work'
+    assert record['endpoint'] == 'work'
+    assert record['status'] == 200
+    names = [s['name'] for s in record['spans']]
+    assert names.count('slow_call') == 2
+    assert 'load' in names
+    assert any(name.startswith('render:') for name in names)
+    assert record['totals_ms']['slow_call'] >= 20
+    assert record['duration_ms'] >= record['totals_ms']['slow_call']
+
+
+def test_fast_request_not_logged(client):
+    """Requests under the threshold leave no record"""
+    client.application.config['SLOW_REQUEST_MS'] = 10000
+    client.get('/work')
+    assert not os.path.exists(tracing._instance.log_path)
@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+"""Measure cold-import time and RSS of the app, as a fresh worker pays them.
+
+    python utils/measure_startup.py [--runs 10] [--module app]
+
+Each run imports the module in a new interpreter and reports the import
+wall time, the RSS afterwards, and which heavy optional dependencies got
+loaded along the way. Run it from the repo root with config.py present.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = (
+    'google_auth_oauthlib',
+    'googleapiclient',
+    'google.oauth2',
+    'webauthn',
+    'markdown',
+    'dateutil',
+)
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+rss = 0
+with open('/proc/self/status') as f:
+    for line in f:
+        if line.startswith('VmRSS:'):
+            rss = int(line.split()[1]) * 1024
+print(json.dumps({{
+    'seconds': elapsed,
+    'rss_bytes': rss,
+    'loaded': [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def measure(module, runs):
+    repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    probe = _PROBE.format(module=module, heavy=HEAVY_MODULES)
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', probe], cwd=repo_dir, capture_output=True,
+                                text=True, check=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        'module': module,
+        'runs': runs,
+        'import_ms_median': round(statistics.median(s['seconds'] for s in samples) * 1000, 1),
+        'import_ms_min': round(min(s['seconds'] for s in samples) * 1000, 1),
+        'rss_mib_median': round(statistics.median(s['rss_bytes'] for s in samples) / 2 ** 20, 1),
+        'heavy_modules_loaded': samples[-1]['loaded'],
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--module', default='app')
+    args = parser.parse_args()
+    print(json.dumps(measure(args.module, args.runs), indent=2))
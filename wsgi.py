@@ -0,0 +1,5 @@
+"""uWSGI entry point: the app, warmed in the master before workers fork."""
+from app import app, render_markdown
+from preload import preload
+
+preload(app, render_markdown)